@@ -0,0 +1,101 @@
+"""Bootstrap intervals and permutation p-values for PSI / KL from binned counts.
+
+Replicates are drawn on the histogram vectors behind ``calculate_psi`` /
+``calculate_kl`` rather than on raw rows, so their cost depends on the number
+of bins, not rows, and thousands of replicates are a few array operations:
+
+* bootstrap: each side's counts are redrawn Multinomial(n, observed shares)
+  and the percentile interval of the replicated metric is reported;
+* permutation: the pooled counts are split at random into groups of the two
+  original sizes (multivariate hypergeometric draws), which is exactly a
+  permutation of the row labels. The p-value is
+  ``(1 + #{replicates >= observed}) / (1 + n_perm)``.
+
+Bins are held fixed at the reference quantiles / range; their own estimation
+error is not resampled. PSI and KL are biased upwards on small samples, and
+percentile intervals inherit that bias, so on tiny windows the interval can
+sit entirely above the population value. That is why the p-value is the
+better guard against calling noise drift.
+"""
+import numpy as np
+import pandas as pd
+
+from drift_utils import _kl_from_count_matrix, _psi_from_count_matrix
+
+
+def _metric(base_counts, curr_counts, metric, edges):
+    # metric of every replicate; counts are (..., bins)
+    shape = base_counts.shape[:-1]
+    base_counts = base_counts.reshape(-1, base_counts.shape[-1])
+    curr_counts = curr_counts.reshape(-1, curr_counts.shape[-1])
+    if metric == "psi":
+        values = _psi_from_count_matrix(
+            base_counts, base_counts.sum(axis=1), curr_counts, curr_counts.sum(axis=1)
+        )
+    elif metric == "kl":
+        if edges is None:
+            raise ValueError("KL needs the bin edges")
+        values = _kl_from_count_matrix(base_counts, curr_counts, np.asarray(edges, dtype=float)[:, None])
+    else:
+        raise ValueError(f"unknown metric: {metric!r}")
+    return values.reshape(shape)
+
+
+def _multinomial(rng, counts, n_rep):
+    counts = np.asarray(counts, dtype=np.int64)
+    n = counts.sum()
+    return rng.multinomial(n, counts / n, size=n_rep)
+
+
+def bootstrap_ci(base_counts, curr_counts, metric="psi", edges=None, n_boot=2000, alpha=0.05, seed=0):
+    """(low, high) percentile bootstrap interval of PSI or KL from two count vectors."""
+    base_counts = np.asarray(base_counts)
+    curr_counts = np.asarray(curr_counts)
+    if base_counts.sum() == 0 or curr_counts.sum() == 0:
+        return np.nan, np.nan
+    rng = np.random.default_rng(seed)
+    values = _metric(
+        _multinomial(rng, base_counts, n_boot), _multinomial(rng, curr_counts, n_boot), metric, edges
+    )
+    low, high = np.quantile(values, [alpha / 2, 1 - alpha / 2])
+    return low, high
+
+
+def permutation_pvalue(base_counts, curr_counts, metric="psi", edges=None, n_perm=2000, seed=0):
+    """Permutation p-value of PSI or KL: how often relabelled rows drift at least as much."""
+    base_counts = np.asarray(base_counts, dtype=np.int64)
+    curr_counts = np.asarray(curr_counts, dtype=np.int64)
+    n_base = base_counts.sum()
+    if n_base == 0 or curr_counts.sum() == 0:
+        return np.nan
+    rng = np.random.default_rng(seed)
+    observed = _metric(base_counts[None], curr_counts[None], metric, edges)[0]
+    pooled = base_counts + curr_counts
+    perm_base = rng.multivariate_hypergeometric(pooled, n_base, size=n_perm)
+    values = _metric(perm_base, pooled - perm_base, metric, edges)
+    # tolerance so replicates equal to the observed value count as "at least as large"
+    exceed = np.count_nonzero(values >= observed - 1e-12)
+    return (1 + exceed) / (1 + n_perm)
+
+
+def drift_uncertainty(counts, features, n_boot=2000, alpha=0.05, seed=0):
+    """Bootstrap intervals and permutation p-values for every feature of batch_drift_counts output."""
+    records = []
+    for j, col in enumerate(features):
+        psi_args = (counts["psi_base"][j], counts["psi_current"][j])
+        kl_args = (counts["kl_base"][j], counts["kl_current"][j])
+        kl_edges = counts["kl_edges"][:, j]
+        psi_low, psi_high = bootstrap_ci(*psi_args, "psi", None, n_boot, alpha, seed)
+        kl_low, kl_high = bootstrap_ci(*kl_args, "kl", kl_edges, n_boot, alpha, seed)
+        records.append({
+            "feature": col,
+            "psi_ci_low": psi_low,
+            "psi_ci_high": psi_high,
+            "psi_p_value": permutation_pvalue(*psi_args, "psi", None, n_boot, seed),
+            "kl_ci_low": kl_low,
+            "kl_ci_high": kl_high,
+            "kl_p_value": permutation_pvalue(*kl_args, "kl", kl_edges, n_boot, seed),
+        })
+    return pd.DataFrame(records, columns=[
+        "feature", "psi_ci_low", "psi_ci_high", "psi_p_value", "kl_ci_low", "kl_ci_high", "kl_p_value",
+    ])
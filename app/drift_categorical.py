@@ -0,0 +1,177 @@
+"""Drift for categorical features (IDs, labels, strings, booleans).
+
+Values are turned into integer codes and counted with ``np.bincount``, so the
+per-row cost is one hash lookup (none for pandas Categorical columns, whose
+codes are used directly) plus the bincount.
+
+The reference vocabulary is fixed when the profile is fitted. A current
+batch is aligned to it per distinct category, not per row: its categories are
+looked up in the reference vocabulary once and the resulting mapping is
+applied to the codes. For Categorical columns the mapping is cached on the
+category index, so repeated batches with the same dtype skip the lookup.
+
+Current values that never occur in the reference share one "other" bucket.
+With ``top_k`` only the k most frequent reference categories get their own
+bucket and the rest of the reference joins "other" too, which bounds the
+profile to O(k) per feature whatever the cardinality.
+"""
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2_contingency
+
+from drift_core.metrics import _NO_TIMER, _js_from_count_matrix, _psi_from_counts, _severity
+
+# mappings kept per feature for the most recent current category indexes
+_MAPPING_CACHE_SIZE = 8
+
+
+def categorical_columns(data):
+    """Columns the numeric path leaves out (strings, categories, booleans), minus dates / durations."""
+    return data.select_dtypes(exclude=[np.number, "datetime", "datetimetz", "timedelta"]).columns.tolist()
+
+
+def _codes(values):
+    # (codes, categories) with -1 for missing values
+    values = pd.Series(values, copy=False)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    return codes, pd.Index(uniques)
+
+
+def _chi_square(base_counts, curr_counts):
+    # 2 x k contingency test over the buckets seen on either side
+    seen = (base_counts + curr_counts) > 0
+    if seen.sum() < 2:
+        return 0.0, 1.0
+    table = np.vstack([base_counts[seen], curr_counts[seen]])
+    stat, p_value, _, _ = chi2_contingency(table, correction=False)
+    return stat, p_value
+
+
+def categorical_metrics(base_counts, curr_counts):
+    """PSI, JS divergence and chi-square from two aligned count vectors."""
+    base_counts = np.asarray(base_counts)
+    curr_counts = np.asarray(curr_counts)
+    n_base = base_counts.sum()
+    n_curr = curr_counts.sum()
+    if n_base == 0 or n_curr == 0:
+        return np.nan, np.nan, np.nan, np.nan
+    psi = _psi_from_counts(base_counts, n_base, curr_counts, n_curr)
+    js = _js_from_count_matrix(base_counts[None], curr_counts[None])[0]
+    chi2_stat, chi2_p = _chi_square(base_counts, curr_counts)
+    return psi, js, chi2_stat, chi2_p
+
+
+class CategoricalProfile:
+    """Reference category counts per feature, reusable against many current batches.
+
+    Bucket i < len(vocabulary) counts ``vocabulary[i]``; the last bucket is
+    "other" (categories outside the vocabulary).
+    """
+
+    def __init__(self, features, vocabularies, counts, top_k=None):
+        self.features = list(features)
+        self.vocabularies = [pd.Index(v) for v in vocabularies]
+        self.counts = [np.asarray(c, dtype=np.int64) for c in counts]
+        self.top_k = top_k
+        self._index = {f: i for i, f in enumerate(self.features)}
+        self._mappings = [dict() for _ in self.features]
+
+    @classmethod
+    def fit(cls, df_base, categorical_cols=None, top_k=None):
+        if categorical_cols is None:
+            categorical_cols = categorical_columns(df_base)
+        vocabularies, counts = [], []
+        for col in categorical_cols:
+            codes, categories = _codes(df_base[col])
+            col_counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+
+            # only categories that actually occur, most frequent first
+            keep = np.flatnonzero(col_counts)
+            if top_k is not None and len(keep) > top_k:
+                keep = keep[np.argpartition(-col_counts[keep], top_k - 1)[:top_k]]
+            keep = keep[np.argsort(-col_counts[keep], kind="stable")]
+            other = col_counts.sum() - col_counts[keep].sum()
+
+            vocabularies.append(categories[keep])
+            counts.append(np.append(col_counts[keep], other))
+        return cls(list(categorical_cols), vocabularies, counts, top_k=top_k)
+
+    def __contains__(self, col):
+        return col in self._index
+
+    def n_rows(self, col):
+        return int(self.counts[self._index[col]].sum())
+
+    def _mapping(self, i, categories, cache=True):
+        # reference bucket for each current category; cached for Categorical dtypes,
+        # whose category index is shared by every batch of the same dtype
+        if not cache:
+            mapping = self.vocabularies[i].get_indexer(categories)
+            mapping[mapping < 0] = len(self.vocabularies[i])
+            return mapping
+        cache = self._mappings[i]
+        hit = cache.get(id(categories))
+        if hit is not None and hit[0] is categories:
+            return hit[1]
+        vocabulary = self.vocabularies[i]
+        mapping = vocabulary.get_indexer(categories)
+        mapping[mapping < 0] = len(vocabulary)
+        if len(cache) >= _MAPPING_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+        cache[id(categories)] = (categories, mapping)
+        return mapping
+
+    def current_counts(self, col, current):
+        """Counts of ``current`` in this feature's reference buckets (missing values dropped)."""
+        i = self._index[col]
+        codes, categories = _codes(current)
+        codes = codes[codes >= 0]
+        is_categorical = isinstance(getattr(current, "dtype", None), pd.CategoricalDtype)
+        buckets = self._mapping(i, categories, cache=is_categorical)[codes]
+        return np.bincount(buckets, minlength=len(self.vocabularies[i]) + 1)
+
+    def metrics(self, col, current):
+        curr_counts = self.current_counts(col, current)
+        base_counts = self.counts[self._index[col]]
+        psi, js, chi2_stat, chi2_p = categorical_metrics(base_counts, curr_counts)
+        n_curr = curr_counts.sum()
+        other_share = curr_counts[-1] / n_curr if n_curr else np.nan
+        return psi, js, chi2_stat, chi2_p, other_share
+
+
+def analyze_categorical_drift(df_base, df_curr, categorical_cols=None, top_k=None, timer=None):
+    """PSI / JS divergence / chi-square per categorical feature.
+
+    ``df_base`` may be a fitted CategoricalProfile. ``other_share`` is the
+    share of current rows outside the reference vocabulary (or outside the
+    top-k when ``top_k`` is set).
+    """
+    if isinstance(df_base, CategoricalProfile):
+        profile = df_base
+        if categorical_cols is None:
+            categorical_cols = profile.features
+    else:
+        if categorical_cols is None:
+            categorical_cols = categorical_columns(df_base)
+        profile = CategoricalProfile.fit(df_base, categorical_cols, top_k=top_k)
+
+    timer = timer or _NO_TIMER
+    results = []
+    for col in categorical_cols:
+        with timer.stage("categorical", col):
+            psi, js, chi2_stat, chi2_p, other_share = profile.metrics(col, df_curr[col])
+        results.append({
+            "feature": col,
+            "psi": psi,
+            "js_divergence": js,
+            "chi2_stat": chi2_stat,
+            "chi2_p_value": chi2_p,
+            "other_share": other_share,
+            "severity": _severity(psi) if not np.isnan(psi) else None,
+        })
+
+    return pd.DataFrame(results, columns=[
+        "feature", "psi", "js_divergence", "chi2_stat", "chi2_p_value", "other_share", "severity",
+    ])
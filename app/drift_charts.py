@@ -0,0 +1,135 @@
+"""Reference-vs-current distribution charts from binned summaries, not raw rows.
+
+Each chart is built from the same summaries the drift metrics use: the KL
+histogram (``bins`` equal-width bins over the reference range) of both sides,
+and a fixed grid of quantiles for the ECDF (the reference's from the
+profile's sorted values). A figure therefore carries O(bins + quantiles)
+points whatever the row count, so million-row features plot as fast as small
+ones. Categorical features are drawn as category shares over the top
+categories plus "other".
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from drift_utils import ReferenceProfile, _bin_columns_uniform
+
+# points of the quantile grid drawn as the ECDF
+N_QUANTILES = 101
+# categories drawn individually; the rest are summed into "other"
+CHART_TOP_K = 20
+
+
+def numeric_distribution(df_base, df_curr, col, bins=50, n_quantiles=N_QUANTILES):
+    """Binned shares and quantiles of one numeric feature on both sides.
+
+    ``df_base`` may be a ReferenceProfile; without reference samples
+    (out-of-core profiles) the reference quantiles are read off its histogram.
+    Current values outside the reference range are reported as
+    ``current_below`` / ``current_above`` shares rather than binned.
+    """
+    if isinstance(df_base, ReferenceProfile):
+        profile = df_base
+    else:
+        profile = ReferenceProfile.fit(df_base, [col], bins=bins)
+    i = profile._index[col]
+    edges = profile.kl_edges[i]
+    base_counts = profile.kl_counts[i]
+    n_base = int(profile.base_rows[i])
+
+    current = pd.Series(df_curr[col]).to_numpy(dtype=float)
+    current = current[~np.isnan(current)]
+    values = current[:, None]
+    idx = _bin_columns_uniform(values, edges[:, None], np.zeros(values.shape, dtype=bool))
+    curr_counts = np.bincount(idx[:, 0], minlength=len(edges))[:len(edges) - 1]
+    n_curr = len(current)
+
+    levels = np.linspace(0, 1, n_quantiles)
+    if profile.sorted_values is not None:
+        base_quantiles = np.quantile(profile.sorted_values[i], levels) if n_base else np.full(n_quantiles, np.nan)
+    else:
+        # piecewise-linear inverse of the histogram CDF
+        cdf = np.concatenate([[0], np.cumsum(base_counts)]) / max(n_base, 1)
+        base_quantiles = np.interp(levels, cdf, edges)
+    curr_quantiles = np.quantile(current, levels) if n_curr else np.full(n_quantiles, np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "kind": "numeric",
+            "feature": col,
+            "edges": edges,
+            "reference": base_counts / n_base,
+            "current": curr_counts / n_curr,
+            "current_below": np.count_nonzero(current < edges[0]) / n_curr,
+            "current_above": np.count_nonzero(current > edges[-1]) / n_curr,
+            "levels": levels,
+            "reference_quantiles": base_quantiles,
+            "current_quantiles": curr_quantiles,
+            "rows_reference": n_base,
+            "rows_current": n_curr,
+        }
+
+
+def categorical_distribution(df_base, df_curr, col, top_k=CHART_TOP_K):
+    """Shares of the ``top_k`` most frequent reference categories (plus "other") on both sides."""
+    # imported here: drift_categorical is only needed for categorical features
+    from drift_categorical import CategoricalProfile
+
+    if isinstance(df_base, CategoricalProfile):
+        profile = df_base
+    else:
+        profile = CategoricalProfile.fit(df_base, [col], top_k=top_k)
+    i = profile._index[col]
+    base_counts = profile.counts[i]
+    curr_counts = profile.current_counts(col, df_curr[col])
+    categories = [str(c) for c in profile.vocabularies[i]] + ["other"]
+    if len(categories) > top_k + 1:
+        # a profile fitted without top_k: fold the tail into "other" for drawing
+        base_counts = np.append(base_counts[:top_k], base_counts[top_k:].sum())
+        curr_counts = np.append(curr_counts[:top_k], curr_counts[top_k:].sum())
+        categories = categories[:top_k] + ["other"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "kind": "categorical",
+            "feature": col,
+            "categories": categories,
+            "reference": base_counts / base_counts.sum(),
+            "current": curr_counts / curr_counts.sum(),
+            "rows_reference": int(base_counts.sum()),
+            "rows_current": int(curr_counts.sum()),
+        }
+
+
+def overlay_figure(dist, template="plotly_dark"):
+    """Reference and current shares per bin (or category), overlaid."""
+    fig = go.Figure()
+    if dist["kind"] == "numeric":
+        edges = dist["edges"]
+        centers = (edges[:-1] + edges[1:]) / 2
+        widths = np.diff(edges)
+        for side, color in (("reference", "#60a5fa"), ("current", "#f472b6")):
+            fig.add_bar(x=centers, y=dist[side], width=widths, name=side.capitalize(),
+                        marker_color=color, opacity=0.6)
+        title = f"{dist['feature']}: share of rows per bin"
+        outside = dist["current_below"] + dist["current_above"]
+        if outside > 0:
+            title += f" ({outside:.1%} of current rows outside the reference range)"
+        fig.update_layout(barmode="overlay", bargap=0)
+    else:
+        for side, color in (("reference", "#60a5fa"), ("current", "#f472b6")):
+            fig.add_bar(x=dist["categories"], y=dist[side], name=side.capitalize(), marker_color=color)
+        title = f"{dist['feature']}: share of rows per category"
+        fig.update_layout(barmode="group")
+    fig.update_layout(title=title, template=template, yaxis_title="share of rows")
+    return fig
+
+
+def ecdf_figure(dist, template="plotly_dark"):
+    """Empirical CDFs of both sides from the quantile grid (numeric features)."""
+    fig = go.Figure()
+    for side, color in (("reference", "#60a5fa"), ("current", "#f472b6")):
+        fig.add_scatter(x=dist[f"{side}_quantiles"], y=dist["levels"], mode="lines",
+                        name=side.capitalize(), line_color=color)
+    fig.update_layout(title=f"{dist['feature']}: ECDF", template=template,
+                      xaxis_title=dist["feature"], yaxis_title="cumulative share")
+    return fig
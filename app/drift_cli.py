@@ -0,0 +1,258 @@
+"""Headless drift job: one reference against many current partitions.
+
+    python app/drift_cli.py --reference reference_data.csv \\
+        --current "partitions/**/*.csv" --output drift.json --fail-on severe
+
+Partitions and the reference may be CSV, Parquet, Arrow IPC / Feather or
+.npy files; only the analyzed columns are read. The reference may also be a
+saved ReferenceProfile (.npz). It is fitted once and shared with the workers
+through a temporary .npz. Hive-style path segments
+(``model=a/date=2024-01-01/part.csv``) become columns of the output.
+
+With ``--history DB`` every partition's results and bin counts are appended
+to a drift history (drift_history); partitions already stored there for the
+same reference and settings are read back instead of recomputed. Partitions
+are keyed by a digest of their bytes, so a file rewritten in place is
+analyzed again.
+
+On wide tables ``--screen 0.02`` (and / or ``--screen-top-k N``) gives the
+full metrics only to features that pass a cheap first stage scored from the
+profile (drift_screening); the ``stage`` column says which stage decided.
+Features left out by the screen keep their coarse PSI in ``screen_psi``,
+have ``psi`` NaN and severity "screened", and never fail the job.
+
+Exit codes: 0 no partition reached ``--fail-on``, 1 at least one did,
+2 bad arguments or a partition failed to process.
+
+Only numpy / pandas / scipy are imported, never the Streamlit UI stack.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from drift_history import DriftHistory, data_key, drift_counts
+from drift_io import FORMATS, read_columns, read_schema
+from drift_utils import SCREENED, ReferenceProfile, _n_rows, analyze_drift, classify_severity
+
+EXIT_OK = 0
+EXIT_DRIFT = 1
+EXIT_ERROR = 2
+
+SEVERITY_RANK = {"Stable": 0, "Moderate": 1, "Severe": 2}
+
+_HIVE_SEGMENT = re.compile(r"^([^=/\\]+)=([^/\\]*)$")
+
+# set in each worker by _init_worker
+_PROFILE = None
+
+
+def _is_data_file(path):
+    return os.path.isfile(path) and os.path.splitext(path.lower())[1] in FORMATS
+
+
+def find_partitions(spec):
+    # a directory (searched recursively for data files) or a glob pattern
+    if os.path.isdir(spec):
+        paths = glob.glob(os.path.join(spec, "**", "*"), recursive=True)
+    else:
+        paths = glob.glob(spec, recursive=True)
+    return sorted(p for p in paths if _is_data_file(p))
+
+
+def partition_keys(path, root):
+    keys = {}
+    rel = os.path.relpath(path, root) if root else path
+    for segment in re.split(r"[/\\]", os.path.dirname(rel)):
+        match = _HIVE_SEGMENT.match(segment)
+        if match:
+            keys[match.group(1)] = match.group(2)
+    return keys
+
+
+def window_start(keys):
+    # partition date from a Hive key, when there is one that parses
+    for key in ("window_start", "date", "dt"):
+        value = pd.to_datetime(keys.get(key), errors="coerce")
+        if value is not None and not pd.isna(value):
+            return value
+    return None
+
+
+def _init_worker(profile_path):
+    global _PROFILE
+    _PROFILE = ReferenceProfile.load(profile_path)
+
+
+def _run_partition(path, columns, csv_engine="c", with_counts=False, screen=None, screen_top_k=None):
+    try:
+        # column projection: only the profiled features are read
+        available = set(read_schema(path))
+        cols = [c for c in columns if c in available]
+        # {column: array}; Arrow / .npy partitions are memory-mapped views, never a DataFrame
+        curr = read_columns(path, columns=cols, csv_engine=csv_engine)
+        results = analyze_drift(_PROFILE, curr, numeric_cols=cols, screen=screen, screen_top_k=screen_top_k)
+        results.insert(1, "n_rows", _n_rows(curr))
+        counts = drift_counts(_PROFILE, curr, cols) if with_counts and cols else None
+        return path, results, None, counts
+    except Exception as exc:  # reported per partition, the batch keeps going
+        return path, None, f"{type(exc).__name__}: {exc}", None
+
+
+def load_profile(reference, columns=None, buckets=None, bins=None, csv_engine="c"):
+    # a saved profile keeps the bins it was fitted with; asking for others is an error, not a silent no-op
+    if reference.endswith(".npz"):
+        profile = ReferenceProfile.load(reference)
+        saved = {"buckets": profile.psi_counts.shape[1], "bins": profile.kl_counts.shape[1]}
+        requested = {"buckets": buckets, "bins": bins}
+        conflicts = [f"--{name} {requested[name]} (profile has {saved[name]})"
+                     for name in saved if requested[name] is not None and requested[name] != saved[name]]
+        if conflicts:
+            raise ValueError(f"{reference} was fitted with other bins: {', '.join(conflicts)}")
+        return profile
+    ref = read_columns(reference, columns=columns, csv_engine=csv_engine)
+    return ReferenceProfile.fit(ref, columns, buckets=buckets or 10, bins=bins or 50)
+
+
+def write_results(results, output):
+    if output.endswith(".parquet"):
+        results.to_parquet(output, index=False)
+    elif output == "-":
+        json.dump(results.to_dict(orient="records"), sys.stdout, indent=2, default=str)
+        sys.stdout.write("\n")
+    else:
+        results.to_json(output, orient="records", indent=2, date_format="iso")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run drift analysis over many current-data partitions.")
+    parser.add_argument("--reference", required=True,
+                        help="reference data (CSV / Parquet / Arrow / .npy) or saved ReferenceProfile (.npz)")
+    parser.add_argument("--current", required=True, help="directory or glob of current partitions")
+    parser.add_argument("--output", default="-", help="results file (.json or .parquet); '-' for stdout")
+    parser.add_argument("--columns", nargs="+", help="features to analyze (default: all numeric)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--csv-engine", choices=["c", "pyarrow"], default="c", help="CSV parser")
+    parser.add_argument("--buckets", type=int, help="PSI buckets (default 10; must match a saved profile's)")
+    parser.add_argument("--bins", type=int, help="KL bins (default 50; must match a saved profile's)")
+    parser.add_argument("--psi-stable", type=float, default=0.1)
+    parser.add_argument("--psi-moderate", type=float, default=0.25)
+    parser.add_argument("--fail-on", choices=["moderate", "severe", "never"], default="severe",
+                        help="lowest severity that makes the exit code non-zero")
+    parser.add_argument("--screen", type=float,
+                        help="coarse PSI cutoff: full metrics only for features that pass a cheap first stage")
+    parser.add_argument("--screen-top-k", type=int, help="at most this many features get the full metrics")
+    parser.add_argument("--history", help="SQLite drift history to append to (and reuse stored partitions from)")
+    parser.add_argument("--model", default="default", help="model name the runs are recorded under")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    partitions = find_partitions(args.current)
+    if not partitions:
+        print(f"no partitions match {args.current!r}", file=sys.stderr)
+        return EXIT_ERROR
+    root = args.current if os.path.isdir(args.current) else None
+
+    try:
+        profile = load_profile(args.reference, args.columns, args.buckets, args.bins, args.csv_engine)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return EXIT_ERROR
+    columns = args.columns or profile.features
+
+    history = DriftHistory(args.history) if args.history else None
+    stored, window_keys = {}, {}
+    if history is not None:
+        reference_key = data_key(profile)
+        params = {"columns": list(columns)}
+        if args.screen is not None or args.screen_top_k is not None:
+            params.update(screen=args.screen, screen_top_k=args.screen_top_k)
+        for path in partitions:
+            window_keys[path] = data_key(path)
+            run_id = history.find_run(args.model, reference_key, window_keys[path], params)
+            if run_id is not None:
+                stored[path] = run_id
+    todo = [p for p in partitions if p not in stored]
+    with_counts = history is not None
+
+    frames, errors = [], []
+    with tempfile.TemporaryDirectory(prefix="drift_cli_") as tmp:
+        profile_path = os.path.join(tmp, "reference.npz")
+        profile.save(profile_path)
+
+        if args.workers > 1 and len(todo) > 1:
+            with ProcessPoolExecutor(
+                max_workers=args.workers, initializer=_init_worker, initargs=(profile_path,)
+            ) as pool:
+                outcomes = list(pool.map(
+                    _run_partition,
+                    todo,
+                    [columns] * len(todo),
+                    [args.csv_engine] * len(todo),
+                    [with_counts] * len(todo),
+                    [args.screen] * len(todo),
+                    [args.screen_top_k] * len(todo),
+                ))
+        else:
+            _init_worker(profile_path)
+            outcomes = [
+                _run_partition(p, columns, args.csv_engine, with_counts, args.screen, args.screen_top_k)
+                for p in todo
+            ]
+
+    if history is not None:
+        outcomes += [(path, history.results(run_id), None, None) for path, run_id in stored.items()]
+        outcomes.sort(key=lambda outcome: partitions.index(outcome[0]))
+
+    for path, results, error, counts in outcomes:
+        if error is not None:
+            errors.append({"partition": path, "error": error})
+            print(f"{path}: {error}", file=sys.stderr)
+            continue
+        keys = partition_keys(path, root)
+        if history is not None and path not in stored:
+            history.record(
+                results, args.model, reference_key, window_start=window_start(keys),
+                window_key=window_keys[path], params=params, counts=counts,
+                rows_reference=int(profile.base_rows.max()), rows_current=int(results["n_rows"].iloc[0]),
+            )
+        results["severity"] = classify_severity(
+            results["psi"], args.psi_stable, args.psi_moderate, screened=results["severity"] == SCREENED
+        )
+        for i, (key, value) in enumerate(keys.items()):
+            results.insert(i, key, value)
+        results.insert(0, "partition", path)
+        frames.append(results)
+
+    all_results = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    write_results(all_results, args.output)
+
+    # screened features have no full-resolution PSI and do not count toward --fail-on
+    worst = max((SEVERITY_RANK[s] for s in all_results.get("severity", []) if s in SEVERITY_RANK), default=0)
+    n_severe = int((all_results["severity"] == "Severe").sum()) if len(all_results) else 0
+    print(
+        f"{len(partitions)} partitions ({len(stored)} from history), {len(errors)} failed, "
+        f"{n_severe} severe feature results",
+        file=sys.stderr,
+    )
+    if history is not None:
+        history.close()
+
+    if errors:
+        return EXIT_ERROR
+    if args.fail_on != "never" and worst >= SEVERITY_RANK[args.fail_on.capitalize()]:
+        return EXIT_DRIFT
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""UI-free drift API for batch jobs, services and serverless functions.
+
+    import drift_core
+    drift_core.psi(reference, current)                 # NumPy only
+    drift_core.drift_metrics(ref_matrix, cur_matrix)   # every metric, one column per feature, NumPy only
+    drift_core.analyze_drift(ref_df, cur_df)           # results DataFrame (imports pandas when run)
+
+Only ``drift_core.metrics`` is core code: the NumPy kernels, which import
+nothing from the app modules (drift_utils and the others build on them).
+Beyond those metrics the package is a facade. analyze_drift,
+ReferenceProfile, DriftAccumulator, the change-point detectors, ... are
+implemented in the app modules listed in ``_LAZY`` (drift_utils,
+drift_stream, drift_detectors, drift_performance) and re-exported here,
+imported on first access; they need those modules on the path.
+
+Importing the package loads NumPy and nothing else. pandas and
+scipy.stats are imported only by the functions that need them: pandas when
+a results frame is built, scipy when a KS p-value is computed with
+``ks_method="scipy"`` (the default of analyze_drift). Streamlit and Plotly
+are only ever imported by main.py / drift_charts.
+"""
+import importlib
+
+from drift_core.metrics import (
+    drift_metrics,
+    float32_safe,
+    js,
+    kl,
+    kolmogorov_sf,
+    ks,
+    ks_pvalue,
+    psi,
+    wasserstein,
+)
+
+# public name -> module that defines it, imported on first access
+_LAZY = {
+    "analyze_drift": "drift_utils",
+    "batch_drift_counts": "drift_utils",
+    "batch_drift_metrics": "drift_utils",
+    "calculate_js": "drift_utils",
+    "calculate_kl": "drift_utils",
+    "calculate_ks": "drift_utils",
+    "calculate_psi": "drift_utils",
+    "calculate_wasserstein": "drift_utils",
+    "classify_severity": "drift_utils",
+    "downcast_float32": "drift_utils",
+    "DriftTimer": "drift_utils",
+    "json_log": "drift_utils",
+    "ReferenceProfile": "drift_utils",
+    "DriftAccumulator": "drift_stream",
+    "ADWIN": "drift_detectors",
+    "DDM": "drift_detectors",
+    "EDDM": "drift_detectors",
+    "PageHinkley": "drift_detectors",
+    "change_points": "drift_detectors",
+    "LabelJoiner": "drift_performance",
+    "PerformanceMonitor": "drift_performance",
+}
+
+__all__ = [
+    "drift_metrics", "float32_safe", "js", "kl", "kolmogorov_sf", "ks", "ks_pvalue", "psi", "wasserstein", *_LAZY,
+]
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module 'drift_core' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,412 @@
+"""NumPy-only drift metrics: PSI, KL, KS, JS divergence and Wasserstein distance.
+
+Importing this module loads NumPy and nothing else. ``psi`` / ``kl`` /
+``ks`` / ``js`` / ``wasserstein`` take 1D arrays (lists and pandas Series
+work too; NaNs are dropped) and ``drift_metrics`` takes two 2D arrays with
+one column per feature. PSI, KL, JS and Wasserstein are identical to
+drift_utils' calculate_* functions. KS is computed on the merged empirical
+CDFs; its p-value comes from the asymptotic Kolmogorov distribution
+(``kolmogorov_sf``), which is close to, but not the same as, scipy's
+exact / finite-sample p-value for small samples. ``ks_method="scipy"``
+switches to scipy.stats (imported on first use).
+"""
+from contextlib import nullcontext
+
+import numpy as np
+
+
+# ks_2samp's exact p-value is used up to this many rows per side, its asymptotic one beyond
+KS_EXACT_MAX_N = 10_000
+# terms of the Kolmogorov series (enough for double precision at every argument)
+_KOLMOGOROV_TERMS = 100
+# low-memory mode keeps a column in float32 when rounding moves no value by
+# more than this fraction of the column's range
+FLOAT32_MAX_ERROR = 1e-6
+
+
+class _NullTimer:
+    # stand-in when instrumentation is off (drift_utils.DriftTimer records stages)
+    def stage(self, name, feature=None):
+        return nullcontext()
+
+
+_NO_TIMER = _NullTimer()
+
+
+def finite_values(values):
+    # 1D float array without NaNs from an array, a list or a pandas Series (nullable dtypes included);
+    # a float64 array without NaNs is returned as is, not copied
+    if hasattr(values, "to_numpy"):
+        values = values.to_numpy(dtype=float, na_value=np.nan)
+    values = np.asarray(values, dtype=float).ravel()
+    nan = np.isnan(values)
+    return values[~nan] if nan.any() else values
+
+
+def float32_safe(values):
+    """True when float32 holds ``values`` to within FLOAT32_MAX_ERROR of their range.
+
+    Rounding to float32 moves a value by at most 2**-24 of its magnitude (plus
+    half the smallest subnormal), so only the minimum and maximum are needed.
+    NaNs are ignored; values outside the float32 range never qualify.
+    """
+    values = np.asarray(values)
+    if values.dtype == np.float32:
+        return True
+    values = np.asarray(values, dtype=float)
+    # fmax / fmin skip NaNs without the copy nanmax makes
+    low = np.fmin.reduce(values, initial=np.inf)
+    high = np.fmax.reduce(values, initial=-np.inf)
+    if not low <= high:  # no values, or only NaNs
+        return True
+    magnitude = max(abs(low), abs(high))
+    if magnitude > np.finfo(np.float32).max:
+        return False
+    error = magnitude * 2.0 ** -24 + np.finfo(np.float32).smallest_subnormal / 2
+    return bool(error <= FLOAT32_MAX_ERROR * (high - low))
+
+
+def _psi_breakpoints(base, buckets=10):
+    # quantile bins of base (same values as pandas' Series.quantile), open-ended outer bins
+    breakpoints = np.quantile(base, np.linspace(0, 1, buckets + 1))
+    breakpoints[0] = -np.inf
+    breakpoints[-1] = np.inf
+    return breakpoints
+
+
+def _psi_from_counts(base_counts, n_base, curr_counts, n_curr):
+    base_perc = base_counts / n_base
+    curr_perc = curr_counts / n_curr
+
+    # avoid zero
+    base_perc = np.where(base_perc == 0, 1e-6, base_perc)
+    curr_perc = np.where(curr_perc == 0, 1e-6, curr_perc)
+
+    psi = np.sum((base_perc - curr_perc) * np.log(base_perc / curr_perc))
+    return psi
+
+
+def _histogram_density(counts, bin_edges):
+    # same arithmetic as np.histogram(..., density=True)
+    db = np.diff(bin_edges).astype(float)
+    return counts / db / counts.sum()
+
+
+def _kl_from_density(counts_base, counts_curr):
+    counts_base = np.where(counts_base == 0, 1e-6, counts_base)
+    counts_curr = np.where(counts_curr == 0, 1e-6, counts_curr)
+
+    kl = np.sum(counts_base * np.log(counts_base / counts_curr))
+    return kl
+
+
+def _js_from_count_matrix(base_counts, curr_counts):
+    # row-wise Jensen-Shannon divergence in bits
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = base_counts / base_counts.sum(axis=1, keepdims=True)
+        q = curr_counts / curr_counts.sum(axis=1, keepdims=True)
+        m = (p + q) / 2
+        kl_pm = np.where(p > 0, p * np.log2(p / m), 0.0).sum(axis=1)
+        kl_qm = np.where(q > 0, q * np.log2(q / m), 0.0).sum(axis=1)
+    return (kl_pm + kl_qm) / 2
+
+
+def _overflow_counts(values, bin_edges):
+    # histogram over bin_edges plus the values below / above them, as one count vector
+    counts, _ = np.histogram(values, bins=bin_edges)
+    return np.concatenate([[np.sum(values < bin_edges[0])], counts, [np.sum(values > bin_edges[-1])]])
+
+
+def _bincount_columns(idx, n_bins):
+    # one bincount over all columns: shift each column's bin ids by col * n_bins.
+    # idx == n_bins is the per-column "dropped" slot (NaN / out of range).
+    n_cols = idx.shape[1]
+    offsets = np.arange(n_cols) * (n_bins + 1)
+    counts = np.bincount((idx + offsets).ravel(), minlength=n_cols * (n_bins + 1))
+    return counts.reshape(n_cols, n_bins + 1)[:, :n_bins]
+
+
+def _bin_columns_sorted_edges(values, edges, nan_mask):
+    # bin ids matching np.histogram(col, bins=edges[:, j]) for every column j;
+    # edges has shape (n_edges, n_cols)
+    n_bins = edges.shape[0] - 1
+    idx = np.zeros(values.shape, dtype=np.intp)
+    for k in range(1, n_bins):
+        np.add(idx, values >= edges[k], out=idx, casting="unsafe")
+    # histogram's last bin is closed on the right
+    outside = nan_mask | (values < edges[0]) | (values > edges[-1])
+    idx[outside] = n_bins
+    return idx
+
+
+def _bin_columns_uniform(values, edges, nan_mask):
+    # same bin ids as np.histogram on equal-width edges, per column, without
+    # a pass per edge: scale to a float index, then fix round-off at the edges
+    n_bins = edges.shape[0] - 1
+    first = edges[0]
+    last = edges[-1]
+    outside = nan_mask | ~((values >= first) & (values <= last))
+    with np.errstate(invalid="ignore"):
+        norm = n_bins / (last - first)
+        f_idx = (values - first) * norm
+    f_idx[outside] = 0
+    idx = f_idx.astype(np.intp)
+    idx[idx == n_bins] -= 1
+
+    cols = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+    decrement = values < edges[idx, cols]
+    idx[decrement] -= 1
+    increment = (values >= edges[idx + 1, cols]) & (idx != n_bins - 1)
+    idx[increment] += 1
+
+    idx[outside] = n_bins
+    return idx
+
+
+def _psi_from_count_matrix(base_counts, n_base, curr_counts, n_curr):
+    # row-wise _psi_from_counts for (features, bins) count matrices
+    with np.errstate(invalid="ignore", divide="ignore"):
+        base_perc = base_counts / n_base[:, None]
+        curr_perc = curr_counts / n_curr[:, None]
+    base_perc = np.where(base_perc == 0, 1e-6, base_perc)
+    curr_perc = np.where(curr_perc == 0, 1e-6, curr_perc)
+    return np.sum((base_perc - curr_perc) * np.log(base_perc / curr_perc), axis=1)
+
+
+def _kl_from_count_matrix(base_counts, curr_counts, edges):
+    # row-wise KL on histogram densities; edges has shape (n_edges, features)
+    db = np.diff(edges, axis=0).T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dens_base = base_counts / db / base_counts.sum(axis=1, keepdims=True)
+        dens_curr = curr_counts / db / curr_counts.sum(axis=1, keepdims=True)
+    dens_base = np.where(dens_base == 0, 1e-6, dens_base)
+    dens_curr = np.where(dens_curr == 0, 1e-6, dens_curr)
+    return np.sum(dens_base * np.log(dens_base / dens_curr), axis=1)
+
+
+def _severity(psi, stable=0.1, moderate=0.25):
+    if psi < stable:
+        return "Stable"
+    elif psi < moderate:
+        return "Moderate"
+    else:
+        return "Severe"
+
+
+def _sorted_quantiles(sorted_cols, n, quantiles):
+    # np.quantile (linear method) of the first n[j] values of each sorted row
+    cols = np.arange(sorted_cols.shape[0])
+    virtual = (n - 1) * quantiles[:, None]
+    prev = np.floor(virtual)
+    gamma = virtual - prev
+    above = virtual >= n - 1
+    nxt = np.where(above, n - 1, prev + 1).astype(np.intp)
+    prev = np.where(above, n - 1, prev).astype(np.intp)
+    a = sorted_cols[cols, np.maximum(prev, 0)]
+    b = sorted_cols[cols, np.maximum(nxt, 0)]
+    diff = b - a
+    out = np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+    out[:, n == 0] = np.nan
+    return out
+
+
+def _merged_ecdf_gaps(base, current):
+    # F_base - F_current (right-continuous) at each value of the two sorted samples
+    # merged, and the merged values: ks_2samp's statistic is max |gap|, the
+    # Wasserstein distance sum |gap| * dx, both as scipy evaluates them
+    n_base, n_curr = len(base), len(current)
+    pos = np.searchsorted(base, current, side="right") + np.arange(n_curr)
+    from_curr = np.zeros(n_base + n_curr, dtype=bool)
+    from_curr[pos] = True
+    merged = np.empty(n_base + n_curr)
+    merged[pos] = current
+    merged[~from_curr] = base
+    # ties count up to the last of their run
+    ends = np.flatnonzero(np.append(merged[1:] != merged[:-1], True))
+    run_end = np.repeat(ends, np.diff(ends, prepend=-1))
+    curr_le = np.cumsum(from_curr)[run_end]
+    return (run_end + 1 - curr_le) / n_base - curr_le / n_curr, merged
+
+
+def kolmogorov_sf(x):
+    # P(K > x) of the Kolmogorov distribution, vectorized; the theta-function
+    # form converges faster below x ~ 1.18
+    x = np.asarray(x, dtype=float)
+    out = np.ones_like(x)
+    k = np.arange(1, _KOLMOGOROV_TERMS + 1)[:, None]
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        small = (x > 0) & (x < 1.18)
+        xs = x[small]
+        cdf = np.sqrt(2 * np.pi) / xs * np.exp(-((2 * k - 1) ** 2) * np.pi ** 2 / (8 * xs ** 2)).sum(axis=0)
+        out[small] = 1 - cdf
+        large = x >= 1.18
+        xl = x[large]
+        out[large] = 2 * (((-1.0) ** (k - 1)) * np.exp(-2 * k ** 2 * xl ** 2)).sum(axis=0)
+    return np.clip(out, 0.0, 1.0)
+
+
+def ks_pvalue(stat, n_base, n_curr):
+    """Two-sample KS p-value from the asymptotic Kolmogorov distribution (Stephens' correction)."""
+    n_base = np.asarray(n_base, dtype=float)
+    n_curr = np.asarray(n_curr, dtype=float)
+    en = np.sqrt(n_base * n_curr / (n_base + n_curr))
+    return kolmogorov_sf((en + 0.12 + 0.11 / en) * np.asarray(stat, dtype=float))
+
+
+def psi(base, current, buckets=10):
+    base = finite_values(base)
+    current = finite_values(current)
+    breakpoints = _psi_breakpoints(base, buckets)
+    base_counts, _ = np.histogram(base, bins=breakpoints)
+    curr_counts, _ = np.histogram(current, bins=breakpoints)
+    return _psi_from_counts(base_counts, len(base), curr_counts, len(current))
+
+
+def kl(base, current, bins=50):
+    base = finite_values(base)
+    current = finite_values(current)
+    # same bins for both
+    counts_base, bin_edges = np.histogram(base, bins=bins, density=True)
+    counts_curr, _ = np.histogram(current, bins=bin_edges, density=True)
+    return _kl_from_density(counts_base, counts_curr)
+
+
+def ks(base, current):
+    """(statistic, p-value) of the two-sample KS test, without scipy."""
+    base = np.sort(finite_values(base))
+    current = np.sort(finite_values(current))
+    if len(base) == 0 or len(current) == 0:
+        return np.nan, np.nan
+    stat = np.abs(_merged_ecdf_gaps(base, current)[0]).max()
+    return stat, float(ks_pvalue(stat, len(base), len(current)))
+
+
+def js(base, current, bins=50):
+    # Jensen-Shannon divergence (bits) over the KL bins, plus one bin each for
+    # current values below / above the reference range
+    base = finite_values(base)
+    current = finite_values(current)
+    _, bin_edges = np.histogram(base, bins=bins)
+    counts = np.vstack([_overflow_counts(base, bin_edges), _overflow_counts(current, bin_edges)])
+    return _js_from_count_matrix(counts[:1], counts[1:])[0]
+
+
+def wasserstein(base, current):
+    # first Wasserstein distance, evaluated as scipy.stats.wasserstein_distance does
+    base = np.sort(finite_values(base))
+    current = np.sort(finite_values(current))
+    if len(base) == 0 or len(current) == 0:
+        return np.nan
+    gaps, values = _merged_ecdf_gaps(base, current)
+    return np.dot(np.abs(gaps[:-1]), np.diff(values))
+
+
+def drift_metrics(base, current, buckets=10, bins=50, ks_method="numpy"):
+    """PSI, KL, KS, JS and Wasserstein for every column of two 2D arrays.
+
+    A 1D array is one column. Returns a dict of 1D arrays (one value per
+    column) named like the columns of analyze_drift's results, plus the
+    non-NaN rows of each side (``n_base`` / ``n_current``).
+    """
+    base = np.asarray(base, dtype=float)
+    current = np.asarray(current, dtype=float)
+    if base.ndim == 1:
+        base, current = base[:, None], current.reshape(len(current), -1)
+    rows = _drift_columns(base, current, buckets=buckets, bins=bins, ks_method=ks_method)
+    names = ["psi", "kl_divergence", "ks_stat", "ks_p_value", "js_divergence", "wasserstein", "n_base", "n_current"]
+    values = np.array(rows, dtype=float).reshape(len(rows), len(names))
+    return {name: values[:, i] for i, name in enumerate(names)}
+
+
+def _sorted_columns(values, overwrite_input=False):
+    # (features, rows) array with each row sorted; float32 stays float32, anything else becomes float64
+    values = np.asarray(values)
+    if values.dtype != np.float32:
+        values = np.asarray(values, dtype=float)
+    if overwrite_input and values.flags.writeable:
+        values = values.T
+        values.sort(axis=1)
+        return values
+    return np.sort(values.T, axis=1)
+
+
+def _drift_columns(base, current, buckets=10, bins=50, timer=None, features=None, ks_method="scipy",
+                   overwrite_input=False):
+    # PSI / KL / KS / JS / Wasserstein and the non-NaN rows of each side for every column of
+    # two 2D arrays -> list of 8-tuples.
+    # Each side is sorted once (NaNs last); PSI breakpoints and the KL range come from the
+    # sorted reference, histogram counts from searchsorted on the sorted columns, and KS and
+    # Wasserstein from one merge of the two sorted columns. ks_method="scipy" takes the KS
+    # p-values from scipy.stats as ks_2samp would; "numpy" uses ks_pvalue and never imports scipy.
+    # float32 input is sorted as float32; overwrite_input=True sorts writeable inputs in place
+    # instead of sorting a copy.
+    if ks_method not in ("scipy", "numpy"):
+        raise ValueError(f"unknown ks_method: {ks_method!r}")
+    exact = ks_method == "scipy"
+    if exact:
+        # imported here: scipy.stats alone takes longer to import than the rest of the core
+        from scipy.stats import ks_2samp, kstwo
+    timer = timer or _NO_TIMER
+    with timer.stage("sort"):
+        base_sorted = _sorted_columns(base, overwrite_input)
+        curr_sorted = _sorted_columns(current, overwrite_input)
+        # NaNs sort last: the non-NaN count is where a NaN would be inserted
+        n_base = np.array([np.searchsorted(row, np.nan) for row in base_sorted], dtype=np.int64)
+        n_curr = np.array([np.searchsorted(row, np.nan) for row in curr_sorted], dtype=np.int64)
+
+    with timer.stage("edges"):
+        breakpoints = _sorted_quantiles(base_sorted, n_base, np.linspace(0, 1, buckets + 1))
+        breakpoints[0] = -np.inf
+        breakpoints[-1] = np.inf
+        # KL: equal-width bins over the base range (widened when constant, as np.histogram does)
+        cols = np.arange(base_sorted.shape[0])
+        first = base_sorted[:, 0].astype(float)
+        last = base_sorted[cols, np.maximum(n_base - 1, 0)].astype(float)
+        constant = first == last
+        first = np.where(constant, first - 0.5, first)
+        last = np.where(constant, last + 0.5, last)
+        edges = np.linspace(first, last, bins + 1, axis=0)
+
+    n_cols = len(cols)
+    psi_counts = np.zeros((2, n_cols, buckets), dtype=np.int64)
+    # KL bins plus one below / above the reference range (JS divergence)
+    kl_counts = np.zeros((2, n_cols, bins + 2), dtype=np.int64)
+    ks_stat = np.full(n_cols, np.nan)
+    ks_p = np.full(n_cols, np.nan)
+    wasserstein = np.full(n_cols, np.nan)
+    for j in range(n_cols):
+        feature = features[j] if features is not None else j
+        b = base_sorted[j, :n_base[j]]
+        c = curr_sorted[j, :n_curr[j]]
+        with timer.stage("counts", feature):
+            for side, x in enumerate((b, c)):
+                cut = np.searchsorted(x, breakpoints[1:-1, j])
+                psi_counts[side, j] = np.diff(cut, prepend=0, append=len(x))
+                # np.histogram bins are [e_k, e_k+1) except the last, closed on the right
+                left = np.searchsorted(x, edges[:, j])
+                right = np.searchsorted(x, edges[-1, j], side="right")
+                kl_counts[side, j] = np.diff(np.concatenate([[0], left[:-1], [right, len(x)]]))
+        if len(b) == 0 or len(c) == 0:
+            continue
+        with timer.stage("ks", feature):
+            gaps, values = _merged_ecdf_gaps(b, c)
+            ks_stat[j] = np.abs(gaps).max()
+            wasserstein[j] = np.dot(np.abs(gaps[:-1]), np.diff(values))
+            if exact and max(len(b), len(c)) <= KS_EXACT_MAX_N:
+                # the exact method also snaps the statistic to a multiple of 1 / lcm(n_base, n_curr)
+                ks_stat[j], ks_p[j] = ks_2samp(b, c)
+
+    with timer.stage("metrics"):
+        if exact:
+            # Smirnov's asymptotic p-value, as ks_2samp computes it for large samples
+            large = np.maximum(n_base, n_curr) > KS_EXACT_MAX_N
+            if large.any():
+                m, n = np.maximum(n_base, n_curr)[large], np.minimum(n_base, n_curr)[large]
+                ks_p[large] = np.clip(kstwo.sf(ks_stat[large], np.round(m * n / (m + n))), 0, 1)
+        else:
+            has_data = (n_base > 0) & (n_curr > 0)
+            ks_p[has_data] = ks_pvalue(ks_stat[has_data], n_base[has_data], n_curr[has_data])
+        psi = _psi_from_count_matrix(psi_counts[0], n_base, psi_counts[1], n_curr)
+        kl = _kl_from_count_matrix(kl_counts[0, :, 1:-1], kl_counts[1, :, 1:-1], edges)
+        js = _js_from_count_matrix(kl_counts[0], kl_counts[1])
+    return list(zip(psi, kl, ks_stat, ks_p, js, wasserstein, n_base, n_curr))
@@ -0,0 +1,465 @@
+"""Streaming change-point detectors for prediction scores and error rates.
+
+PSI / KS compare whole windows; these raise an alarm on the event where a
+stream changes, with constant or logarithmic work per event:
+
+* ``PageHinkley``: cumulative deviation from the running mean, two-sided.
+  O(1) per event.
+* ``ADWIN``: adaptive window over an exponential histogram of buckets; drops
+  the oldest part of the window while two sub-windows have significantly
+  different means. O(log W) memory and amortised time per event.
+* ``DDM``: error rate p and its std s of a 0/1 error stream; drift when
+  p + s exceeds the best p_min + 3 s_min seen. O(1).
+* ``EDDM``: mean and spread of the distance between errors; drift when it
+  shrinks below ``beta`` of its best value. O(1), better for gradual drift.
+
+Every detector has ``update(x)`` (one event, True on drift),
+``update_many(values)`` (a NumPy batch; returns the batch positions of
+drift), ``reset()`` and ``to_dict()`` / ``detector_from_dict()`` for
+checkpointing. Page-Hinkley, DDM and EDDM process a batch with cumulative
+sums over blocks of ``BATCH_BLOCK`` events, resetting at an alarm and
+restarting the block after it. ADWIN's buckets are inherently sequential and
+are updated per event. Detectors reset themselves after an alarm.
+"""
+import math
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# events per vectorized pass; an alarm restarts the pass, so this bounds the rework
+BATCH_BLOCK = 4096
+
+
+class _Detector(ABC):
+    __slots__ = ("n_seen",)
+
+    PARAMS = ()
+    STATE = ()
+
+    @abstractmethod
+    def reset(self):
+        """Forget everything seen so far (parameters are kept)."""
+
+    @abstractmethod
+    def update(self, x):
+        """Add one event; True when it raises a drift alarm."""
+
+    @abstractmethod
+    def update_many(self, values):
+        """Add a batch of events; the batch positions that raised an alarm."""
+
+    def to_dict(self):
+        """JSON-friendly parameters and state; restore with detector_from_dict."""
+        return {
+            "type": type(self).__name__,
+            "params": {p: getattr(self, p) for p in self.PARAMS},
+            "state": {s: _plain(getattr(self, s)) for s in self.STATE + ("n_seen",)},
+        }
+
+    def _load_state(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+def _plain(value):
+    # floats / ints / nested lists for JSON
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _clean(values):
+    values = np.asarray(values, dtype=float).ravel()
+    return values, np.flatnonzero(~np.isnan(values))
+
+
+class PageHinkley(_Detector):
+    """Two-sided Page-Hinkley test on a numeric stream.
+
+    ``delta`` is the tolerated change of the mean, ``threshold`` the
+    cumulative deviation that raises an alarm (in units of the stream).
+    """
+
+    __slots__ = ("delta", "threshold", "min_instances", "n", "mean", "sum_up", "min_up", "sum_down", "max_down")
+
+    PARAMS = ("delta", "threshold", "min_instances")
+    STATE = ("n", "mean", "sum_up", "min_up", "sum_down", "max_down")
+
+    def __init__(self, delta=0.005, threshold=50.0, min_instances=30):
+        self.delta = delta
+        self.threshold = threshold
+        self.min_instances = min_instances
+        self.n_seen = 0
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self.sum_up = 0.0
+        self.min_up = 0.0
+        self.sum_down = 0.0
+        self.max_down = 0.0
+
+    def update(self, x):
+        if math.isnan(x):
+            return False
+        self.n_seen += 1
+        self.n += 1
+        self.mean += (x - self.mean) / self.n
+        self.sum_up += x - self.mean - self.delta
+        self.min_up = min(self.min_up, self.sum_up)
+        self.sum_down += x - self.mean + self.delta
+        self.max_down = max(self.max_down, self.sum_down)
+        if self.n >= self.min_instances and (
+            self.sum_up - self.min_up > self.threshold or self.max_down - self.sum_down > self.threshold
+        ):
+            self.reset()
+            return True
+        return False
+
+    def update_many(self, values):
+        values, valid = _clean(values)
+        x = values[valid]
+        self.n_seen += len(x)
+        alarms = []
+        start = 0
+        while start < len(x):
+            chunk = x[start:start + BATCH_BLOCK]
+            n = self.n + np.arange(1, len(chunk) + 1)
+            mean = (self.mean * self.n + np.cumsum(chunk)) / n
+            sum_up = self.sum_up + np.cumsum(chunk - mean - self.delta)
+            sum_down = self.sum_down + np.cumsum(chunk - mean + self.delta)
+            min_up = np.minimum(np.minimum.accumulate(sum_up), self.min_up)
+            max_down = np.maximum(np.maximum.accumulate(sum_down), self.max_down)
+            hit = (n >= self.min_instances) & (
+                (sum_up - min_up > self.threshold) | (max_down - sum_down > self.threshold)
+            )
+            first = int(np.argmax(hit)) if hit.any() else None
+            if first is None:
+                self.n, self.mean = int(n[-1]), float(mean[-1])
+                self.sum_up, self.min_up = float(sum_up[-1]), float(min_up[-1])
+                self.sum_down, self.max_down = float(sum_down[-1]), float(max_down[-1])
+                start += len(chunk)
+                continue
+            alarms.append(start + first)
+            self.reset()
+            start += first + 1
+        return valid[alarms]
+
+
+class DDM(_Detector):
+    """Drift Detection Method on a 0/1 error stream (1 = error)."""
+
+    __slots__ = ("warning_level", "drift_level", "min_instances", "n", "errors", "p_min", "s_min", "in_warning")
+
+    PARAMS = ("warning_level", "drift_level", "min_instances")
+    STATE = ("n", "errors", "p_min", "s_min", "in_warning")
+
+    def __init__(self, warning_level=2.0, drift_level=3.0, min_instances=30):
+        self.warning_level = warning_level
+        self.drift_level = drift_level
+        self.min_instances = min_instances
+        self.n_seen = 0
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.errors = 0.0
+        self.p_min = math.inf
+        self.s_min = math.inf
+        self.in_warning = False
+
+    def update(self, x):
+        if math.isnan(x):
+            return False
+        self.n_seen += 1
+        self.n += 1
+        self.errors += x
+        p = self.errors / self.n
+        s = math.sqrt(p * (1 - p) / self.n)
+        if self.n < self.min_instances:
+            return False
+        if p + s < self.p_min + self.s_min:
+            self.p_min, self.s_min = p, s
+        if p + s > self.p_min + self.drift_level * self.s_min:
+            self.reset()
+            return True
+        self.in_warning = p + s > self.p_min + self.warning_level * self.s_min
+        return False
+
+    def update_many(self, values):
+        values, valid = _clean(values)
+        x = values[valid]
+        self.n_seen += len(x)
+        alarms = []
+        start = 0
+        while start < len(x):
+            chunk = x[start:start + BATCH_BLOCK]
+            n = self.n + np.arange(1, len(chunk) + 1)
+            p = (self.errors + np.cumsum(chunk)) / n
+            s = np.sqrt(p * (1 - p) / n)
+            ps = np.where(n >= self.min_instances, p + s, np.inf)
+            # p_min / s_min are taken at the running minimum of p + s
+            best_before = np.minimum.accumulate(np.concatenate([[self.p_min + self.s_min], ps]))[:-1]
+            improved = ps < best_before
+            at = np.maximum.accumulate(np.where(improved, np.arange(len(chunk)), -1))
+            p_min = np.where(at >= 0, p[np.maximum(at, 0)], self.p_min)
+            s_min = np.where(at >= 0, s[np.maximum(at, 0)], self.s_min)
+            hit = (n >= self.min_instances) & (ps > p_min + self.drift_level * s_min)
+            first = int(np.argmax(hit)) if hit.any() else None
+            if first is None:
+                self.n, self.errors = int(n[-1]), float(self.errors + chunk.sum())
+                self.p_min, self.s_min = float(p_min[-1]), float(s_min[-1])
+                self.in_warning = bool(ps[-1] > p_min[-1] + self.warning_level * s_min[-1])
+                start += len(chunk)
+                continue
+            alarms.append(start + first)
+            self.reset()
+            start += first + 1
+        return valid[alarms]
+
+
+class EDDM(_Detector):
+    """Early Drift Detection Method: distance between errors of a 0/1 error stream."""
+
+    __slots__ = ("alpha", "beta", "min_errors", "n", "n_errors", "last_error", "dist_sum", "dist_sq",
+                 "best", "in_warning")
+
+    PARAMS = ("alpha", "beta", "min_errors")
+    STATE = ("n", "n_errors", "last_error", "dist_sum", "dist_sq", "best", "in_warning")
+
+    def __init__(self, alpha=0.95, beta=0.9, min_errors=30):
+        self.alpha = alpha
+        self.beta = beta
+        self.min_errors = min_errors
+        self.n_seen = 0
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.n_errors = 0
+        self.last_error = 0
+        self.dist_sum = 0.0
+        self.dist_sq = 0.0
+        self.best = 0.0
+        self.in_warning = False
+
+    def update(self, x):
+        if math.isnan(x):
+            return False
+        self.n_seen += 1
+        self.n += 1
+        if x <= 0:
+            return False
+        distance = self.n - self.last_error
+        self.last_error = self.n
+        self.n_errors += 1
+        self.dist_sum += distance
+        self.dist_sq += distance * distance
+        mean = self.dist_sum / self.n_errors
+        std = math.sqrt(max(self.dist_sq / self.n_errors - mean * mean, 0.0))
+        level = mean + 2 * std
+        self.best = max(self.best, level)
+        if self.n_errors < self.min_errors:
+            return False
+        ratio = level / self.best
+        if ratio < self.beta:
+            self.reset()
+            return True
+        self.in_warning = ratio < self.alpha
+        return False
+
+    def update_many(self, values):
+        values, valid = _clean(values)
+        x = values[valid]
+        self.n_seen += len(x)
+        alarms = []
+        start = 0
+        while start < len(x):
+            chunk = x[start:start + BATCH_BLOCK]
+            err = np.flatnonzero(chunk > 0)
+            if len(err) == 0:
+                self.n += len(chunk)
+                start += len(chunk)
+                continue
+            position = self.n + err + 1
+            distance = np.diff(np.concatenate([[self.last_error], position]))
+            n_errors = self.n_errors + np.arange(1, len(err) + 1)
+            dist_sum = self.dist_sum + np.cumsum(distance)
+            dist_sq = self.dist_sq + np.cumsum(distance.astype(float) ** 2)
+            mean = dist_sum / n_errors
+            level = mean + 2 * np.sqrt(np.maximum(dist_sq / n_errors - mean ** 2, 0.0))
+            best = np.maximum(np.maximum.accumulate(level), self.best)
+            ratio = level / best
+            hit = (n_errors >= self.min_errors) & (ratio < self.beta)
+            first = int(np.argmax(hit)) if hit.any() else None
+            if first is None:
+                self.n += len(chunk)
+                self.n_errors, self.last_error = int(n_errors[-1]), int(position[-1])
+                self.dist_sum, self.dist_sq = float(dist_sum[-1]), float(dist_sq[-1])
+                self.best = float(best[-1])
+                self.in_warning = bool(n_errors[-1] >= self.min_errors and ratio[-1] < self.alpha)
+                start += len(chunk)
+                continue
+            alarms.append(start + err[first])
+            self.reset()
+            start += err[first] + 1
+        return valid[alarms]
+
+
+class ADWIN(_Detector):
+    """ADWIN2 adaptive windowing on a numeric stream (values ideally in [0, 1]).
+
+    The window is an exponential histogram: row i holds up to ``max_buckets``
+    buckets of 2**i events, oldest first, each with its total and variance.
+    Every ``clock`` events all bucket boundaries are tested as cut points.
+    """
+
+    __slots__ = ("delta", "max_buckets", "clock", "min_window", "width", "total", "variance",
+                 "totals", "variances", "_ticks")
+
+    PARAMS = ("delta", "max_buckets", "clock", "min_window")
+    STATE = ("width", "total", "variance", "totals", "variances", "_ticks")
+
+    def __init__(self, delta=0.002, max_buckets=5, clock=32, min_window=5):
+        self.delta = delta
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self.min_window = min_window
+        self.n_seen = 0
+        self.reset()
+
+    def reset(self):
+        self.width = 0
+        self.total = 0.0
+        self.variance = 0.0
+        # per row, oldest bucket first
+        self.totals = [[]]
+        self.variances = [[]]
+        self._ticks = 0
+
+    @property
+    def mean(self):
+        return self.total / self.width if self.width else 0.0
+
+    def _insert(self, x):
+        if self.width:
+            self.variance += self.width * (x - self.total / self.width) ** 2 / (self.width + 1)
+        self.width += 1
+        self.total += x
+        self.totals[0].append(x)
+        self.variances[0].append(0.0)
+        # merge the two oldest buckets of a full row into one of the next row
+        row = 0
+        while len(self.totals[row]) > self.max_buckets:
+            if row + 1 == len(self.totals):
+                self.totals.append([])
+                self.variances.append([])
+            size = 2 ** row
+            t1, t2 = self.totals[row].pop(0), self.totals[row].pop(0)
+            v1, v2 = self.variances[row].pop(0), self.variances[row].pop(0)
+            self.totals[row + 1].append(t1 + t2)
+            self.variances[row + 1].append(v1 + v2 + size * size * (t1 / size - t2 / size) ** 2 / (2 * size))
+            row += 1
+
+    def _drop_oldest(self):
+        row = len(self.totals) - 1
+        while not self.totals[row]:
+            row -= 1
+        size = 2 ** row
+        t, v = self.totals[row].pop(0), self.variances[row].pop(0)
+        self.width -= size
+        self.total -= t
+        if self.width:
+            self.variance -= v + size * self.width * (t / size - self.total / self.width) ** 2 / (size + self.width)
+            self.variance = max(self.variance, 0.0)
+        else:
+            self.variance = 0.0
+        while len(self.totals) > 1 and not self.totals[-1]:
+            self.totals.pop()
+            self.variances.pop()
+
+    def _cut(self):
+        # drop old buckets while some split of the window has a significant mean difference
+        changed = False
+        reduced = True
+        while reduced and self.width > 2 * self.min_window:
+            reduced = False
+            n0, t0 = 0, 0.0
+            dd = math.log(2 * math.log(self.width) / self.delta)
+            v = self.variance / self.width
+            for row in range(len(self.totals) - 1, -1, -1):
+                size = 2 ** row
+                for t in self.totals[row]:
+                    n0 += size
+                    t0 += t
+                    n1 = self.width - n0
+                    if n1 < self.min_window:
+                        break
+                    if n0 < self.min_window:
+                        continue
+                    m = 1 / (n0 - self.min_window + 1) + 1 / (n1 - self.min_window + 1)
+                    eps = math.sqrt(2 * m * v * dd) + 2 / 3 * dd * m
+                    if abs(t0 / n0 - (self.total - t0) / n1) > eps:
+                        self._drop_oldest()
+                        changed = reduced = True
+                        break
+                if reduced:
+                    break
+        return changed
+
+    def update(self, x):
+        if math.isnan(x):
+            return False
+        self.n_seen += 1
+        self._insert(float(x))
+        self._ticks += 1
+        if self._ticks % self.clock:
+            return False
+        return self._cut()
+
+    def update_many(self, values):
+        values, valid = _clean(values)
+        alarms = [i for i in valid if self.update(values[i])]
+        # update() already counted these events
+        return np.asarray(alarms, dtype=np.intp)
+
+    def to_dict(self):
+        out = super().to_dict()
+        out["state"]["totals"] = [list(map(float, r)) for r in self.totals]
+        out["state"]["variances"] = [list(map(float, r)) for r in self.variances]
+        return out
+
+
+DETECTORS = {cls.__name__: cls for cls in (ADWIN, PageHinkley, DDM, EDDM)}
+
+
+def detector_from_dict(data):
+    """Rebuild a detector saved with ``to_dict()``."""
+    detector = DETECTORS[data["type"]](**data["params"])
+    detector._load_state(data["state"])
+    return detector
+
+
+def change_points(values, detector):
+    """Positions in ``values`` where ``detector`` (a name or an instance) raises an alarm."""
+    if isinstance(detector, str):
+        detector = DETECTORS[detector]()
+    return detector.update_many(values)
+
+
+def stream_trace(values, n_points=500):
+    """Block means of ``values`` in stream order, at most ``n_points`` of them, for plotting.
+
+    Returns (block start positions, block means); NaNs are ignored.
+    """
+    values = np.asarray(values, dtype=float).ravel()
+    size = max(1, -(-len(values) // n_points))
+    starts = np.arange(0, len(values), size)
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts) if len(values) else np.zeros(0)
+    counts = np.add.reduceat(valid.astype(np.int64), starts) if len(values) else np.zeros(0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return starts, sums / counts
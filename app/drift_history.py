@@ -0,0 +1,405 @@
+"""Persistent drift history in a local SQLite file.
+
+Every recorded run is one row of ``runs``, keyed by model, reference, window
+and parameters, with its per-feature results in ``results`` and (numeric
+features) the PSI / KL bin counts in ``counts``, one raw (features x bins)
+array blob per kind in the smallest integer dtype that holds them. The
+reference side (its counts and the KL edges) is the same for every window
+scored against one reference, so it is stored once in ``reference_counts``.
+``results`` is indexed on (model, feature, window_start), so a feature's
+trend over thousands of windows is one index range scan.
+
+A (model, reference, window, params) combination is stored once:
+``record`` on an existing key is a no-op returning the stored run id, and
+``analyze_and_record`` returns the stored results without recomputing.
+Timestamps are stored as ISO-8601 text, which sorts chronologically.
+
+    history = DriftHistory("drift_history.db")
+    analyze_and_record(history, df_ref, df_day, model="churn", window_start="2024-05-01")
+    history.trend("salary", model="churn")
+    history.drift_onset("salary", model="churn")
+"""
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from drift_utils import ReferenceProfile, _feature_counts, _n_rows, _numeric_columns, analyze_drift
+
+SEVERITY_RANK = {"Stable": 0, "Moderate": 1, "Severe": 2}
+
+# results columns with their own SQL column; any others are kept as JSON in "extra"
+_CORE_COLUMNS = ["psi", "kl_divergence", "ks_stat", "ks_p_value", "severity"]
+_REFERENCE_KINDS = ["psi_base", "kl_base", "kl_edges"]
+_CURRENT_KINDS = ["psi_current", "kl_current"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    model TEXT NOT NULL,
+    reference_key TEXT NOT NULL,
+    window_key TEXT NOT NULL,
+    params_key TEXT NOT NULL,
+    window_start TEXT NOT NULL,
+    window_end TEXT,
+    created_at TEXT NOT NULL,
+    rows_reference INTEGER,
+    rows_current INTEGER,
+    params TEXT,
+    columns TEXT,
+    UNIQUE (model, reference_key, window_key, params_key)
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    model TEXT NOT NULL,
+    feature TEXT NOT NULL,
+    window_start TEXT NOT NULL,
+    psi REAL,
+    kl_divergence REAL,
+    ks_stat REAL,
+    ks_p_value REAL,
+    severity TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS results_trend ON results (model, feature, window_start);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+CREATE TABLE IF NOT EXISTS counts (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    kind TEXT NOT NULL,
+    features TEXT NOT NULL,
+    reference_counts TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (run_id, kind)
+);
+CREATE TABLE IF NOT EXISTS reference_counts (
+    reference_counts TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (reference_counts, kind)
+);
+"""
+
+
+def _timestamp(value):
+    if value is None:
+        return None
+    return pd.Timestamp(value).isoformat()
+
+
+def _sql_value(value):
+    # NaN -> NULL, numpy scalars -> Python
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+        if isinstance(value, float) and np.isnan(value):
+            return None
+    return value
+
+
+def data_key(data):
+    """Content digest of a DataFrame, ``{column: array}`` mapping, ReferenceProfile or file (its bytes)."""
+    digest = hashlib.sha1()
+    if isinstance(data, (str, os.PathLike)):
+        with open(data, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(block)
+    elif isinstance(data, ReferenceProfile):
+        digest.update("\0".join(data.features).encode())
+        for arr in (data.breakpoints, data.psi_counts, data.kl_edges, data.kl_counts, data.base_rows):
+            digest.update(np.ascontiguousarray(arr).tobytes())
+    elif isinstance(data, pd.DataFrame):
+        digest.update("\0".join(map(str, data.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    elif isinstance(data, dict):
+        for name, values in data.items():
+            values = np.asarray(values)
+            digest.update(f"{name}\0{values.dtype.str}\0".encode())
+            if values.dtype == object:
+                digest.update(pd.util.hash_array(values).tobytes())
+            else:
+                digest.update(np.ascontiguousarray(values).tobytes())
+    else:
+        raise TypeError("data_key needs a DataFrame, a {column: array} mapping, a ReferenceProfile or a file path")
+    return digest.hexdigest()
+
+
+def params_key(params):
+    """Stable digest of a parameter mapping (order-insensitive)."""
+    text = json.dumps(params or {}, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+class DriftHistory:
+    """Append-only store of drift runs; see the module docstring."""
+
+    def __init__(self, path="drift_history.db"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def find_run(self, model, reference_key, window_key, params=None):
+        """Run id stored for this combination, or None."""
+        row = self._conn.execute(
+            "SELECT run_id FROM runs WHERE model = ? AND reference_key = ? AND window_key = ? "
+            "AND params_key = ?",
+            (model, reference_key, str(window_key), params_key(params)),
+        ).fetchone()
+        return row[0] if row else None
+
+    def record(self, results, model, reference_key, window_start=None, window_end=None,
+               window_key=None, params=None, counts=None, rows_reference=None, rows_current=None):
+        """Store one run's results (and optional batch_drift_counts-style ``counts``).
+
+        ``window_key`` identifies the current data (default: ``window_start``);
+        ``window_start`` defaults to now. Returns the run id; an already
+        stored combination is left untouched.
+        """
+        window_start = _timestamp(window_start) or datetime.datetime.now().isoformat(timespec="seconds")
+        window_key = str(window_key) if window_key is not None else window_start
+        existing = self.find_run(model, reference_key, window_key, params)
+        if existing is not None:
+            return existing
+        with self._conn:
+            run_id = self._insert_run(
+                results, model, reference_key, window_key, params, window_start, _timestamp(window_end),
+                rows_reference, rows_current,
+            )
+            self._insert_counts(run_id, results["feature"], counts, reference_key, params)
+        return run_id
+
+    def record_timeline(self, timeline, model, reference_key, params=None, rows_reference=None, counts=None):
+        """Store every window of a drift_timeline frame in one transaction; stored windows are skipped.
+
+        ``counts`` is the per-window mapping of ``drift_timeline(with_counts=True)``;
+        each window's counts are stored as ``record`` stores a run's. Returns
+        the number of windows written.
+        """
+        written = 0
+        with self._conn:
+            for start, window in timeline.groupby("window_start", sort=True):
+                window_start = _timestamp(start)
+                if self.find_run(model, reference_key, window_start, params) is not None:
+                    continue
+                end = window["window_end"].iloc[0] if "window_end" in window else None
+                rows = int(window["n_rows"].max()) if "n_rows" in window else None
+                results = window.drop(columns=["window_start", "window_end"], errors="ignore")
+                run_id = self._insert_run(results, model, reference_key, window_start, params, window_start,
+                                          _timestamp(end), rows_reference, rows)
+                self._insert_counts(run_id, results["feature"], (counts or {}).get(start), reference_key, params)
+                written += 1
+        return written
+
+    def _insert_run(self, results, model, reference_key, window_key, params, window_start, window_end,
+                    rows_reference, rows_current):
+        cursor = self._conn.execute(
+            "INSERT INTO runs (model, reference_key, window_key, params_key, window_start, window_end, "
+            "created_at, rows_reference, rows_current, params, columns) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                model, reference_key, window_key, params_key(params), window_start, window_end,
+                datetime.datetime.now().isoformat(timespec="seconds"), _sql_value(rows_reference),
+                _sql_value(rows_current), json.dumps(params or {}, sort_keys=True, default=str),
+                json.dumps([str(c) for c in results.columns]),
+            ),
+        )
+        run_id = cursor.lastrowid
+        extra_cols = [c for c in results.columns if c not in _CORE_COLUMNS and c != "feature"]
+        rows = []
+        for record in results.to_dict(orient="records"):
+            extra = {c: _sql_value(record[c]) for c in extra_cols}
+            rows.append((
+                run_id, model, str(record["feature"]), window_start,
+                *(_sql_value(record.get(c)) for c in _CORE_COLUMNS),
+                json.dumps(extra, default=str) if extra else None,
+            ))
+        self._conn.executemany(
+            "INSERT INTO results (run_id, model, feature, window_start, psi, kl_divergence, ks_stat, "
+            "ks_p_value, severity, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        return run_id
+
+    def _insert_counts(self, run_id, features, counts, reference_key, params):
+        if not counts:
+            return
+        # counts cover the numeric features, in the order given by counts["features"] if present
+        names = [str(n) for n in counts.get("features", list(features)[:len(counts["psi_base"])])]
+        names_json = json.dumps(names)
+        shared = hashlib.sha1(f"{reference_key}\0{params_key(params)}\0{names_json}".encode()).hexdigest()
+
+        def blob(kind):
+            arr = np.asarray(counts[kind])
+            if kind == "kl_edges":
+                # stored (edges, features) by batch_drift_counts; kept (features, edges) here
+                arr = arr.T
+            elif arr.size:
+                arr = arr.astype(np.min_scalar_type(int(arr.max())))
+            arr = np.ascontiguousarray(arr)
+            return arr.dtype.str, arr.tobytes()
+
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO reference_counts (reference_counts, kind, dtype, data) VALUES (?, ?, ?, ?)",
+            [(shared, kind, *blob(kind)) for kind in _REFERENCE_KINDS],
+        )
+        self._conn.executemany(
+            "INSERT INTO counts (run_id, kind, features, reference_counts, dtype, data) VALUES (?, ?, ?, ?, ?, ?)",
+            [(run_id, kind, names_json, shared, *blob(kind)) for kind in _CURRENT_KINDS],
+        )
+
+    def results(self, run_id):
+        """The stored results frame of one run, with its original columns."""
+        run_id = int(run_id)
+        columns = self._conn.execute("SELECT columns FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if columns is None:
+            raise KeyError(f"no run {run_id}")
+        rows = self._conn.execute(
+            "SELECT feature, psi, kl_divergence, ks_stat, ks_p_value, severity, extra "
+            "FROM results WHERE run_id = ? ORDER BY rowid",
+            (run_id,),
+        ).fetchall()
+        records = []
+        for feature, *core, extra in rows:
+            record = {"feature": feature, **dict(zip(_CORE_COLUMNS, core))}
+            record.update(json.loads(extra) if extra else {})
+            records.append(record)
+        return pd.DataFrame(records, columns=json.loads(columns[0]))
+
+    def counts(self, run_id, feature=None):
+        """Stored bin counts of a run: {"psi_base": ..., ..., "kl_edges": ...}.
+
+        Arrays are (features, bins), or one feature's row when ``feature`` is given.
+        """
+        rows = self._conn.execute(
+            "SELECT kind, features, dtype, data FROM counts WHERE run_id = ? "
+            "UNION ALL "
+            "SELECT r.kind, c.features, r.dtype, r.data FROM reference_counts r "
+            "JOIN (SELECT DISTINCT features, reference_counts FROM counts WHERE run_id = ?) c "
+            "ON r.reference_counts = c.reference_counts",
+            (int(run_id), int(run_id)),
+        ).fetchall()
+        out = {}
+        for kind, features, dtype, data in rows:
+            features = json.loads(features)
+            arr = np.frombuffer(data, dtype=np.dtype(dtype)).reshape(len(features), -1)
+            if kind != "kl_edges":
+                arr = arr.astype(np.int64)
+            out[kind] = arr if feature is None else arr[features.index(feature)]
+        if feature is None and rows:
+            out["features"] = features
+        return out
+
+    def runs(self, model=None):
+        query = ("SELECT run_id, model, reference_key, window_key, window_start, window_end, created_at, "
+                 "rows_reference, rows_current, params FROM runs")
+        args = ()
+        if model is not None:
+            query += " WHERE model = ?"
+            args = (model,)
+        return pd.read_sql_query(query + " ORDER BY window_start, run_id", self._conn, params=args)
+
+    def models(self):
+        return [r[0] for r in self._conn.execute("SELECT DISTINCT model FROM runs ORDER BY model")]
+
+    def features(self, model=None):
+        query, args = "SELECT DISTINCT feature FROM results", ()
+        if model is not None:
+            query, args = query + " WHERE model = ?", (model,)
+        return [r[0] for r in self._conn.execute(query + " ORDER BY feature", args)]
+
+    def trend(self, features=None, model=None, since=None, until=None):
+        """Per-window results of ``features`` (one name or a list; default all) in time order."""
+        clauses, args = [], []
+        if model is not None:
+            clauses.append("model = ?")
+            args.append(model)
+        if features is not None:
+            features = [features] if isinstance(features, str) else list(features)
+            clauses.append(f"feature IN ({', '.join('?' * len(features))})")
+            args.extend(features)
+        if since is not None:
+            clauses.append("window_start >= ?")
+            args.append(_timestamp(since))
+        if until is not None:
+            clauses.append("window_start < ?")
+            args.append(_timestamp(until))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        trend = pd.read_sql_query(
+            "SELECT model, feature, window_start, run_id, psi, kl_divergence, ks_stat, ks_p_value, severity "
+            f"FROM results{where} ORDER BY model, feature, window_start",
+            self._conn, params=args,
+        )
+        trend["window_start"] = pd.to_datetime(trend["window_start"])
+        return trend
+
+    def drift_onset(self, feature, model=None, min_severity="Moderate"):
+        """Start of the current stretch of windows at ``min_severity`` or worse, or None.
+
+        None also when the latest window is below ``min_severity``.
+        """
+        trend = self.trend(feature, model)
+        if trend.empty:
+            return None
+        drifted = trend["severity"].map(SEVERITY_RANK).fillna(-1) >= SEVERITY_RANK[min_severity]
+        if not drifted.iloc[-1]:
+            return None
+        # last window that was not drifted; the onset is the window after it
+        calm = np.flatnonzero(~drifted.to_numpy())
+        first = calm[-1] + 1 if len(calm) else 0
+        return trend["window_start"].iloc[first]
+
+
+def drift_counts(df_base, df_curr, numeric_cols, buckets=10, bins=50):
+    """PSI / KL bin counts of both sides in the form ``record`` stores."""
+    numeric_cols = list(numeric_cols)
+    return dict(_feature_counts(df_base, df_curr, numeric_cols, buckets, bins), features=numeric_cols)
+
+
+def analyze_and_record(history, df_base, df_curr, model="default", window_start=None, window_end=None,
+                       window_key=None, reference_key=None, numeric_cols=None, buckets=10, bins=50,
+                       **analyze_kwargs):
+    """analyze_drift plus ``history.record``; a stored combination is returned without recomputing.
+
+    ``reference_key`` / ``window_key`` default to content digests of the inputs,
+    so corrected data for the same ``window_start`` (the trend axis) is
+    analyzed again. Extra keyword arguments go to analyze_drift and are part
+    of the params key.
+    """
+    reference_key = reference_key or data_key(df_base)
+    window_key = window_key or data_key(df_curr)
+    params = {"numeric_cols": numeric_cols, "buckets": buckets, "bins": bins, **analyze_kwargs}
+    run_id = history.find_run(model, reference_key, window_key, params)
+    if run_id is not None:
+        return history.results(run_id)
+
+    results = analyze_drift(df_base, df_curr, numeric_cols, buckets=buckets, bins=bins, **analyze_kwargs)
+    if numeric_cols is None:
+        numeric_cols = df_base.features if isinstance(df_base, ReferenceProfile) else _numeric_columns(df_base)
+    numeric_cols = [c for c in numeric_cols if c in set(results["feature"])]
+    counts = drift_counts(df_base, df_curr, numeric_cols, buckets, bins) if numeric_cols else None
+    rows_reference = (int(df_base.base_rows.max()) if isinstance(df_base, ReferenceProfile)
+                      else _n_rows(df_base))
+    history.record(
+        results, model, reference_key, window_start=window_start, window_end=window_end,
+        window_key=window_key, params=params, counts=counts, rows_reference=rows_reference,
+        rows_current=_n_rows(df_curr),
+    )
+    return results
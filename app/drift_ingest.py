@@ -0,0 +1,463 @@
+"""HTTP ingestion of prediction events with live drift counts.
+
+    python app/drift_ingest.py --reference y_pred_train.csv --log prediction_log --port 8765
+
+A small asyncio server (standard library only, HTTP/1.1 with keep-alive):
+
+* ``POST /events`` takes one JSON event (an object), a list of events, or
+  ``{"events": [...]}`` and answers ``202`` with the number accepted. Events
+  are buffered in memory and flushed in bulk every ``flush_rows`` events or
+  ``flush_seconds``, whichever comes first. ``max_buffer`` bounds the events
+  held in memory: a batch that would take the buffer past it (the disk
+  cannot keep up) gets ``503`` with a ``Retry-After`` header, and a batch
+  larger than ``max_buffer`` on its own gets ``413``. A flush whose write
+  fails is logged and its events go back to the front of the buffer for the
+  next flush; the live counts only ever include events that were written.
+* ``GET /drift`` returns PSI / KL of every prediction column against the
+  training predictions, from per-column bin counts (a DriftAccumulator)
+  that every flush folds the new events into. Nothing is re-read to answer,
+  so the "Prediction Drift" tab can poll it.
+* ``POST /labels`` takes ground truth that arrives later: one object, a list
+  or ``{"labels": [...]}`` with ``request_id`` and ``label`` (0 / 1). It is
+  joined by ``request_id`` to the flushed prediction events (drift_performance)
+  and ``GET /performance`` returns accuracy / AUC / calibration error per
+  window of prediction time, against the baseline of the training
+  predictions when ``--label-column`` names their labels. Unmatched
+  predictions and labels wait at most ``--max-label-delay`` seconds; the
+  join state lives in memory only.
+* ``GET /health`` returns event counters and the server's CPU time.
+
+The log is a directory of Parquet segments, one per flush, written under a
+temporary name and renamed into place, so readers never see a partial
+segment. Segments are never rewritten. Each segment has the event keys as
+columns plus ``received_at`` (epoch seconds). The prediction columns come
+first and are always float64 (missing or non-numeric values are null), so
+``pd.read_parquet(log_dir, columns=[...])`` reads them across the whole
+log; other keys are stored with whatever type their values have. On start the counts
+are rebuilt from the prediction columns of the existing segments, so a
+restart resumes the same totals. Events still in the buffer are flushed on
+shutdown (Ctrl+C / SIGTERM) but lost on a crash.
+"""
+import argparse
+import asyncio
+import glob
+import itertools
+import json
+import os
+import signal
+import sys
+import time
+
+import numpy as np
+
+from drift_cli import load_profile
+from drift_io import read_table
+from drift_performance import PerformanceMonitor, performance_baseline
+from drift_stream import DriftAccumulator
+from drift_utils import ReferenceProfile, _numeric_columns
+
+# largest request body accepted (bytes)
+MAX_BODY = 64 * 1024 * 1024
+
+_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+
+
+def _events(body, key="events"):
+    # one object, a list of objects or {key: [...]}; raises ValueError on anything else
+    payload = json.loads(body)
+    if isinstance(payload, dict):
+        payload = payload[key] if isinstance(payload.get(key), list) else [payload]
+    if not isinstance(payload, list) or not all(isinstance(e, dict) for e in payload):
+        raise ValueError(f"expected a JSON object, a list of objects or {{\"{key}\": [...]}}")
+    return payload
+
+
+def _columns(events, features, received_at):
+    # column lists in a stable order: the prediction columns, then other keys as first seen
+    keys = dict.fromkeys(features)
+    keys.update(dict.fromkeys(itertools.chain.from_iterable(events)))
+    keys.pop("received_at", None)
+    # map(dict.get, ...) stays in C, unlike a per-event comprehension
+    columns = {key: list(map(dict.get, events, itertools.repeat(key, len(events)))) for key in keys}
+    columns["received_at"] = received_at
+    return columns
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _feature_matrix(columns, features):
+    # (rows, features) floats; missing or non-numeric values become NaN
+    out = []
+    for feature in features:
+        values = columns[feature]
+        try:
+            out.append(np.array(values, dtype=float))
+        except (TypeError, ValueError):
+            # same conversion value by value, so one bad event does not blank the batch
+            out.append(np.array([_as_float(v) for v in values], dtype=float))
+    return np.column_stack(out)
+
+
+def _report(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+class EventLog:
+    """Append-only directory of Parquet segments, one per flush."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.segments = sorted(glob.glob(os.path.join(path, "events-*.parquet")))
+        self._next = (int(os.path.basename(self.segments[-1])[7:-8]) + 1) if self.segments else 0
+
+    def append(self, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrays = {}
+        for name, values in columns.items():
+            if isinstance(values, np.ndarray):
+                arrays[name] = pa.array(values, from_pandas=True)
+                continue
+            try:
+                arrays[name] = pa.array(values)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # mixed types within a key (e.g. numbers and strings) are stored as strings
+                arrays[name] = pa.array([None if v is None else str(v) for v in values])
+        path = os.path.join(self.path, f"events-{self._next:012d}.parquet")
+        tmp = os.path.join(self.path, f".events-{self._next:012d}.tmp")
+        pq.write_table(pa.table(arrays), tmp)
+        os.replace(tmp, path)
+        self._next += 1
+        self.segments.append(path)
+        return path
+
+    def feature_batches(self, features):
+        # (rows, features) matrices of the stored segments, for rebuilding counts
+        import pyarrow.parquet as pq
+
+        for path in self.segments:
+            available = set(pq.read_schema(path).names)
+            table = pq.read_table(path, columns=[f for f in features if f in available])
+            values = np.full((table.num_rows, len(features)), np.nan)
+            for i, feature in enumerate(features):
+                if feature in available:
+                    values[:, i] = table.column(feature).to_numpy()
+            yield values
+
+
+class IngestServer:
+    """Buffers posted events, flushes them to an EventLog and keeps live drift counts."""
+
+    def __init__(self, profile, log_path, features=None, flush_rows=10_000, flush_seconds=1.0,
+                 max_buffer=None, performance=None, score_column=None):
+        self.accumulator = DriftAccumulator(profile, features)
+        self.features = self.accumulator.features
+        # delayed labels are joined to the events' score_column (default: the first prediction column)
+        self.performance = performance or PerformanceMonitor()
+        self._score_index = self.features.index(score_column) if score_column else 0
+        self.log = EventLog(log_path)
+        self.flush_rows = int(flush_rows)
+        self.flush_seconds = float(flush_seconds)
+        self.max_buffer = int(max_buffer or 10 * self.flush_rows)
+        self.received = 0
+        self.flushed = 0
+        self.rejected = 0
+        self.flush_errors = 0
+        self._buffer = []
+        self._received_at = []
+        self._writing = 0
+        self._flush_queued = False
+        self._flush_lock = None
+        self._flush_task = None
+        self._tasks = set()
+
+        for values in self.log.feature_batches(self.features):
+            self.accumulator.update(values)
+            self.flushed += len(values)
+        self.received = self.flushed
+
+    # ---------- buffering ----------
+    def add(self, events):
+        """Buffer ``events``; False (nothing buffered) when they would overfill the buffer."""
+        if len(self._buffer) + self._writing + len(events) > self.max_buffer:
+            self.rejected += len(events)
+            return False
+        now = time.time()
+        self._buffer.extend(events)
+        self._received_at.extend([now] * len(events))
+        self.received += len(events)
+        if len(self._buffer) >= self.flush_rows and not self._flush_queued:
+            self._flush_queued = True
+            self._spawn(self.flush())
+        return True
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        async with self._flush_lock:
+            self._flush_queued = False
+            events, self._buffer = self._buffer, []
+            received_at, self._received_at = self._received_at, []
+            if not events:
+                return
+            self._writing = len(events)
+            try:
+                try:
+                    columns = _columns(events, self.features, received_at)
+                    values = _feature_matrix(columns, self.features)
+                    columns.update({f: values[:, i] for i, f in enumerate(self.features)})
+                except Exception as exc:
+                    # retrying cannot help a batch that does not convert: drop it
+                    self.rejected += len(events)
+                    self.flush_errors += 1
+                    _report(f"dropped {len(events)} events that could not be converted: {type(exc).__name__}: {exc}")
+                    return
+                # the write goes to a thread; only written events reach the counts
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, self.log.append, columns)
+                except Exception as exc:
+                    self._buffer[:0] = events
+                    self._received_at[:0] = received_at
+                    self.flush_errors += 1
+                    _report(f"writing {len(events)} events failed, kept for the next flush: "
+                            f"{type(exc).__name__}: {exc}")
+                    return
+                self.flushed += len(events)
+                # counts are updated on the event loop (cheap, vectorized)
+                self.accumulator.update(values)
+                if "request_id" in columns:
+                    self.performance.add_predictions(columns["request_id"], received_at,
+                                                     values[:, self._score_index])
+            finally:
+                self._writing = 0
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+                self.performance.expire(time.time())
+            except Exception as exc:  # reported; the next tick tries again
+                self.flush_errors += 1
+                _report(f"periodic flush failed: {type(exc).__name__}: {exc}")
+
+    # ---------- HTTP ----------
+    def drift(self):
+        results = self.accumulator.results()
+        records = results.astype(object).where(results.notna(), None).to_dict(orient="records")
+        for record in records:
+            record["n_rows"] = int(record["n_rows"])
+            for key in ("psi", "kl_divergence"):
+                if record[key] is not None:
+                    record[key] = float(record[key])
+        return {
+            "features": records,
+            "received": self.received,
+            "flushed": self.flushed,
+            "buffered": self.received - self.flushed,
+        }
+
+    def add_labels(self, labels):
+        now = time.time()
+        self.performance.add_labels([label.get("request_id") for label in labels], [now] * len(labels),
+                                    [_as_float(label.get("label")) for label in labels])
+
+    def performance_report(self):
+        results = self.performance.results()
+        windows = results.astype(object).where(results.notna(), None).to_dict(orient="records")
+        for window in windows:
+            for key, value in window.items():
+                if isinstance(value, (np.integer, np.floating, np.bool_)):
+                    window[key] = value.item()
+        baseline = self.performance.baseline
+        if baseline is not None:
+            baseline = {k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in baseline.items()}
+        return {
+            "score_column": self.features[self._score_index],
+            "window_seconds": self.performance.window_seconds,
+            "baseline": baseline,
+            "windows": windows,
+            **self.performance.status(),
+        }
+
+    def health(self):
+        return {
+            "status": "ok",
+            "received": self.received,
+            "flushed": self.flushed,
+            "rejected": self.rejected,
+            "flush_errors": self.flush_errors,
+            "segments": len(self.log.segments),
+            "cpu_seconds": time.process_time(),
+        }
+
+    def _route(self, method, path, body):
+        # (status, payload, extra headers)
+        if path == "/events":
+            if method != "POST":
+                return 405, {"error": "use POST"}, {}
+            try:
+                events = _events(body)
+            except (ValueError, UnicodeDecodeError) as exc:
+                return 400, {"error": str(exc)}, {}
+            if len(events) > self.max_buffer:
+                self.rejected += len(events)
+                return 413, {"error": f"batch of {len(events)} events is over max_buffer ({self.max_buffer})"}, {}
+            if not self.add(events):
+                return 503, {"error": "buffer full, retry later"}, {"Retry-After": "1"}
+            return 202, {"accepted": len(events)}, {}
+        if path == "/labels":
+            if method != "POST":
+                return 405, {"error": "use POST"}, {}
+            try:
+                labels = _events(body, "labels")
+            except (ValueError, UnicodeDecodeError) as exc:
+                return 400, {"error": str(exc)}, {}
+            self.add_labels(labels)
+            return 202, {"accepted": len(labels)}, {}
+        reports = {"/drift": self.drift, "/performance": self.performance_report, "/health": self.health}
+        if path in reports:
+            if method != "GET":
+                return 405, {"error": "use GET"}, {}
+            return 200, reports[path](), {}
+        return 404, {"error": f"no route {path}"}, {}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                request_line, *lines = head.decode("latin-1").split("\r\n")
+                method, target, version = (request_line.split(" ", 2) + ["", ""])[:3]
+                headers = {}
+                for line in lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                if "transfer-encoding" in headers:
+                    status, payload, extra = 411, {"error": "send a Content-Length body"}, {}
+                    keep_alive = False
+                else:
+                    length = int(headers.get("content-length") or 0)
+                    if length > MAX_BODY:
+                        status, payload, extra = 413, {"error": f"body over {MAX_BODY} bytes"}, {}
+                        keep_alive = False
+                    else:
+                        body = await reader.readexactly(length) if length else b""
+                        status, payload, extra = self._route(method, target.split("?", 1)[0], body)
+
+                data = json.dumps(payload).encode()
+                head = [f"HTTP/1.1 {status} {_REASONS[status]}", "Content-Type: application/json",
+                        f"Content-Length: {len(data)}"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                if not keep_alive:
+                    head.append("Connection: close")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, ready=None):
+        """Serve until cancelled (or SIGINT / SIGTERM), then flush the buffer."""
+        loop = asyncio.get_running_loop()
+        self._flush_lock = asyncio.Lock()
+        stop = loop.create_future()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+            except (NotImplementedError, RuntimeError, ValueError):
+                # not the main thread (or Windows): stop by cancelling serve()
+                pass
+        server = await asyncio.start_server(self.handle, host, port, limit=64 * 1024)
+        self._flush_task = asyncio.ensure_future(self._flush_periodically())
+        if ready is not None:
+            ready(server.sockets[0].getsockname())
+        try:
+            async with server:
+                await stop
+        finally:
+            self._flush_task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            await self.flush()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Ingest prediction events over HTTP and track their drift.")
+    parser.add_argument("--reference", required=True,
+                        help="training predictions (CSV / Parquet / Arrow / .npy) or saved ReferenceProfile (.npz)")
+    parser.add_argument("--log", default="prediction_log", help="directory of the Parquet event log")
+    parser.add_argument("--columns", nargs="+", help="prediction columns to track (default: all numeric)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--flush-rows", type=int, default=10_000, help="flush after this many events")
+    parser.add_argument("--flush-seconds", type=float, default=1.0, help="flush at least this often")
+    parser.add_argument("--max-buffer", type=int, help="events held before rejecting (default 10x flush rows)")
+    parser.add_argument("--csv-engine", choices=["c", "pyarrow"], default="c", help="CSV parser")
+    parser.add_argument("--buckets", type=int, help="PSI buckets (default 10; must match a saved profile's)")
+    parser.add_argument("--bins", type=int, help="KL bins (default 50; must match a saved profile's)")
+    parser.add_argument("--label-column",
+                        help="labels in the reference (0 / 1), for the performance baseline; not tracked for drift")
+    parser.add_argument("--score-column", help="probability joined to delayed labels (default: first column)")
+    parser.add_argument("--window-seconds", type=float, default=3600, help="performance window length")
+    parser.add_argument("--max-label-delay", type=float, default=2 * 86400,
+                        help="seconds a prediction waits for its label (and a label for its prediction)")
+    parser.add_argument("--max-pending-labels", type=int, default=1_000_000,
+                        help="unmatched predictions / labels held per side; the oldest are dropped first")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    baseline = None
+    if args.label_column:
+        if args.reference.endswith(".npz"):
+            raise SystemExit("--label-column needs the training predictions, not a saved profile")
+        df_ref = read_table(args.reference, csv_engine=args.csv_engine)
+        columns = args.columns or [c for c in _numeric_columns(df_ref) if c != args.label_column]
+        profile = ReferenceProfile.fit(df_ref, columns, buckets=args.buckets or 10, bins=args.bins or 50)
+        baseline = performance_baseline(df_ref, args.score_column or columns[0], args.label_column)
+    else:
+        try:
+            profile = load_profile(args.reference, args.columns, args.buckets, args.bins, args.csv_engine)
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+    performance = PerformanceMonitor(args.window_seconds, args.max_label_delay, args.max_pending_labels,
+                                     baseline=baseline)
+    server = IngestServer(profile, args.log, args.columns, args.flush_rows, args.flush_seconds, args.max_buffer,
+                          performance, args.score_column)
+
+    def ready(address):
+        _report(f"listening on http://{address[0]}:{address[1]}")
+
+    asyncio.run(server.serve(args.host, args.port, ready))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
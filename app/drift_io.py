@@ -0,0 +1,190 @@
+"""Loading reference / current data from CSV, Parquet, Arrow IPC (Feather) and .npy.
+
+``read_table`` returns a DataFrame (previews, timelines, segments).
+``read_columns`` returns ``{name: 1D ndarray}``, which ``analyze_drift``
+takes as well; drift runs in the UI and the CLI read only their features
+this way, and it avoids copies where the format allows it:
+
+* Arrow IPC / Feather files are memory-mapped and single-chunk, null-free
+  numeric columns come back as views on the mapped buffers;
+* .npy files are memory-mapped; structured arrays give one view per field,
+  plain 2D arrays one strided view per column (named "0", "1", ...);
+* Parquet and CSV must be decoded, so they are copied once, but only the
+  requested columns are read.
+
+``iter_chunks`` streams any of these formats as bounded DataFrame chunks.
+
+pyarrow is only imported when a Parquet / Arrow file or the pyarrow CSV
+parser is actually used.
+"""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+FORMATS = {
+    ".csv": "csv",
+    ".txt": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "arrow",
+    ".arrow": "arrow",
+    ".ipc": "arrow",
+    ".npy": "npy",
+}
+
+# file_uploader extensions for the UI
+UPLOAD_TYPES = ["csv", "parquet", "pq", "feather", "arrow", "ipc", "npy"]
+
+
+def detect_format(name):
+    ext = os.path.splitext(str(name).lower())[1]
+    if ext not in FORMATS:
+        raise ValueError(f"unsupported file type {ext!r}; expected one of {sorted(FORMATS)}")
+    return FORMATS[ext]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as exc:
+        raise ImportError("reading Parquet / Arrow files needs the 'pyarrow' package") from exc
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def _load_npy(source):
+    if isinstance(source, (str, os.PathLike)):
+        return np.load(source, mmap_mode="r", allow_pickle=False)
+    return np.load(io.BytesIO(_rewind(source).read()), allow_pickle=False)
+
+
+def _npy_columns(arr, columns=None):
+    if arr.dtype.names:
+        names = list(arr.dtype.names)
+        data = {name: arr[name] for name in names}
+    else:
+        arr = arr.reshape(len(arr), -1)
+        data = {str(i): arr[:, i] for i in range(arr.shape[1])}
+    if columns is not None:
+        missing = [c for c in columns if c not in data]
+        if missing:
+            raise KeyError(f"columns not found: {missing}")
+        data = {c: data[c] for c in columns}
+    return data
+
+
+def _arrow_table(source, fmt, columns=None):
+    _require_pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_table(_rewind(source), columns=columns)
+    import pyarrow.feather as feather
+    if isinstance(source, (str, os.PathLike)):
+        return feather.read_table(source, columns=columns, memory_map=True)
+    return feather.read_table(_rewind(source), columns=columns)
+
+
+def _read_csv(source, columns=None, csv_engine="c", **kwargs):
+    if csv_engine == "pyarrow":
+        _require_pyarrow()
+    usecols = list(columns) if columns is not None else None
+    return pd.read_csv(_rewind(source), usecols=usecols, engine=csv_engine, **kwargs)
+
+
+def read_table(source, columns=None, fmt=None, csv_engine="c", name=None):
+    """Read ``source`` (path or file object) into a DataFrame, only ``columns`` if given.
+
+    ``fmt`` is inferred from the path, or from ``name`` for file objects such
+    as Streamlit uploads. ``csv_engine="pyarrow"`` switches CSV parsing to the
+    multi-threaded Arrow reader.
+    """
+    if fmt is None:
+        fmt = detect_format(name or getattr(source, "name", None) or source)
+    if fmt == "csv":
+        df = _read_csv(source, columns, csv_engine)
+    elif fmt == "npy":
+        df = pd.DataFrame(_npy_columns(_load_npy(source), columns), copy=False)
+    else:
+        df = _arrow_table(source, fmt, columns).to_pandas()
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def iter_chunks(source, columns=None, chunksize=100_000, fmt=None, csv_engine="c", name=None):
+    """Yield ``source`` as DataFrames of at most ``chunksize`` rows, only ``columns`` if given.
+
+    CSV and Parquet are decoded one chunk at a time; Arrow IPC and .npy files
+    are memory-mapped when given as paths, so slicing them costs no extra read.
+    """
+    if fmt is None:
+        fmt = detect_format(name or getattr(source, "name", None) or source)
+    if fmt == "csv":
+        if csv_engine == "pyarrow":
+            # the pyarrow parser cannot stream; fall back to the C parser for chunks
+            csv_engine = "c"
+        usecols = list(columns) if columns is not None else None
+        for chunk in pd.read_csv(_rewind(source), usecols=usecols, chunksize=chunksize, engine=csv_engine):
+            yield chunk[list(columns)] if columns is not None else chunk
+    elif fmt == "parquet":
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(_rewind(source))
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif fmt == "npy":
+        data = _npy_columns(_load_npy(source), columns)
+        n_rows = len(next(iter(data.values()))) if data else 0
+        for start in range(0, n_rows, chunksize):
+            yield pd.DataFrame({c: v[start:start + chunksize] for c, v in data.items()})
+    else:
+        table = _arrow_table(source, fmt, columns)
+        for batch in table.to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()
+
+
+def read_columns(source, columns=None, fmt=None, csv_engine="c", name=None):
+    """Read ``source`` as ``{column: 1D float-able ndarray}``, zero-copy where possible."""
+    if fmt is None:
+        fmt = detect_format(name or getattr(source, "name", None) or source)
+    if fmt == "npy":
+        return _npy_columns(_load_npy(source), columns)
+    if fmt == "csv":
+        df = _read_csv(source, columns, csv_engine)
+        return {c: df[c].to_numpy() for c in df.columns}
+
+    table = _arrow_table(source, fmt, columns)
+    data = {}
+    for name, col in zip(table.column_names, table.columns):
+        if col.num_chunks == 1 and col.null_count == 0:
+            # views straight onto the Arrow buffer (the mmap for Feather files)
+            data[name] = col.chunk(0).to_numpy(zero_copy_only=False)
+        else:
+            data[name] = col.to_numpy()
+    return data
+
+
+def read_schema(source, fmt=None, name=None):
+    """Column names of ``source`` without reading its data (header only for CSV)."""
+    if fmt is None:
+        fmt = detect_format(name or getattr(source, "name", None) or source)
+    if fmt == "csv":
+        return list(pd.read_csv(_rewind(source), nrows=0).columns)
+    if fmt == "npy":
+        return list(_npy_columns(_load_npy(source)).keys())
+    _require_pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(_rewind(source)).names)
+    import pyarrow.ipc as ipc
+    if isinstance(source, (str, os.PathLike)):
+        import pyarrow as pa
+        with pa.memory_map(str(source)) as mm:
+            return list(ipc.open_file(mm).schema.names)
+    return list(ipc.open_file(_rewind(source)).schema.names)
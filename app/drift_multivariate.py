@@ -0,0 +1,433 @@
+"""Multivariate drift: changes in how the numeric features move together.
+
+Per-feature metrics miss drift in the joint distribution (a correlation that
+flips while every marginal stays put), and on wide tables they mean one test
+per column. Two detectors here look at all features at once, in bounded
+memory and a fixed number of passes over the data:
+
+* Reconstruction error. ``PCAReference.fit`` standardises the reference and
+  fits an ``IncrementalPCA`` on it in mini-batches (``partial_fit``), keeping
+  the components that explain ``variance`` of it. ``PCADriftMonitor`` scores
+  current batches as they arrive: rows that break the reference correlation
+  structure fall off the principal subspace and reconstruct badly. The
+  statistic is mean current / mean reference error, with a z-test on the
+  difference of means. Squared residuals are also summed per feature, so the
+  excess error can be attributed to features or feature groups.
+* Domain classifier. ``domain_classifier_test`` draws a reservoir sample of
+  each side (drift_sampling), trains a histogram gradient-boosting classifier
+  with early stopping to tell them apart and reports the held-out AUC with a
+  Mann-Whitney p-value (0.5 = indistinguishable). A group's contribution is
+  the AUC lost when its columns are shuffled together on the held-out rows.
+
+Missing values are replaced by the reference mean for the PCA, so they add no
+residual; the classifier handles them natively. The reference is read three
+times by ``PCAReference.fit`` (scaling, components, reference errors), so a
+stream must be given as a list of chunks, a DataFrame or a path.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.stats import mannwhitneyu, norm
+
+from drift_io import iter_chunks
+from drift_utils import _NO_TIMER, _numeric_columns
+
+# rows per IncrementalPCA.partial_fit call (raised to the feature count if smaller)
+PCA_BATCH_ROWS = 10_000
+
+
+def _chunks(source, columns=None, chunksize=100_000):
+    # DataFrame slices, chunks of a path / file object, or the chunks of an iterable
+    if isinstance(source, pd.DataFrame):
+        frame = source if columns is None else source[list(columns)]
+        for start in range(0, len(frame), chunksize):
+            yield frame.iloc[start:start + chunksize]
+    elif isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+        yield from iter_chunks(source, columns=columns, chunksize=chunksize)
+    else:
+        for chunk in source:
+            yield chunk if columns is None else chunk[list(columns)]
+
+
+def _infer_numeric_cols(source):
+    if isinstance(source, pd.DataFrame):
+        return _numeric_columns(source)
+    return _numeric_columns(next(iter(_chunks(source, chunksize=1_000))))
+
+
+def _rebatch(chunks, rows):
+    # arrays of ``rows`` rows; the remainder joins the last batch so none is short
+    pending = []
+    held = None
+    n_pending = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        n_pending += len(chunk)
+        while n_pending >= rows:
+            values = np.concatenate(pending)
+            if held is not None:
+                yield held
+            held, rest = values[:rows], values[rows:]
+            pending, n_pending = [rest], len(rest)
+    rest = np.concatenate(pending) if n_pending else None
+    if held is not None and rest is not None:
+        yield np.concatenate([held, rest])
+    elif held is not None:
+        yield held
+    elif rest is not None:
+        yield rest
+
+
+def _group_index(features, groups):
+    # (name, column positions) per group; features outside every group stand alone
+    position = {f: i for i, f in enumerate(features)}
+    out, seen = [], set()
+    for name, cols in (groups or {}).items():
+        idx = [position[c] for c in cols if c in position]
+        if idx:
+            out.append((name, np.array(idx)))
+            seen.update(idx)
+    out.extend((f, np.array([i])) for f, i in position.items() if i not in seen)
+    return out
+
+
+def _contributions(values, features, groups):
+    # per-group sums of a per-feature score, largest first, with their share of the positive total
+    records = [(name, float(values[idx].sum())) for name, idx in _group_index(features, groups)]
+    table = pd.DataFrame(records, columns=["group", "contribution"])
+    positive = table["contribution"].clip(lower=0).sum()
+    table["share"] = table["contribution"].clip(lower=0) / positive if positive > 0 else 0.0
+    return table.sort_values("contribution", ascending=False, ignore_index=True)
+
+
+class ReconstructionErrors:
+    """Running sums of per-row reconstruction error and per-feature squared residuals."""
+
+    def __init__(self, n_features):
+        self.n_rows = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.feature_sq = np.zeros(n_features)
+
+    def update(self, squared_residuals):
+        errors = squared_residuals.mean(axis=1)
+        self.n_rows += len(errors)
+        self.total += errors.sum()
+        self.total_sq += (errors ** 2).sum()
+        self.feature_sq += squared_residuals.sum(axis=0)
+        return self
+
+    def merge(self, other):
+        self.n_rows += other.n_rows
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.feature_sq += other.feature_sq
+        return self
+
+    def mean(self):
+        return self.total / self.n_rows if self.n_rows else np.nan
+
+    def var(self):
+        if self.n_rows < 2:
+            return np.nan
+        return max(self.total_sq / self.n_rows - self.mean() ** 2, 0.0) * self.n_rows / (self.n_rows - 1)
+
+    def feature_mean(self):
+        return self.feature_sq / self.n_rows if self.n_rows else np.full(len(self.feature_sq), np.nan)
+
+
+class PCAReference:
+    """Scaling, principal subspace and reference reconstruction errors of the reference data."""
+
+    def __init__(self, features, mean, scale, pca_mean, components, explained_variance_ratio,
+                 reference_errors=None):
+        self.features = list(features)
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.pca_mean = np.asarray(pca_mean, dtype=float)
+        self.components = np.asarray(components, dtype=float)
+        self.explained_variance_ratio = np.asarray(explained_variance_ratio, dtype=float)
+        self.reference_errors = reference_errors
+
+    @classmethod
+    def fit(cls, ref_source, numeric_cols=None, variance=0.95, batch_rows=PCA_BATCH_ROWS,
+            chunksize=100_000):
+        """Fit on a DataFrame, a path / file object or a list of DataFrame chunks."""
+        from sklearn.decomposition import IncrementalPCA
+        from sklearn.preprocessing import StandardScaler
+
+        if not isinstance(ref_source, (pd.DataFrame, str, os.PathLike, list, tuple)) \
+                and not hasattr(ref_source, "read"):
+            raise TypeError("the reference is read three times: pass a DataFrame, a path or a list of chunks")
+        if numeric_cols is None:
+            numeric_cols = _infer_numeric_cols(ref_source)
+        numeric_cols = list(numeric_cols)
+        if len(numeric_cols) < 2:
+            raise ValueError("multivariate drift needs at least two numeric features")
+
+        def batches():
+            for chunk in _chunks(ref_source, numeric_cols, chunksize):
+                yield chunk.to_numpy(dtype=float)
+
+        # pass 1: mean / standard deviation (NaN-aware)
+        scaler = StandardScaler()
+        for values in batches():
+            scaler.partial_fit(values)
+        n_rows = int(np.max(scaler.n_samples_seen_))
+        if n_rows < 2:
+            raise ValueError("the reference needs at least two rows")
+        mean = np.nan_to_num(scaler.mean_)
+        scale = np.where(np.isnan(scaler.scale_), 1.0, scaler.scale_)
+
+        # pass 2: principal components of the standardised reference
+        n_feat = len(numeric_cols)
+        rows = max(batch_rows, n_feat)
+        pca = IncrementalPCA(n_components=min(n_feat, n_rows))
+        standardised = (np.nan_to_num((v - mean) / scale) for v in batches())
+        for values in _rebatch(standardised, rows):
+            pca.partial_fit(values)
+
+        # keep the components reaching ``variance``, but never all of them
+        # (a full basis reconstructs every row exactly)
+        k = int(np.searchsorted(np.cumsum(pca.explained_variance_ratio_), variance) + 1)
+        k = min(k, n_feat - 1)
+        reference = cls(numeric_cols, mean, scale, pca.mean_, pca.components_[:k],
+                        pca.explained_variance_ratio_[:k])
+
+        # pass 3: the reference's own reconstruction errors
+        errors = ReconstructionErrors(n_feat)
+        for values in batches():
+            errors.update(reference.squared_residuals(values))
+        reference.reference_errors = errors
+        return reference
+
+    @property
+    def n_components(self):
+        return len(self.components)
+
+    def _as_array(self, batch):
+        if isinstance(batch, pd.DataFrame):
+            return batch.reindex(columns=self.features).to_numpy(dtype=float)
+        values = np.asarray(batch, dtype=float)
+        if values.ndim == 1:
+            values = values.reshape(1, -1)
+        if values.shape[1] != len(self.features):
+            raise ValueError(f"expected {len(self.features)} columns, got {values.shape[1]}")
+        return values
+
+    def squared_residuals(self, batch):
+        """(rows, features) squared residuals of ``batch`` after projection on the subspace."""
+        values = np.nan_to_num((self._as_array(batch) - self.mean) / self.scale) - self.pca_mean
+        residuals = values - (values @ self.components.T) @ self.components
+        return residuals ** 2
+
+    def save(self, path):
+        errors = self.reference_errors
+        np.savez(
+            path,
+            features=np.array(self.features, dtype=str),
+            mean=self.mean,
+            scale=self.scale,
+            pca_mean=self.pca_mean,
+            components=self.components,
+            explained_variance_ratio=self.explained_variance_ratio,
+            error_sums=np.array([errors.n_rows, errors.total, errors.total_sq]),
+            feature_sq=errors.feature_sq,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            errors = ReconstructionErrors(len(data["features"]))
+            errors.n_rows = int(data["error_sums"][0])
+            errors.total, errors.total_sq = data["error_sums"][1:]
+            errors.feature_sq = data["feature_sq"]
+            return cls(
+                data["features"].tolist(),
+                data["mean"],
+                data["scale"],
+                data["pca_mean"],
+                data["components"],
+                data["explained_variance_ratio"],
+                reference_errors=errors,
+            )
+
+
+class PCADriftMonitor:
+    """Reconstruction-error drift of current batches against a PCAReference.
+
+    Memory is O(features) whatever the number of rows scored; monitors on the
+    same reference can be merged.
+    """
+
+    def __init__(self, reference):
+        if not isinstance(reference, PCAReference):
+            raise TypeError("PCADriftMonitor needs a fitted PCAReference")
+        self.reference = reference
+        self.errors = ReconstructionErrors(len(reference.features))
+
+    def update(self, batch):
+        values = self.reference._as_array(batch)
+        if len(values):
+            self.errors.update(self.reference.squared_residuals(values))
+        return self
+
+    def merge(self, other):
+        self.errors.merge(other.errors)
+        return self
+
+    def results(self, groups=None):
+        """Summary dict plus a ``contributions`` table of excess squared residual per group."""
+        ref, cur = self.reference.reference_errors, self.errors
+        ref_mean, cur_mean = ref.mean(), cur.mean()
+        se = np.sqrt(ref.var() / ref.n_rows + cur.var() / cur.n_rows) if cur.n_rows > 1 else np.nan
+        z = (cur_mean - ref_mean) / se if se > 0 else np.nan
+        excess = cur.feature_mean() - ref.feature_mean()
+        return {
+            "error_reference": ref_mean,
+            "error_current": cur_mean,
+            "error_ratio": cur_mean / ref_mean if ref_mean > 0 else np.nan,
+            "z_score": z,
+            "p_value": norm.sf(z) if not np.isnan(z) else np.nan,
+            "n_components": self.reference.n_components,
+            "rows_reference": ref.n_rows,
+            "rows_current": cur.n_rows,
+            "contributions": _contributions(excess, self.reference.features, groups),
+        }
+
+
+def pca_drift(df_base, df_curr, numeric_cols=None, groups=None, variance=0.95, chunksize=100_000,
+              timer=None):
+    """Reconstruction-error drift of ``df_curr`` (streamed in chunks) against ``df_base``.
+
+    ``df_base`` may be a fitted PCAReference.
+    """
+    timer = timer or _NO_TIMER
+    if isinstance(df_base, PCAReference):
+        reference = df_base
+    else:
+        with timer.stage("pca_fit"):
+            reference = PCAReference.fit(df_base, numeric_cols, variance=variance, chunksize=chunksize)
+    monitor = PCADriftMonitor(reference)
+    with timer.stage("pca_score"):
+        for chunk in _chunks(df_curr, reference.features, chunksize):
+            monitor.update(chunk)
+    return monitor.results(groups)
+
+
+def domain_classifier_test(df_base, df_curr, numeric_cols=None, groups=None, max_rows=20_000,
+                           test_size=0.3, n_repeats=3, chunksize=100_000, seed=0, timer=None):
+    """Held-out AUC of a classifier separating reference from current rows.
+
+    At most ``max_rows`` rows per side are used (a uniform reservoir sample of
+    each input, the same number from both), so cost and memory do not grow
+    with the inputs beyond one read. Returns a summary dict with a
+    ``contributions`` table of mean AUC drop per group.
+    """
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+
+    from drift_sampling import sample_source
+
+    timer = timer or _NO_TIMER
+    if numeric_cols is None:
+        numeric_cols = _infer_numeric_cols(df_base)
+    numeric_cols = list(numeric_cols)
+
+    with timer.stage("classifier_sample"):
+        base = sample_source(_chunks(df_base, numeric_cols, chunksize), max_rows, seed=seed)
+        curr = sample_source(_chunks(df_curr, numeric_cols, chunksize), max_rows, seed=seed + 1)
+        n = min(len(base), len(curr))
+        if n < 10:
+            raise ValueError("the domain classifier needs at least 10 rows per side")
+        X = np.vstack([base.sample(n).to_numpy(dtype=float), curr.sample(n).to_numpy(dtype=float)])
+        y = np.repeat([0, 1], n)
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, stratify=y, random_state=seed
+        )
+
+    with timer.stage("classifier_fit"):
+        model = HistGradientBoostingClassifier(
+            max_iter=200, early_stopping=True, validation_fraction=0.2, n_iter_no_change=10,
+            random_state=seed,
+        )
+        model.fit(X_train, y_train)
+        scores = model.predict_proba(X_test)[:, 1]
+        auc = roc_auc_score(y_test, scores)
+        p_value = mannwhitneyu(scores[y_test == 1], scores[y_test == 0], alternative="greater").pvalue
+
+    # group importance: AUC lost when the group's columns are shuffled together
+    with timer.stage("classifier_importance"):
+        rng = np.random.default_rng(seed)
+        drops = np.zeros(len(numeric_cols))
+        for name, idx in _group_index(numeric_cols, groups):
+            lost = 0.0
+            for _ in range(n_repeats):
+                shuffled = X_test.copy()
+                shuffled[:, idx] = X_test[rng.permutation(len(X_test))][:, idx]
+                lost += auc - roc_auc_score(y_test, model.predict_proba(shuffled)[:, 1])
+            # stored on the group's first column so _contributions sums it once
+            drops[idx[0]] = lost / n_repeats
+
+    return {
+        "auc": auc,
+        "p_value": p_value,
+        "n_iter": int(model.n_iter_),
+        "rows_reference": base.n_seen,
+        "rows_current": curr.n_seen,
+        "sample_rows": n,
+        "contributions": _contributions(drops, numeric_cols, groups),
+    }
+
+
+def analyze_multivariate_drift(df_base, df_curr, numeric_cols=None, groups=None,
+                               methods=("pca", "classifier"), variance=0.95, max_rows=20_000,
+                               chunksize=100_000, seed=0, timer=None):
+    """Run the multivariate detectors; returns ``(summary, contributions)`` DataFrames.
+
+    ``summary`` has one row per method (statistic = error ratio for "pca", AUC
+    for "classifier"). ``contributions`` lists, per method, each feature group's
+    share of the drift; ``groups`` maps a group name to its columns.
+    """
+    unknown = set(methods) - {"pca", "classifier"}
+    if unknown:
+        raise ValueError(f"unknown multivariate methods: {sorted(unknown)}")
+    if isinstance(df_base, PCAReference):
+        if "classifier" in methods:
+            raise ValueError("the domain classifier needs the reference data, not a PCAReference")
+        numeric_cols = numeric_cols or df_base.features
+    elif numeric_cols is None:
+        numeric_cols = _infer_numeric_cols(df_base)
+
+    summary, contributions = [], []
+    if "pca" in methods:
+        out = pca_drift(df_base, df_curr, numeric_cols, groups, variance, chunksize, timer)
+        summary.append({
+            "method": "pca",
+            "statistic": out["error_ratio"],
+            "p_value": out["p_value"],
+            "rows_reference": out["rows_reference"],
+            "rows_current": out["rows_current"],
+            "detail": f"{out['n_components']} components, z = {out['z_score']:.2f}",
+        })
+        contributions.append(out["contributions"].assign(method="pca"))
+    if "classifier" in methods:
+        out = domain_classifier_test(df_base, df_curr, numeric_cols, groups, max_rows,
+                                     chunksize=chunksize, seed=seed, timer=timer)
+        summary.append({
+            "method": "classifier",
+            "statistic": out["auc"],
+            "p_value": out["p_value"],
+            "rows_reference": out["rows_reference"],
+            "rows_current": out["rows_current"],
+            "detail": f"{out['sample_rows']} rows per side, {out['n_iter']} boosting rounds",
+        })
+        contributions.append(out["contributions"].assign(method="classifier"))
+
+    summary = pd.DataFrame(summary, columns=[
+        "method", "statistic", "p_value", "rows_reference", "rows_current", "detail",
+    ])
+    contributions = pd.concat(contributions, ignore_index=True)[["method", "group", "contribution", "share"]]
+    return summary, contributions
@@ -0,0 +1,218 @@
+"""Performance drift: model quality on labels that arrive after the prediction.
+
+Feature and prediction drift only say the inputs or outputs moved; whether
+the model got worse needs the ground truth, which usually arrives hours or
+days later. Three pieces:
+
+* ``LabelJoiner`` matches predictions to labels by request id. Whichever
+  side arrives first waits in an insertion-ordered dict (O(1) lookup by id,
+  oldest first for eviction) for at most ``max_delay`` seconds and at most
+  ``max_pending`` entries, so memory stays bounded however many labels
+  never come.
+* ``PerformanceCounts`` keeps, per score bin (``SCORE_BINS`` equal-width
+  bins of [0, 1]), the rows, the positives and the sum of scores. Accuracy
+  (at ``THRESHOLD``), ROC AUC and expected calibration error (``ECE_BINS``
+  bins) all follow from these, so matched pairs are folded in with one
+  bincount and windows can be merged. AUC is that of the scores at bin
+  resolution (ties within a bin count half).
+* ``PerformanceMonitor`` joins, assigns each pair to the tumbling window of
+  its prediction time and compares every window with the baseline of the
+  labelled training predictions (``performance_baseline``).
+
+Scores are probabilities of the positive class (clipped to [0, 1]); labels
+are 0 / 1, other labels are ignored.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+# score bins of the counts; AUC and calibration are resolved to 1 / SCORE_BINS
+SCORE_BINS = 1000
+# equal-width bins of the expected calibration error
+ECE_BINS = 10
+# scores at or above this are predicted positive
+THRESHOLD = 0.5
+
+
+class LabelJoiner:
+    """Matches predictions and labels by request id within ``max_delay`` seconds."""
+
+    def __init__(self, max_delay, max_pending=1_000_000):
+        self.max_delay = float(max_delay)
+        self.max_pending = int(max_pending)
+        # request id -> (time, score) / (time, label), oldest first
+        self.predictions = OrderedDict()
+        self.labels = OrderedDict()
+        self.joined = 0
+        self.expired_predictions = 0
+        self.expired_labels = 0
+
+    def _add(self, waiting, other, ids, times, values, prediction_side):
+        pred_times, scores, labels = [], [], []
+        for request_id, t, value in zip(ids, times, values):
+            if request_id is None:
+                continue
+            try:
+                match = other.pop(request_id, None)
+            except TypeError:  # unhashable id (a JSON list or object)
+                continue
+            if match is None:
+                # a repeated id replaces the waiting entry and moves it to the back
+                waiting.pop(request_id, None)
+                waiting[request_id] = (t, value)
+            elif prediction_side:
+                pred_times.append(t)
+                scores.append(value)
+                labels.append(match[1])
+            else:
+                pred_times.append(match[0])
+                scores.append(match[1])
+                labels.append(value)
+        overflow = len(waiting) - self.max_pending
+        for _ in range(max(overflow, 0)):
+            waiting.popitem(last=False)
+        if overflow > 0:
+            if prediction_side:
+                self.expired_predictions += overflow
+            else:
+                self.expired_labels += overflow
+        self.joined += len(pred_times)
+        return (np.array(pred_times, dtype=float), np.array(scores, dtype=float),
+                np.array(labels, dtype=float))
+
+    def add_predictions(self, ids, times, scores):
+        """Returns (prediction times, scores, labels) of the predictions whose label was waiting."""
+        return self._add(self.predictions, self.labels, ids, times, scores, True)
+
+    def add_labels(self, ids, times, labels):
+        """Returns (prediction times, scores, labels) of the labels whose prediction was waiting."""
+        return self._add(self.labels, self.predictions, ids, times, labels, False)
+
+    def expire(self, now):
+        # entries are in arrival order, so eviction stops at the first one still in time
+        cutoff = now - self.max_delay
+        for waiting, side in ((self.predictions, "expired_predictions"), (self.labels, "expired_labels")):
+            n = 0
+            while waiting and next(iter(waiting.values()))[0] < cutoff:
+                waiting.popitem(last=False)
+                n += 1
+            setattr(self, side, getattr(self, side) + n)
+
+    def __len__(self):
+        return len(self.predictions) + len(self.labels)
+
+
+class PerformanceCounts:
+    """Per-score-bin rows, positives and score sums; mergeable."""
+
+    def __init__(self):
+        self.rows = np.zeros(SCORE_BINS, dtype=np.int64)
+        self.positives = np.zeros(SCORE_BINS, dtype=np.int64)
+        self.score_sum = np.zeros(SCORE_BINS)
+
+    def update(self, scores, labels):
+        scores = np.clip(np.asarray(scores, dtype=float), 0.0, 1.0)
+        labels = np.asarray(labels, dtype=float)
+        keep = ~np.isnan(scores) & ((labels == 0) | (labels == 1))
+        scores, labels = scores[keep], labels[keep]
+        bins = np.minimum((scores * SCORE_BINS).astype(np.int64), SCORE_BINS - 1)
+        self.rows += np.bincount(bins, minlength=SCORE_BINS)
+        self.positives += np.bincount(bins, weights=labels, minlength=SCORE_BINS).astype(np.int64)
+        self.score_sum += np.bincount(bins, weights=scores, minlength=SCORE_BINS)
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.positives += other.positives
+        self.score_sum += other.score_sum
+        return self
+
+    def metrics(self):
+        n = int(self.rows.sum())
+        if n == 0:
+            return {"n": 0, "positive_rate": np.nan, "accuracy": np.nan, "auc": np.nan, "ece": np.nan}
+        negatives = self.rows - self.positives
+        n_pos = int(self.positives.sum())
+        n_neg = n - n_pos
+        cut = int(round(THRESHOLD * SCORE_BINS))
+        accuracy = (self.positives[cut:].sum() + negatives[:cut].sum()) / n
+        if n_pos and n_neg:
+            # each positive beats the negatives of lower bins and ties half of its own bin
+            below = np.cumsum(negatives) - negatives
+            auc = (self.positives * (below + 0.5 * negatives)).sum() / (n_pos * n_neg)
+        else:
+            auc = np.nan
+        group = SCORE_BINS // ECE_BINS
+        gaps = np.abs(self.score_sum.reshape(ECE_BINS, group).sum(axis=1)
+                      - self.positives.reshape(ECE_BINS, group).sum(axis=1))
+        return {"n": n, "positive_rate": n_pos / n, "accuracy": float(accuracy),
+                "auc": float(auc), "ece": float(gaps.sum() / n)}
+
+
+def performance_baseline(df, score_col, label_col):
+    """Metrics of the labelled training predictions (e.g. train_predictions.csv)."""
+    import pandas as pd
+
+    labels = pd.to_numeric(df[label_col], errors="coerce").to_numpy(dtype=float)
+    return PerformanceCounts().update(df[score_col].to_numpy(dtype=float), labels).metrics()
+
+
+class PerformanceMonitor:
+    """Joins delayed labels and keeps accuracy / AUC / ECE per window of prediction time.
+
+    Only the newest ``max_windows`` windows are kept. ``tolerance`` is the drop
+    in accuracy or AUC (or rise in ECE) from the baseline that marks a window
+    as degraded.
+    """
+
+    def __init__(self, window_seconds=3600, max_delay=2 * 86400, max_pending=1_000_000,
+                 max_windows=168, baseline=None, tolerance=0.05):
+        self.window_seconds = float(window_seconds)
+        self.max_windows = int(max_windows)
+        self.baseline = baseline
+        self.tolerance = float(tolerance)
+        self.joiner = LabelJoiner(max_delay, max_pending)
+        self.windows = {}
+
+    def _fold(self, joined):
+        pred_times, scores, labels = joined
+        if not len(pred_times):
+            return
+        starts = np.floor(pred_times / self.window_seconds) * self.window_seconds
+        for start in np.unique(starts):
+            mask = starts == start
+            self.windows.setdefault(float(start), PerformanceCounts()).update(scores[mask], labels[mask])
+        for start in sorted(self.windows)[:-self.max_windows]:
+            del self.windows[start]
+
+    def add_predictions(self, ids, times, scores):
+        self._fold(self.joiner.add_predictions(ids, times, scores))
+
+    def add_labels(self, ids, times, labels):
+        self._fold(self.joiner.add_labels(ids, times, labels))
+
+    def expire(self, now):
+        self.joiner.expire(now)
+
+    def results(self):
+        import pandas as pd
+
+        rows = [{"window_start": start, **self.windows[start].metrics()} for start in sorted(self.windows)]
+        results = pd.DataFrame(rows, columns=["window_start", "n", "positive_rate", "accuracy", "auc", "ece"])
+        if self.baseline is not None:
+            results["accuracy_drop"] = self.baseline["accuracy"] - results["accuracy"]
+            results["auc_drop"] = self.baseline["auc"] - results["auc"]
+            results["ece_increase"] = results["ece"] - self.baseline["ece"]
+            results["degraded"] = ((results[["accuracy_drop", "auc_drop", "ece_increase"]] > self.tolerance)
+                                   .any(axis=1))
+        return results
+
+    def status(self):
+        joiner = self.joiner
+        return {
+            "joined": joiner.joined,
+            "pending_predictions": len(joiner.predictions),
+            "pending_labels": len(joiner.labels),
+            "expired_predictions": joiner.expired_predictions,
+            "expired_labels": joiner.expired_labels,
+        }
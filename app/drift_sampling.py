@@ -0,0 +1,363 @@
+"""Sampling mode for very large inputs.
+
+``ReservoirSampler`` keeps a uniform sample of at most ``size`` rows over a
+stream of DataFrame chunks. Every row gets a random key and the rows with the
+``size`` smallest keys are kept (bottom-k sampling), so only one chunk is in
+memory at a time and samplers over different parts of the data can be merged.
+``StratifiedSampler`` keeps one reservoir per value of a segment column and
+allocates the final sample proportionally to the segment sizes, so every
+segment appears at exactly its population share.
+
+Sampling error is reported as ``1 - alpha`` confidence intervals:
+
+* PSI: delta method on the multinomial bin proportions of each sampled side,
+  with the finite-population correction ``1 - n / N``. A side that is not
+  sampled (e.g. a fitted ReferenceProfile) adds no variance. When the
+  reference is sampled its quantile breakpoints move a little too; that
+  second-order effect is not included.
+* KS: Dvoretzky-Kiefer-Wolfowitz. A sampled side's ECDF is within
+  ``sqrt(ln(4 / alpha) / (2 n))`` of the population ECDF (alpha is split over
+  the two sides), so the population statistic is within the sum of the two.
+
+``sample="auto"`` starts with ``AUTO_START_ROWS`` and doubles the sample until
+every feature's PSI interval falls inside one severity band, the data runs
+out, or the next step would overrun ``time_budget`` seconds. The budget
+starts before the inputs are read: reading and sampling files / streams may
+take ``READ_BUDGET_SHARE`` of it (the reference side half of that). A read
+cut short keeps the rows read so far, i.e. the head of a file; the results
+then describe those rows (``read_complete`` is False and ``rows_read_*``
+count them) and the intervals treat them as the population.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import ks_2samp, norm
+
+from drift_io import iter_chunks
+from drift_stream import DriftAccumulator
+from drift_utils import _NO_TIMER, ReferenceProfile, _numeric_columns, _severity
+
+AUTO_START_ROWS = 10_000
+# largest reservoir kept from a stream or file when sample="auto"
+AUTO_MAX_ROWS = 1_000_000
+# share of time_budget that reading the inputs may take; the rest is left for the metrics
+READ_BUDGET_SHARE = 0.8
+
+
+class ReservoirSampler:
+    """Uniform sample of at most ``size`` rows over a stream of DataFrame chunks."""
+
+    def __init__(self, size, seed=0):
+        if size < 1:
+            raise ValueError("sample size must be positive")
+        self.size = size
+        self.n_seen = 0
+        # False when sample_source stopped reading at its deadline
+        self.complete = True
+        self._rng = np.random.default_rng(seed)
+        self._keys = np.empty(0)
+        self._rows = None
+
+    def update(self, chunk):
+        keys = self._rng.random(len(chunk))
+        self.n_seen += len(chunk)
+        if len(self._keys) == self.size:
+            # once full, only rows beating the largest kept key can enter
+            enter = keys < self._keys.max()
+            chunk, keys = chunk[enter], keys[enter]
+        self._add(chunk, keys)
+        return self
+
+    def _add(self, rows, keys):
+        if self._rows is not None and len(self._rows):
+            rows = pd.concat([self._rows, rows], ignore_index=True)
+            keys = np.concatenate([self._keys, keys])
+        else:
+            rows = rows.reset_index(drop=True)
+        if len(keys) > self.size:
+            keep = np.sort(np.argpartition(keys, self.size - 1)[:self.size])
+            rows, keys = rows.iloc[keep].reset_index(drop=True), keys[keep]
+        self._rows, self._keys = rows, keys
+
+    def merge(self, other):
+        # samplers must have been seeded differently
+        self.n_seen += other.n_seen
+        if other._rows is not None:
+            self._add(other._rows, other._keys)
+        return self
+
+    def __len__(self):
+        return len(self._keys)
+
+    def sample(self, n=None):
+        # the n smallest keys of a bottom-k sample are again a uniform sample
+        if self._rows is None:
+            return pd.DataFrame()
+        if n is None or n >= len(self._keys):
+            return self._rows
+        keep = np.sort(np.argpartition(self._keys, n - 1)[:n])
+        return self._rows.iloc[keep].reset_index(drop=True)
+
+
+class StratifiedSampler:
+    """Proportionally allocated sample over the values of column ``by``.
+
+    Each segment keeps its own reservoir of up to ``size`` rows, so memory
+    grows with the number of segments.
+    """
+
+    def __init__(self, size, by, seed=0):
+        if size < 1:
+            raise ValueError("sample size must be positive")
+        self.size = size
+        self.by = by
+        self.n_seen = 0
+        self.complete = True
+        self._seeds = np.random.SeedSequence(seed)
+        self._strata = {}
+
+    def update(self, chunk):
+        self.n_seen += len(chunk)
+        for value, part in chunk.groupby(self.by, sort=False, dropna=False, observed=True):
+            key = None if pd.isna(value) else value
+            sampler = self._strata.get(key)
+            if sampler is None:
+                sampler = self._strata[key] = ReservoirSampler(self.size, seed=self._seeds.spawn(1)[0])
+            sampler.update(part)
+        return self
+
+    def __len__(self):
+        return min(self.size, self.n_seen)
+
+    def allocation(self, n):
+        # largest-remainder proportional allocation of n rows over the segments
+        sizes = np.array([s.n_seen for s in self._strata.values()])
+        exact = n * sizes / sizes.sum()
+        alloc = np.floor(exact).astype(int)
+        rest = n - alloc.sum()
+        alloc[np.argsort(-(exact - alloc), kind="stable")[:rest]] += 1
+        return dict(zip(self._strata, np.minimum(alloc, sizes)))
+
+    def sample(self, n=None):
+        if not self._strata:
+            return pd.DataFrame()
+        n = len(self) if n is None else min(n, self.n_seen)
+        alloc = self.allocation(n)
+        parts = [self._strata[key].sample(k) for key, k in alloc.items() if k > 0]
+        return pd.concat(parts, ignore_index=True)
+
+
+def sample_source(source, size, by=None, columns=None, chunksize=100_000, seed=0, deadline=None,
+                  **read_kwargs):
+    """Reservoir (or, with ``by``, stratified) sampler filled from ``source``.
+
+    ``source`` is a DataFrame, a path / file object read with drift_io.iter_chunks,
+    or any iterable of DataFrame chunks (a stream). ``sampler.n_seen`` is the
+    population size. Past ``deadline`` (a ``time.perf_counter()`` value) no
+    further chunks are sampled and ``sampler.complete`` is False.
+    """
+    sampler = StratifiedSampler(size, by, seed) if by is not None else ReservoirSampler(size, seed)
+    if isinstance(source, pd.DataFrame):
+        chunks = [source]
+    elif isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+        chunks = iter_chunks(source, columns=columns, chunksize=chunksize, **read_kwargs)
+    else:
+        chunks = source
+    for chunk in chunks:
+        if deadline is not None and sampler.n_seen and time.perf_counter() > deadline:
+            sampler.complete = False
+            break
+        sampler.update(chunk)
+    return sampler
+
+
+def _fpc(n, population):
+    # finite-population correction; 0 when the whole population was used
+    return np.clip(1 - n / np.maximum(population, 1), 0, 1)
+
+def _psi_std(base_counts, curr_counts, base_fpc, curr_fpc):
+    # delta-method standard error of PSI, one value per row of the count matrices
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n_base = base_counts.sum(axis=1, keepdims=True)
+        n_curr = curr_counts.sum(axis=1, keepdims=True)
+        p_raw = base_counts / n_base
+        q_raw = curr_counts / n_curr
+        # same zero floor as the PSI itself; the raw shares weight the variance
+        p = np.where(p_raw == 0, 1e-6, p_raw)
+        q = np.where(q_raw == 0, 1e-6, q_raw)
+        g_p = np.log(p / q) - q / p
+        g_q = np.log(q / p) - p / q
+        var_p = (p_raw * g_p ** 2).sum(axis=1) - (p_raw * g_p).sum(axis=1) ** 2
+        var_q = (q_raw * g_q ** 2).sum(axis=1) - (q_raw * g_q).sum(axis=1) ** 2
+        var = base_fpc * var_p / n_base[:, 0] + curr_fpc * var_q / n_curr[:, 0]
+    return np.sqrt(np.maximum(var, 0))
+
+def _ks_halfwidth(n, fpc, alpha):
+    # DKW band of one side; alpha is split over the two sides
+    with np.errstate(divide="ignore"):
+        eps = np.sqrt(np.log(4 / alpha) / (2 * np.asarray(n, dtype=float)))
+    return np.where(fpc > 0, eps, 0.0)
+
+
+def _evaluate(base, n_base_pop, current, n_curr_pop, numeric_cols, categorical_cols, buckets, bins,
+              alpha, top_k, timer):
+    # metrics + sampling intervals on one (reference, current) sample pair
+    z = norm.ppf(1 - alpha / 2)
+    if isinstance(base, ReferenceProfile):
+        profile = base
+        base_fpc = 0.0
+    else:
+        with timer.stage("sample_profile"):
+            profile = ReferenceProfile.fit(base, numeric_cols, buckets=buckets, bins=bins)
+        base_fpc = _fpc(len(base), n_base_pop)
+    curr_fpc = _fpc(len(current), n_curr_pop)
+
+    records = []
+    if numeric_cols:
+        with timer.stage("sample_counts"):
+            acc = DriftAccumulator(profile, numeric_cols).update(current[numeric_cols])
+            rows = [profile._index[c] for c in numeric_cols]
+            psi = acc.psi()
+            kl = acc.kl()
+            psi_std = _psi_std(profile.psi_counts[rows], acc.psi_counts, base_fpc, curr_fpc)
+            ks_half = (_ks_halfwidth(profile.base_rows[rows], base_fpc, alpha)
+                       + _ks_halfwidth(acc.n_rows, curr_fpc, alpha))
+
+        for j, col in enumerate(numeric_cols):
+            ks_stat, ks_p = np.nan, np.nan
+            if profile.sorted_values is not None and acc.n_rows[j] > 0:
+                with timer.stage("ks", col):
+                    values = current[col].to_numpy(dtype=float)
+                    ks_stat, ks_p = ks_2samp(profile.sorted_values[rows[j]], values[~np.isnan(values)])
+            records.append({
+                "feature": col,
+                "psi": psi[j],
+                "psi_ci_low": max(psi[j] - z * psi_std[j], 0.0),
+                "psi_ci_high": psi[j] + z * psi_std[j],
+                "kl_divergence": kl[j],
+                "ks_stat": ks_stat,
+                "ks_ci_low": max(ks_stat - ks_half[j], 0.0),
+                "ks_ci_high": min(ks_stat + ks_half[j], 1.0),
+                "ks_p_value": ks_p,
+            })
+
+    if categorical_cols:
+        # imported here: drift_categorical is only needed for categorical features
+        from drift_categorical import CategoricalProfile, categorical_metrics
+
+        cat_profile = CategoricalProfile.fit(base, categorical_cols, top_k=top_k)
+        for col in categorical_cols:
+            with timer.stage("categorical", col):
+                base_counts = cat_profile.counts[cat_profile._index[col]]
+                curr_counts = cat_profile.current_counts(col, current[col])
+                psi, js, chi2_stat, chi2_p = categorical_metrics(base_counts, curr_counts)
+                std = _psi_std(base_counts[None], curr_counts[None], base_fpc, curr_fpc)[0]
+            records.append({
+                "feature": col,
+                "psi": psi,
+                "psi_ci_low": max(psi - z * std, 0.0),
+                "psi_ci_high": psi + z * std,
+                "js_divergence": js,
+                "chi2_stat": chi2_stat,
+                "chi2_p_value": chi2_p,
+            })
+
+    results = pd.DataFrame(records)
+    results["sample_rows_reference"] = (
+        int(profile.base_rows.max()) if isinstance(base, ReferenceProfile) else len(base)
+    )
+    results["sample_rows_current"] = len(current)
+    return results
+
+
+def analyze_drift_sampled(df_base, df_curr, numeric_cols=None, sample="auto", sample_by=None,
+                          time_budget=None, alpha=0.05, buckets=10, bins=50, categorical_cols=None,
+                          top_k=None, stable=0.1, moderate=0.25, seed=0, timer=None):
+    """Drift metrics on samples of the inputs, with sampling confidence intervals.
+
+    ``df_base`` / ``df_curr`` may be DataFrames, paths or file objects (read in
+    chunks), or iterables of DataFrame chunks; ``df_base`` may also be a fitted
+    ReferenceProfile, which is used as is. ``sample`` is the number of rows per
+    side or "auto". ``sample_by`` names a segment column for stratified
+    sampling. ``severity_decided`` is True when the PSI interval lies within
+    one severity band. With "auto", ``time_budget`` includes reading the
+    inputs (see the module docstring).
+    """
+    timer = timer or _NO_TIMER
+    if isinstance(df_base, ReferenceProfile) and categorical_cols:
+        raise ValueError("a ReferenceProfile only covers numeric features; pass the reference data "
+                         "for categorical_cols")
+    if sample != "auto" and (not isinstance(sample, (int, np.integer)) or sample < 1):
+        raise ValueError("sample must be a positive number of rows or 'auto'")
+    capacity = AUTO_MAX_ROWS if sample == "auto" else int(sample)
+
+    columns = None
+    if numeric_cols is not None:
+        columns = list(numeric_cols) + list(categorical_cols or [])
+        if sample_by is not None and sample_by not in columns:
+            columns.append(sample_by)
+
+    def population(data, size, deadline):
+        if isinstance(data, pd.DataFrame):
+            # in memory: key every row, the "sample" is a view until subsampled
+            size = len(data) if sample == "auto" else size
+        return sample_source(data, max(size, 1), by=sample_by, columns=columns, seed=seed, deadline=deadline)
+
+    # the budget covers reading the inputs too
+    started = time.perf_counter()
+    base_deadline = curr_deadline = None
+    if sample == "auto" and time_budget is not None:
+        curr_deadline = started + READ_BUDGET_SHARE * time_budget
+        base_deadline = started + READ_BUDGET_SHARE * time_budget / 2
+    with timer.stage("sampling"):
+        if isinstance(df_base, ReferenceProfile):
+            base_sampler = None
+        else:
+            base_sampler = population(df_base, capacity, base_deadline)
+        curr_sampler = population(df_curr, capacity, curr_deadline)
+
+    if numeric_cols is None:
+        if isinstance(df_base, ReferenceProfile):
+            numeric_cols = df_base.features
+        else:
+            numeric_cols = _numeric_columns(base_sampler.sample(1))
+        numeric_cols = [c for c in numeric_cols if c != sample_by]
+    numeric_cols = list(numeric_cols)
+    categorical_cols = list(categorical_cols or [])
+
+    available = max(len(curr_sampler), len(base_sampler) if base_sampler is not None else 0)
+    n = min(AUTO_START_ROWS, available) if sample == "auto" else capacity
+    spent = time.perf_counter() - started
+    while True:
+        start = time.perf_counter()
+        if base_sampler is None:
+            base, n_base_pop = df_base, None
+        else:
+            base, n_base_pop = base_sampler.sample(n), base_sampler.n_seen
+        results = _evaluate(
+            base, n_base_pop, curr_sampler.sample(n), curr_sampler.n_seen, numeric_cols,
+            categorical_cols, buckets, bins, alpha, top_k, timer,
+        )
+        low = [_severity(p, stable, moderate) for p in results["psi_ci_low"]]
+        high = [_severity(p, stable, moderate) for p in results["psi_ci_high"]]
+        results["severity"] = [_severity(p, stable, moderate) for p in results["psi"]]
+        results["severity_decided"] = [a == b for a, b in zip(low, high)]
+
+        step = time.perf_counter() - start
+        spent += step
+        if sample != "auto" or n >= available or results["severity_decided"].all():
+            break
+        # each doubling costs about twice the last step
+        if time_budget is not None and spent + 2 * step > time_budget:
+            break
+        n = min(2 * n, available)
+
+    if base_sampler is None:
+        results["rows_read_reference"] = int(df_base.base_rows.max())
+    else:
+        results["rows_read_reference"] = base_sampler.n_seen
+    results["rows_read_current"] = curr_sampler.n_seen
+    results["read_complete"] = curr_sampler.complete and (base_sampler is None or base_sampler.complete)
+    return results
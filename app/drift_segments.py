@@ -0,0 +1,188 @@
+"""Drift per segment (country, device, tier, ...) in one pass over the data.
+
+Every row is binned once against the reference breakpoints / KL edges, as in
+the batched engine. The bin ids are then offset by segment and feature,
+``(segment * features + feature) * (bins + 1) + bin``, and one
+``np.bincount`` over the whole matrix yields the (segment, feature, bin)
+counts of every segment at once. PSI / KL for all segments come from those
+counts in one vectorized step, so the cost is one binning pass plus one
+bincount whatever the number of segments.
+
+Bins are the whole reference's: each segment's PSI is a PSI over the same
+ten reference deciles. When the reference also has the segment column, each
+current segment is compared with the same segment of the reference;
+otherwise (or with ``segment_reference=False``, or a ReferenceProfile) with
+the whole reference. A current segment the reference lacks (fewer than
+``min_rows`` non-null rows there: a new country, a new device) is compared
+with the whole reference too and flagged ``new_segment``. Segments with fewer
+than ``min_rows`` non-null current rows are dropped.
+"""
+import numpy as np
+import pandas as pd
+
+from drift_core.metrics import (
+    _NO_TIMER,
+    _bin_columns_sorted_edges,
+    _bin_columns_uniform,
+    _js_from_count_matrix,
+    _kl_from_count_matrix,
+    _psi_from_count_matrix,
+    _severity,
+)
+from drift_utils import ReferenceProfile, _column_matrix, _numeric_columns
+
+
+def _segment_codes(data, segment_by, segments):
+    # code of each row's segment in ``segments`` (-1 for missing / unseen keys)
+    keys = data[segment_by]
+    if len(segment_by) == 1:
+        return segments.get_indexer(keys[segment_by[0]])
+    return segments.get_indexer(pd.MultiIndex.from_frame(keys))
+
+
+def _segment_index(df_curr, segment_by):
+    # the distinct current segments, in sorted order
+    keys = df_curr[segment_by].dropna().drop_duplicates()
+    if len(segment_by) == 1:
+        return pd.Index(keys[segment_by[0]]).sort_values()
+    return pd.MultiIndex.from_frame(keys).sort_values()
+
+
+def _segment_counts(idx, codes, n_segments, n_bins):
+    # (segments, features, bins) counts from (rows, features) bin ids with one bincount;
+    # rows with code -1 and bin id n_bins (NaN / out of range) land in dropped slots
+    n_rows, n_feat = idx.shape
+    keep = codes >= 0
+    idx, codes = idx[keep], codes[keep]
+    flat = (codes[:, None] * n_feat + np.arange(n_feat)) * (n_bins + 1) + idx
+    counts = np.bincount(flat.ravel(), minlength=n_segments * n_feat * (n_bins + 1))
+    return counts.reshape(n_segments, n_feat, n_bins + 1)[..., :n_bins]
+
+
+def _numeric_segment_counts(profile, rows, data, cols, codes, n_segments):
+    values = _column_matrix(data, cols)
+    nan_mask = np.isnan(values)
+    psi_idx = _bin_columns_sorted_edges(values, profile.breakpoints[rows].T, nan_mask)
+    kl_idx = _bin_columns_uniform(values, profile.kl_edges[rows].T, nan_mask)
+    psi = _segment_counts(psi_idx, codes, n_segments, profile.psi_counts.shape[1])
+    kl = _segment_counts(kl_idx, codes, n_segments, profile.kl_counts.shape[1])
+    return psi, kl
+
+
+def _categorical_segment_counts(cat_profile, col, data, codes, n_segments):
+    # imported here: drift_categorical is only needed for categorical features
+    from drift_categorical import _codes
+
+    i = cat_profile._index[col]
+    n_buckets = len(cat_profile.vocabularies[i]) + 1
+    value_codes, categories = _codes(data[col])
+    buckets = np.where(value_codes >= 0, cat_profile._mapping(i, categories, cache=False)[value_codes], n_buckets)
+    return _segment_counts(buckets[:, None], codes, n_segments, n_buckets)[:, 0]
+
+
+def analyze_segmented_drift(df_base, df_curr, segment_by, numeric_cols=None, categorical_cols=None,
+                            buckets=10, bins=50, min_rows=100, segment_reference=None, top_k=None,
+                            timer=None):
+    """PSI / KL (numeric) and PSI / JS divergence (categorical) per segment and feature.
+
+    ``segment_by`` is a column or list of columns (segments are their value
+    combinations). ``df_base`` may be a fitted ReferenceProfile. Returns a tidy
+    frame with the segment column(s), feature, row counts of both sides,
+    the metrics, severity and ``new_segment``.
+    """
+    timer = timer or _NO_TIMER
+    segment_by = [segment_by] if isinstance(segment_by, str) else list(segment_by)
+    is_profile = isinstance(df_base, ReferenceProfile)
+    if is_profile and categorical_cols:
+        raise ValueError("a ReferenceProfile only covers numeric features; pass the reference frame "
+                         "for categorical_cols")
+    if segment_reference is None:
+        segment_reference = not is_profile and all(c in df_base.columns for c in segment_by)
+    elif segment_reference and is_profile:
+        raise ValueError("segment_reference needs the reference frame, not a ReferenceProfile")
+
+    if numeric_cols is None:
+        numeric_cols = df_base.features if is_profile else _numeric_columns(df_base)
+    numeric_cols = [c for c in numeric_cols if c not in segment_by]
+    categorical_cols = [c for c in (categorical_cols or []) if c not in segment_by]
+
+    with timer.stage("segment_codes"):
+        segments = _segment_index(df_curr, segment_by)
+        curr_codes = _segment_codes(df_curr, segment_by, segments)
+        base_codes = _segment_codes(df_base, segment_by, segments) if segment_reference else None
+    n_seg = len(segments)
+    min_rows = max(min_rows, 1)
+
+    records = []
+    if numeric_cols:
+        with timer.stage("segment_profile"):
+            profile = df_base if is_profile else ReferenceProfile.fit(df_base, numeric_cols, buckets, bins)
+            rows = [profile._index[c] for c in numeric_cols]
+        with timer.stage("segment_binning"):
+            psi_curr, kl_curr = _numeric_segment_counts(profile, rows, df_curr, numeric_cols, curr_codes, n_seg)
+            if segment_reference:
+                psi_base, kl_base = _numeric_segment_counts(
+                    profile, rows, df_base, numeric_cols, base_codes, n_seg
+                )
+                # segments missing from the reference: against the whole reference
+                new = psi_base.sum(axis=2) < min_rows
+                psi_base = np.where(new[..., None], profile.psi_counts[rows], psi_base)
+                kl_base = np.where(new[..., None], profile.kl_counts[rows], kl_base)
+            else:
+                new = np.zeros(psi_curr.shape[:2], dtype=bool)
+                psi_base = np.broadcast_to(profile.psi_counts[rows], psi_curr.shape)
+                kl_base = np.broadcast_to(profile.kl_counts[rows], kl_curr.shape)
+        with timer.stage("segment_metrics"):
+            n_psi, n_kl = psi_curr.shape[2], kl_curr.shape[2]
+            n_base = psi_base.sum(axis=2).ravel()
+            n_curr = psi_curr.sum(axis=2).ravel()
+            psi = _psi_from_count_matrix(psi_base.reshape(-1, n_psi), n_base, psi_curr.reshape(-1, n_psi), n_curr)
+            # KL edges repeat per segment: rows are segment-major, feature-minor
+            edges = np.tile(profile.kl_edges[rows].T, (1, n_seg))
+            kl = _kl_from_count_matrix(kl_base.reshape(-1, n_kl), kl_curr.reshape(-1, n_kl), edges)
+        for k in range(n_seg * len(numeric_cols)):
+            s, j = divmod(k, len(numeric_cols))
+            records.append((s, numeric_cols[j], n_base[k], n_curr[k], psi[k], kl[k], np.nan, new[s, j]))
+
+    if categorical_cols:
+        # imported here: drift_categorical builds on drift_utils
+        from drift_categorical import CategoricalProfile
+
+        with timer.stage("segment_categorical"):
+            cat_profile = CategoricalProfile.fit(df_base, categorical_cols, top_k=top_k)
+            for col in categorical_cols:
+                curr = _categorical_segment_counts(cat_profile, col, df_curr, curr_codes, n_seg)
+                whole = cat_profile.counts[cat_profile._index[col]]
+                if segment_reference:
+                    base = _categorical_segment_counts(cat_profile, col, df_base, base_codes, n_seg)
+                    new = base.sum(axis=1) < min_rows
+                    base = np.where(new[:, None], whole, base)
+                else:
+                    new = np.zeros(n_seg, dtype=bool)
+                    base = np.broadcast_to(whole, curr.shape)
+                n_base, n_curr = base.sum(axis=1), curr.sum(axis=1)
+                psi = _psi_from_count_matrix(base, n_base, curr, n_curr)
+                js = _js_from_count_matrix(base, curr)
+                for s in range(n_seg):
+                    records.append((s, col, n_base[s], n_curr[s], psi[s], np.nan, js[s], new[s]))
+
+    results = pd.DataFrame(records, columns=[
+        "segment", "feature", "rows_reference", "rows_current", "psi", "kl_divergence", "js_divergence",
+        "new_segment",
+    ])
+    supported = (results["rows_current"] >= min_rows) & (results["rows_reference"] >= min_rows)
+    results = results[supported].reset_index(drop=True)
+    if not categorical_cols:
+        results = results.drop(columns="js_divergence")
+    if not numeric_cols:
+        results = results.drop(columns="kl_divergence")
+    results["severity"] = [_severity(p) for p in results["psi"]]
+    results["new_segment"] = results.pop("new_segment").astype(bool)
+
+    # segment codes -> the segment column value(s)
+    keys = segments[results.pop("segment").to_numpy()]
+    if len(segment_by) == 1:
+        key_frame = pd.DataFrame({segment_by[0]: np.asarray(keys)})
+    else:
+        key_frame = keys.to_frame(index=False, name=segment_by)
+    return pd.concat([key_frame, results], axis=1)
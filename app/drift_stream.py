@@ -0,0 +1,126 @@
+import numpy as np
+
+from drift_utils import (
+    ReferenceProfile,
+    _bin_columns_sorted_edges,
+    _bin_columns_uniform,
+    _bincount_columns,
+    _histogram_density,
+    _is_frame,
+    _kl_from_density,
+    _psi_from_counts,
+    _severity,
+)
+
+
+class DriftAccumulator:
+    """Online PSI / KL against a fitted ReferenceProfile.
+
+    Only per-feature bin counts are kept (O(features x bins) memory), so events
+    and micro-batches can be folded in as they arrive and the current drift read
+    at any time. Accumulators built on the same profile can be merged, e.g. one
+    per worker process.
+    """
+
+    def __init__(self, profile, features=None):
+        if not isinstance(profile, ReferenceProfile):
+            raise TypeError("DriftAccumulator needs a fitted ReferenceProfile")
+        self.profile = profile
+        self.features = list(features) if features is not None else list(profile.features)
+        missing = [f for f in self.features if f not in profile]
+        if missing:
+            raise KeyError(f"features not in reference profile: {missing}")
+
+        rows = [profile._index[f] for f in self.features]
+        # edges are stored (feature, edge); the column kernels want (edge, feature)
+        self._breakpoints = profile.breakpoints[rows].T
+        self._kl_edges = profile.kl_edges[rows].T
+        self._base_psi = profile.psi_counts[rows]
+        self._base_kl = profile.kl_counts[rows]
+        self._n_base = profile.base_rows[rows]
+
+        n_feat = len(self.features)
+        self.psi_counts = np.zeros((n_feat, self._base_psi.shape[1]), dtype=np.int64)
+        self.kl_counts = np.zeros((n_feat, self._base_kl.shape[1]), dtype=np.int64)
+        self.n_rows = np.zeros(n_feat, dtype=np.int64)
+
+    def _as_array(self, batch):
+        # one event (mapping), a list of events, a DataFrame or a 2D array in feature order
+        if isinstance(batch, dict):
+            batch = [batch]
+        if _is_frame(batch):
+            return batch.reindex(columns=self.features).to_numpy(dtype=float)
+        if isinstance(batch, (list, tuple)) and batch and isinstance(batch[0], dict):
+            return np.array(
+                [[event.get(f, np.nan) for f in self.features] for event in batch],
+                dtype=float,
+            ).reshape(len(batch), len(self.features))
+        values = np.asarray(batch, dtype=float)
+        if values.ndim == 1:
+            values = values.reshape(1, -1)
+        if values.shape[1] != len(self.features):
+            raise ValueError(f"expected {len(self.features)} columns, got {values.shape[1]}")
+        return values
+
+    def update(self, batch):
+        values = self._as_array(batch)
+        if len(values) == 0:
+            return self
+        nan_mask = np.isnan(values)
+        n_psi = self.psi_counts.shape[1]
+        n_kl = self.kl_counts.shape[1]
+        self.psi_counts += _bincount_columns(
+            _bin_columns_sorted_edges(values, self._breakpoints, nan_mask), n_psi
+        )
+        self.kl_counts += _bincount_columns(
+            _bin_columns_uniform(values, self._kl_edges, nan_mask), n_kl
+        )
+        self.n_rows += (~nan_mask).sum(axis=0)
+        return self
+
+    def merge(self, other):
+        if self.features != other.features or not (
+            np.array_equal(self._breakpoints, other._breakpoints)
+            and np.array_equal(self._kl_edges, other._kl_edges)
+        ):
+            raise ValueError("can only merge accumulators built on the same reference profile")
+        self.psi_counts += other.psi_counts
+        self.kl_counts += other.kl_counts
+        self.n_rows += other.n_rows
+        return self
+
+    def reset(self):
+        self.psi_counts[:] = 0
+        self.kl_counts[:] = 0
+        self.n_rows[:] = 0
+
+    def psi(self):
+        return np.array([
+            _psi_from_counts(self._base_psi[i], self._n_base[i], self.psi_counts[i], self.n_rows[i])
+            for i in range(len(self.features))
+        ])
+
+    def kl(self):
+        edges = self._kl_edges.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.array([
+                _kl_from_density(
+                    _histogram_density(self._base_kl[i], edges[i]),
+                    _histogram_density(self.kl_counts[i], edges[i]),
+                )
+                for i in range(len(self.features))
+            ])
+
+    def results(self):
+        # same layout as analyze_drift, without the KS columns (they need raw samples)
+        import pandas as pd
+
+        psi = self.psi()
+        kl = self.kl()
+        return pd.DataFrame({
+            "feature": self.features,
+            "psi": psi,
+            "kl_divergence": kl,
+            "n_rows": self.n_rows,
+            "severity": [_severity(p) for p in psi],
+        })
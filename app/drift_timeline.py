@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+from drift_utils import (
+    ReferenceProfile,
+    _bin_columns_sorted_edges,
+    _bin_columns_uniform,
+    _bincount_columns,
+    _kl_from_count_matrix,
+    _psi_from_count_matrix,
+    _severity,
+)
+
+
+def _window_bounds(ts, window, stride):
+    # [start, start + window) windows every `stride`, covering all timestamps;
+    # the first start is floored to the stride so windows land on round times
+    t0 = pd.Timestamp(ts[0]).floor(pd.Timedelta(stride)).to_datetime64()
+    t_last = ts[-1]
+    n_windows = int((t_last - t0) // stride) + 1
+    starts = t0 + np.arange(n_windows) * stride
+    lo = np.searchsorted(ts, starts, side="left")
+    hi = np.searchsorted(ts, starts + window, side="left")
+    return starts, lo, hi
+
+
+def drift_timeline(df_base, df_curr, timestamp_col, window="1h", stride=None, numeric_cols=None,
+                   buckets=10, bins=50, ks=True, with_counts=False):
+    """PSI / KL / KS per feature for sliding time windows over ``df_curr``.
+
+    Every current row is binned once against the reference profile. Window
+    counts are then updated incrementally: rows entering the window are added
+    and rows leaving it are subtracted, so each step only costs the rows that
+    moved. ``stride`` defaults to ``window`` (tumbling windows). ``df_base`` may
+    be a fitted ReferenceProfile. KS still needs each window's raw values, so
+    pass ``ks=False`` to skip it on long timelines.
+
+    Returns a tidy frame with one row per (window, feature); with
+    ``with_counts=True``, ``(timeline, counts)`` where ``counts`` maps each
+    window_start to that window's PSI / KL bin counts in the form
+    ``DriftHistory.record`` stores (see drift_history.drift_counts).
+    """
+    if ks:
+        # imported here: scipy is only needed for the KS columns
+        from scipy.stats import ks_2samp
+    window = pd.Timedelta(window)
+    stride = pd.Timedelta(stride) if stride is not None else window
+    if window <= pd.Timedelta(0) or stride <= pd.Timedelta(0):
+        raise ValueError("window and stride must be positive")
+
+    if isinstance(df_base, ReferenceProfile):
+        profile = df_base
+        if numeric_cols is None:
+            numeric_cols = [c for c in profile.features if c in df_curr.columns]
+    else:
+        if numeric_cols is None:
+            numeric_cols = [
+                c for c in df_base.select_dtypes(include=[np.number]).columns if c != timestamp_col
+            ]
+        profile = ReferenceProfile.fit(df_base, numeric_cols, buckets=buckets, bins=bins)
+    numeric_cols = list(numeric_cols)
+    rows = [profile._index[c] for c in numeric_cols]
+    breakpoints = profile.breakpoints[rows].T
+    kl_edges = profile.kl_edges[rows].T
+    base_psi = profile.psi_counts[rows]
+    base_kl = profile.kl_counts[rows]
+    n_base = profile.base_rows[rows]
+    n_psi = base_psi.shape[1]
+    n_kl = base_kl.shape[1]
+
+    ts = pd.to_datetime(df_curr[timestamp_col])
+    valid = ts.notna().to_numpy()
+    order = np.argsort(ts.to_numpy()[valid], kind="stable")
+    ts = ts.to_numpy()[valid][order]
+    values = df_curr.loc[valid, numeric_cols].to_numpy(dtype=float)[order]
+    if len(ts) == 0:
+        empty = pd.DataFrame(columns=[
+            "window_start", "window_end", "feature", "n_rows", "psi", "kl_divergence",
+            "ks_stat", "ks_p_value", "severity",
+        ])
+        return (empty, {}) if with_counts else empty
+
+    # bin every row once; windows only move counts around
+    nan_mask = np.isnan(values)
+    psi_idx = _bin_columns_sorted_edges(values, breakpoints, nan_mask)
+    kl_idx = _bin_columns_uniform(values, kl_edges, nan_mask)
+    present = (~nan_mask).astype(np.int64)
+
+    window_np = np.timedelta64(window.value, "ns")
+    stride_np = np.timedelta64(stride.value, "ns")
+    starts, lo, hi = _window_bounds(ts, window_np, stride_np)
+
+    psi_counts = np.zeros_like(base_psi, dtype=np.int64)
+    kl_counts = np.zeros_like(base_kl, dtype=np.int64)
+    n_curr = np.zeros(len(numeric_cols), dtype=np.int64)
+
+    def add(a, b, sign):
+        if b <= a:
+            return
+        psi_counts[...] += sign * _bincount_columns(psi_idx[a:b], n_psi)
+        kl_counts[...] += sign * _bincount_columns(kl_idx[a:b], n_kl)
+        n_curr[...] += sign * present[a:b].sum(axis=0)
+
+    records = []
+    window_counts = {}
+    cur_lo = cur_hi = 0
+    for w in range(len(starts)):
+        new_lo, new_hi = lo[w], hi[w]
+        if new_lo >= cur_hi:
+            # no overlap with the previous window (stride >= window): start fresh
+            psi_counts[...] = 0
+            kl_counts[...] = 0
+            n_curr[...] = 0
+            add(new_lo, new_hi, 1)
+        else:
+            add(cur_lo, new_lo, -1)
+            add(cur_hi, new_hi, 1)
+        cur_lo, cur_hi = new_lo, new_hi
+
+        psi = _psi_from_count_matrix(base_psi, n_base, psi_counts, n_curr)
+        kl = _kl_from_count_matrix(base_kl, kl_counts, kl_edges)
+        start = pd.Timestamp(starts[w])
+        if with_counts:
+            window_counts[start] = {
+                "psi_base": base_psi,
+                "psi_current": psi_counts.copy(),
+                "kl_base": base_kl,
+                "kl_current": kl_counts.copy(),
+                "kl_edges": kl_edges,
+                "features": numeric_cols,
+            }
+        for j, col in enumerate(numeric_cols):
+            ks_stat, ks_p = np.nan, np.nan
+            if ks and n_curr[j] > 0 and profile.sorted_values is not None:
+                window_vals = values[new_lo:new_hi, j]
+                window_vals = window_vals[~nan_mask[new_lo:new_hi, j]]
+                ks_stat, ks_p = ks_2samp(profile.sorted_values[rows[j]], window_vals)
+            records.append({
+                "window_start": start,
+                "window_end": start + window,
+                "feature": col,
+                "n_rows": int(n_curr[j]),
+                "psi": psi[j] if n_curr[j] > 0 else np.nan,
+                "kl_divergence": kl[j] if n_curr[j] > 0 else np.nan,
+                "ks_stat": ks_stat,
+                "ks_p_value": ks_p,
+                "severity": _severity(psi[j]) if n_curr[j] > 0 else None,
+            })
+
+    timeline = pd.DataFrame(records)
+    return (timeline, window_counts) if with_counts else timeline
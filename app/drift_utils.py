@@ -1,66 +1,722 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import partial
+
 import numpy as np
-import pandas as pd
-from scipy.stats import ks_2samp
-
-def calculate_psi(base, current, buckets=10):
-    base = pd.Series(base).dropna()
-    current = pd.Series(current).dropna()
-    
-    # create bins on base
-    quantiles = np.linspace(0, 1, buckets+1)
-    breakpoints = base.quantile(quantiles).values
-    breakpoints[0] = -np.inf
-    breakpoints[-1] = np.inf
-
-    base_counts, _ = np.histogram(base, bins=breakpoints)
-    curr_counts, _ = np.histogram(current, bins=breakpoints)
-
-    base_perc = base_counts / len(base)
-    curr_perc = curr_counts / len(current)
-
-    # avoid zero
-    base_perc = np.where(base_perc == 0, 1e-6, base_perc)
-    curr_perc = np.where(curr_perc == 0, 1e-6, curr_perc)
-
-    psi = np.sum((base_perc - curr_perc) * np.log(base_perc / curr_perc))
-    return psi
-
-def calculate_kl(base, current, bins=50):
-    base = pd.Series(base).dropna()
-    current = pd.Series(current).dropna()
-
-    # same bins for both
-    counts_base, bin_edges = np.histogram(base, bins=bins, density=True)
-    counts_curr, _ = np.histogram(current, bins=bin_edges, density=True)
-
-    counts_base = np.where(counts_base == 0, 1e-6, counts_base)
-    counts_curr = np.where(counts_curr == 0, 1e-6, counts_curr)
-
-    kl = np.sum(counts_base * np.log(counts_base / counts_curr))
-    return kl
-
-def calculate_ks(base, current):
-    base = pd.Series(base).dropna()
-    current = pd.Series(current).dropna()
-    stat, p_value = ks_2samp(base, current)
+
+# the NumPy kernels live in drift_core.metrics; pandas and scipy.stats are imported
+# inside the functions that need them, so importing this module costs NumPy only
+from drift_core.metrics import (  # noqa: F401  (re-exported for the modules built on this one)
+    KS_EXACT_MAX_N,
+    _NO_TIMER,
+    _bin_columns_sorted_edges,
+    _bin_columns_uniform,
+    _bincount_columns,
+    _drift_columns,
+    _histogram_density,
+    _js_from_count_matrix,
+    _kl_from_count_matrix,
+    _kl_from_density,
+    _merged_ecdf_gaps,
+    _overflow_counts,
+    _psi_breakpoints,
+    _psi_from_count_matrix,
+    _psi_from_counts,
+    _severity,
+    _sorted_quantiles,
+    finite_values,
+    float32_safe,
+)
+from drift_core.metrics import js as calculate_js
+from drift_core.metrics import kl as calculate_kl
+from drift_core.metrics import ks as _ks_numpy
+from drift_core.metrics import psi as calculate_psi
+from drift_core.metrics import wasserstein as calculate_wasserstein
+
+def calculate_ks(base, current, ks_method="scipy"):
+    # ks_method="numpy": asymptotic p-value (drift_core.metrics.ks), scipy is not imported
+    if ks_method == "numpy":
+        return _ks_numpy(base, current)
+    from scipy.stats import ks_2samp
+
+    stat, p_value = ks_2samp(finite_values(base), finite_values(current))
     return stat, p_value
 
-def analyze_drift(df_base, df_curr, numeric_cols=None):
+
+def _is_frame(data):
+    # a DataFrame can only exist once pandas has been imported, so this never imports it
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(data, pd.DataFrame)
+
+def _numeric_columns(data):
+    # numeric columns of a DataFrame or of a {name: array} mapping (see drift_io.read_columns)
+    if _is_frame(data):
+        return data.select_dtypes(include=[np.number]).columns
+    return [name for name, values in data.items() if np.asarray(values).dtype.kind in "iuf"]
+
+def _column_values(data, col):
+    # one column as a 1D float array, nulls as NaN; float32 stays float32, float64 is not copied
+    values = data[col]
+    dtype = np.float32 if values.dtype == np.float32 else float
+    if _is_frame(data):
+        return values.to_numpy(dtype=dtype, na_value=np.nan)
+    return np.asarray(values, dtype=dtype)
+
+def downcast_float32(df, columns=None):
+    """``df`` with its float64 columns that float32_safe accepts stored as float32.
+
+    Halves the memory of those columns (pd.read_csv parses every float as
+    float64); other columns are shared with ``df``, not copied.
+    """
+    if columns is None:
+        columns = [c for c in df.columns if df[c].dtype == np.float64]
+    narrow = [c for c in columns if df[c].dtype == np.float64 and float32_safe(df[c].to_numpy())]
+    return df.astype(dict.fromkeys(narrow, np.float32)) if narrow else df
+
+def _column_matrix(data, cols, dtype=float):
+    # selected columns as one 2D float array. A float32 matrix is always a new,
+    # writeable array (filled column by column, Fortran order), so it can be sorted in place
+    if dtype == np.float32:
+        out = np.empty((len(cols), _n_rows(data) or 0), dtype=np.float32)
+        for j, col in enumerate(cols):
+            out[j] = _column_values(data, col)
+        return out.T
+    if _is_frame(data):
+        return data[cols].to_numpy(dtype=float)
+    return np.column_stack([np.asarray(data[c], dtype=float) for c in cols]) if cols else np.empty((0, 0))
+
+def _missing_rate(n_rows, n_values):
+    # share of a column's rows that were NaN / null
+    return (n_rows - n_values) / n_rows if n_rows else np.nan
+
+
+class ReferenceProfile:
+    """Reference-side drift summaries, fitted once and reused for every current window.
+
+    Holds, per feature, the PSI breakpoints and counts, the KL bin edges and
+    counts and the sorted non-null reference values, so scoring a window only
+    has to bin and sort the current data.
+    """
+
+    def __init__(self, features, breakpoints, psi_counts, kl_edges, kl_counts, sorted_values=None, n_rows=None,
+                 n_missing=None):
+        self.features = list(features)
+        self.breakpoints = np.asarray(breakpoints, dtype=float)
+        self.psi_counts = np.asarray(psi_counts)
+        self.kl_edges = np.asarray(kl_edges, dtype=float)
+        self.kl_counts = np.asarray(kl_counts)
+        # profiles built out-of-core keep only counts, not the reference samples
+        if sorted_values is not None:
+            self.sorted_values = [np.asarray(v, dtype=float) for v in sorted_values]
+            self.base_rows = np.array([len(v) for v in self.sorted_values], dtype=np.int64)
+        else:
+            self.sorted_values = None
+            self.base_rows = np.asarray(n_rows, dtype=np.int64)
+        # NaN / null reference rows per feature; unknown (None) for profiles saved before it was kept
+        self.n_missing = None if n_missing is None else np.asarray(n_missing, dtype=np.int64)
+        self._index = {name: i for i, name in enumerate(self.features)}
+
+    @classmethod
+    def fit(cls, df_base, numeric_cols=None, buckets=10, bins=50):
+        if numeric_cols is None:
+            numeric_cols = _numeric_columns(df_base)
+
+        breakpoints, psi_counts, kl_edges, kl_counts, sorted_values, n_missing = [], [], [], [], [], []
+        for col in numeric_cols:
+            base = finite_values(df_base[col])
+            n_missing.append(len(df_base[col]) - len(base))
+
+            bp = _psi_breakpoints(base, buckets)
+            counts, _ = np.histogram(base, bins=bp)
+            breakpoints.append(bp)
+            psi_counts.append(counts)
+
+            counts, edges = np.histogram(base, bins=bins)
+            kl_edges.append(edges)
+            kl_counts.append(counts)
+
+            sorted_values.append(np.sort(base))
+
+        return cls(list(numeric_cols), breakpoints, psi_counts, kl_edges, kl_counts, sorted_values,
+                   n_missing=n_missing)
+
+    def __contains__(self, col):
+        return col in self._index
+
+    def n_rows(self, col):
+        return int(self.base_rows[self._index[col]])
+
+    def missing_rate(self, col):
+        if self.n_missing is None:
+            return np.nan
+        i = self._index[col]
+        return _missing_rate(self.base_rows[i] + self.n_missing[i], self.base_rows[i])
+
+    def psi(self, col, current):
+        i = self._index[col]
+        current = finite_values(current)
+        curr_counts, _ = np.histogram(current, bins=self.breakpoints[i])
+        return _psi_from_counts(self.psi_counts[i], self.base_rows[i], curr_counts, len(current))
+
+    def kl(self, col, current):
+        i = self._index[col]
+        current = finite_values(current)
+        counts_base = _histogram_density(self.kl_counts[i], self.kl_edges[i])
+        counts_curr, _ = np.histogram(current, bins=self.kl_edges[i], density=True)
+        return _kl_from_density(counts_base, counts_curr)
+
+    def js(self, col, current):
+        i = self._index[col]
+        current = finite_values(current)
+        edges = self.kl_edges[i]
+        base_counts = np.concatenate([[0], self.kl_counts[i], [0]])
+        return _js_from_count_matrix(base_counts[None], _overflow_counts(current, edges)[None])[0]
+
+    def wasserstein(self, col, current):
+        if self.sorted_values is None:
+            raise ValueError("this profile has no reference samples; Wasserstein distance is unavailable")
+        return calculate_wasserstein(self.sorted_values[self._index[col]], current)
+
+    def ks(self, col, current, ks_method="scipy"):
+        if self.sorted_values is None:
+            raise ValueError("this profile has no reference samples; exact KS is unavailable")
+        return calculate_ks(self.sorted_values[self._index[col]], current, ks_method)
+
+    def save(self, path):
+        arrays = dict(
+            features=np.array(self.features, dtype=str),
+            breakpoints=self.breakpoints,
+            psi_counts=self.psi_counts,
+            kl_edges=self.kl_edges,
+            kl_counts=self.kl_counts,
+            n_rows=self.base_rows,
+        )
+        if self.n_missing is not None:
+            arrays.update(n_missing=self.n_missing)
+        if self.sorted_values is not None:
+            # ragged sorted values are stored flat with offsets
+            offsets = np.concatenate([[0], np.cumsum(self.base_rows)])
+            flat = np.concatenate(self.sorted_values) if self.sorted_values else np.empty(0)
+            arrays.update(sorted_values=flat, offsets=offsets)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            sorted_values = None
+            if "offsets" in data:
+                offsets = data["offsets"]
+                flat = data["sorted_values"]
+                sorted_values = [flat[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+            return cls(
+                data["features"].tolist(),
+                data["breakpoints"],
+                data["psi_counts"],
+                data["kl_edges"],
+                data["kl_counts"],
+                sorted_values,
+                n_rows=data["n_rows"] if "n_rows" in data else None,
+                n_missing=data["n_missing"] if "n_missing" in data else None,
+            )
+
+
+class DriftTimer:
+    """Stage timings collected during one instrumented analyze_drift call.
+
+    ``timings`` is a list of ``{"stage", "feature", "seconds"}`` records;
+    ``feature`` is None for stages that run over all columns at once.
+    """
+
+    def __init__(self):
+        self.timings = []
+
+    @contextmanager
+    def stage(self, name, feature=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append({"stage": name, "feature": feature, "seconds": time.perf_counter() - start})
+
+    def totals(self):
+        totals = {}
+        for t in self.timings:
+            totals[t["stage"]] = totals.get(t["stage"], 0.0) + t["seconds"]
+        return totals
+
+
+def json_log(path):
+    """on_stats callback that appends every run's stats to ``path`` as one JSON line."""
+    def write(stats):
+        with open(path, "a") as fh:
+            fh.write(json.dumps(stats, default=str) + "\n")
+    return write
+
+
+def batch_drift_metrics(base, current, buckets=10, bins=50, timer=None):
+    """PSI and KL for every column of two 2D float arrays at once.
+
+    Columns are features, NaNs are ignored per column. Matches calling
+    calculate_psi / calculate_kl on each column. ``timer`` (a DriftTimer)
+    records how long each stage took.
+    """
+    counts = batch_drift_counts(base, current, buckets=buckets, bins=bins, timer=timer)
+    psi = _psi_from_count_matrix(counts["psi_base"], counts["n_base"], counts["psi_current"], counts["n_current"])
+    kl = _kl_from_count_matrix(counts["kl_base"], counts["kl_current"], counts["kl_edges"])
+    return psi, kl
+
+def batch_drift_counts(base, current, buckets=10, bins=50, timer=None):
+    """The per-column histograms behind batch_drift_metrics.
+
+    Returns a dict of (features, bins) count matrices ``psi_base``,
+    ``psi_current``, ``kl_base``, ``kl_current``, the non-NaN row counts
+    ``n_base`` / ``n_current`` and the KL edges ``kl_edges`` (edges, features).
+    """
+    timer = timer or _NO_TIMER
+    with timer.stage("nan_mask"):
+        base = np.asarray(base, dtype=float)
+        current = np.asarray(current, dtype=float)
+        base_nan = np.isnan(base)
+        curr_nan = np.isnan(current)
+        n_base = (~base_nan).sum(axis=0)
+        n_curr = (~curr_nan).sum(axis=0)
+
+    # PSI: quantile breakpoints on base, open-ended outer bins.
+    # np.quantile is vectorised over columns; nanquantile falls back to a per-column loop
+    with timer.stage("psi_quantiles"):
+        quantiles = np.linspace(0, 1, buckets + 1)
+        if base_nan.any():
+            breakpoints = np.nanquantile(base, quantiles, axis=0)
+        else:
+            breakpoints = np.quantile(base, quantiles, axis=0)
+        breakpoints[0] = -np.inf
+        breakpoints[-1] = np.inf
+    with timer.stage("psi_binning"):
+        base_counts = _bincount_columns(_bin_columns_sorted_edges(base, breakpoints, base_nan), buckets)
+        curr_counts = _bincount_columns(_bin_columns_sorted_edges(current, breakpoints, curr_nan), buckets)
+
+    # KL: equal-width bins over the base range (widened when constant, as np.histogram does)
+    with timer.stage("kl_binning"):
+        first = np.nanmin(base, axis=0)
+        last = np.nanmax(base, axis=0)
+        constant = first == last
+        first = np.where(constant, first - 0.5, first)
+        last = np.where(constant, last + 0.5, last)
+        edges = np.linspace(first, last, bins + 1, axis=0)
+        kl_base = _bincount_columns(_bin_columns_uniform(base, edges, base_nan), bins)
+        kl_curr = _bincount_columns(_bin_columns_uniform(current, edges, curr_nan), bins)
+
+    return {
+        "psi_base": base_counts,
+        "psi_current": curr_counts,
+        "n_base": n_base,
+        "n_current": n_curr,
+        "kl_base": kl_base,
+        "kl_current": kl_curr,
+        "kl_edges": edges,
+    }
+
+# severity of features the screening stage left out; they have no full-resolution psi
+SCREENED = "screened"
+
+def classify_severity(psi_values, stable=0.1, moderate=0.25, screened=None):
+    # re-label already computed PSI values with custom thresholds; rows flagged in
+    # ``screened`` (e.g. results["severity"] == SCREENED) keep the SCREENED label
+    labels = [_severity(psi, stable, moderate) for psi in psi_values]
+    if screened is not None:
+        labels = [SCREENED if skip else label for label, skip in zip(labels, screened)]
+    return labels
+
+def _drift_columns_mmap(base_path, curr_path, start, stop, buckets=10, bins=50, ks_method="scipy"):
+    # worker side: map the shared arrays and take a contiguous block of columns
+    base = np.load(base_path, mmap_mode="r")[:, start:stop]
+    current = np.load(curr_path, mmap_mode="r")[:, start:stop]
+    return _drift_columns(base, current, buckets=buckets, bins=bins, ks_method=ks_method)
+
+# below this many cells (rows x columns) a process pool costs more than it saves
+PARALLEL_MIN_CELLS = 1_000_000
+
+def _drift_columns_parallel(base, current, n_jobs, executor=None, buckets=10, bins=50, timer=None,
+                            ks_method="scipy"):
+    from concurrent.futures import ProcessPoolExecutor
+
+    timer = timer or _NO_TIMER
+    n_cols = base.shape[1]
+    blocks = np.array_split(np.arange(n_cols), min(n_cols, n_jobs * 4))
+    blocks = [(int(b[0]), int(b[-1]) + 1) for b in blocks if len(b)]
+
+    # columns go to the workers through memory-mapped .npy files (RAM-backed
+    # under /dev/shm on Linux), Fortran order so each block is contiguous
+    shared = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    with tempfile.TemporaryDirectory(dir=shared, prefix="drift_") as tmp:
+        paths = []
+        with timer.stage("shared_copy"):
+            for name, arr in (("base", base), ("current", current)):
+                path = os.path.join(tmp, f"{name}.npy")
+                out = np.lib.format.open_memmap(path, mode="w+", dtype=arr.dtype, shape=arr.shape,
+                                                fortran_order=True)
+                out[:] = arr
+                out.flush()
+                del out
+                paths.append(path)
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=n_jobs)
+        try:
+            # map() yields in submission order, so results stay in column order;
+            # worker-side stages are not broken down, only the whole pool run
+            with timer.stage("parallel_pool"):
+                parts = executor.map(
+                    _drift_columns_mmap,
+                    [paths[0]] * len(blocks),
+                    [paths[1]] * len(blocks),
+                    [b[0] for b in blocks],
+                    [b[1] for b in blocks],
+                    [buckets] * len(blocks),
+                    [bins] * len(blocks),
+                    [ks_method] * len(blocks),
+                )
+                rows = [row for part in parts for row in part]
+        finally:
+            if own_executor:
+                executor.shutdown()
+    return rows
+
+def _analyze_drift_batch(df_base, df_curr, numeric_cols, n_jobs=1, executor=None, buckets=10, bins=50,
+                         timer=_NO_TIMER, ks_method="scipy", low_memory=False):
+    import pandas as pd
+
+    numeric_cols = list(numeric_cols)
+    groups = [(numeric_cols, float)]
+    if low_memory:
+        # float32 where both sides survive the rounding (float32_safe), float64 for the rest
+        with timer.stage("float32_check"):
+            narrow = [col for col in numeric_cols
+                      if float32_safe(_column_values(df_base, col)) and float32_safe(_column_values(df_curr, col))]
+        wide = [col for col in numeric_cols if col not in set(narrow)]
+        groups = [(narrow, np.float32), (wide, float)]
+
+    n_base_rows, n_curr_rows = _n_rows(df_base), _n_rows(df_curr)
+    by_feature = {}
+    for cols, dtype in groups:
+        if not cols:
+            continue
+        with timer.stage("to_matrix"):
+            base = _column_matrix(df_base, cols, dtype)
+            current = _column_matrix(df_curr, cols, dtype)
+
+        cells = (len(base) + len(current)) * len(cols)
+        if (n_jobs > 1 or executor is not None) and len(cols) > 1 and cells >= PARALLEL_MIN_CELLS:
+            rows = _drift_columns_parallel(base, current, n_jobs, executor, buckets=buckets, bins=bins, timer=timer,
+                                           ks_method=ks_method)
+        else:
+            # the float32 matrices are private copies: sort them in place
+            rows = _drift_columns(base, current, buckets=buckets, bins=bins, timer=timer, features=cols,
+                                  ks_method=ks_method, overwrite_input=dtype == np.float32)
+        del base, current
+        by_feature.update(zip(cols, rows))
+
+    results = []
+    for col in numeric_cols:
+        psi, kl, ks_stat, ks_p, js, wasserstein, n_base, n_curr = by_feature[col]
+        missing_base = _missing_rate(n_base_rows, n_base)
+        missing_curr = _missing_rate(n_curr_rows, n_curr)
+        results.append({
+            "feature": col,
+            "psi": psi,
+            "kl_divergence": kl,
+            "ks_stat": ks_stat,
+            "ks_p_value": ks_p,
+            "js_divergence": js,
+            "wasserstein": wasserstein,
+            "missing_rate_base": missing_base,
+            "missing_rate_current": missing_curr,
+            "missing_rate_change": missing_curr - missing_base,
+            "severity": _severity(psi)
+        })
+
+    return pd.DataFrame(results)
+
+def _n_rows(data):
+    if _is_frame(data):
+        return len(data)
+    if isinstance(data, dict):
+        return len(next(iter(data.values()))) if data else 0
+    # streams and files (sampling mode): not known up front
+    return None
+
+def analyze_drift(df_base, df_curr, numeric_cols=None, engine="batch", n_jobs=1, executor=None,
+                  buckets=10, bins=50, instrument=False, on_stats=None, categorical_cols=None, top_k=None,
+                  sample=None, sample_by=None, time_budget=None, bootstrap=0, severity_from="psi",
+                  segment_by=None, min_segment_rows=100, screen=None, screen_top_k=None, ks_method="scipy",
+                  low_memory=False):
+    # df_base may be a fitted ReferenceProfile instead of the raw reference frame.
+    # n_jobs > 1 (or -1 for all cores) or an explicit executor spreads the
+    # batched engine over a process pool; small inputs still run serially.
+    # categorical_cols are analyzed with drift_categorical (PSI, JS divergence,
+    # chi-square; top_k bounds the vocabulary) and appended to the results.
+    # sample=<rows> or "auto" runs on reservoir samples (stratified by the
+    # sample_by column) and adds confidence intervals, see drift_sampling;
+    # inputs may then also be paths or streams of chunks.
+    # bootstrap=<replicates> adds PSI / KL bootstrap intervals and permutation
+    # p-values drawn on the bin counts (drift_bootstrap).
+    # severity_from="psi_ci_low" grades severity on the interval's lower bound
+    # (needs bootstrap or sample).
+    # segment_by=<column or columns> returns one row per (segment, feature),
+    # all segments binned in one pass (drift_segments); segments with fewer
+    # than min_segment_rows current rows are left out, segments the reference
+    # lacks are compared with the whole reference (new_segment).
+    # screen=<coarse PSI cutoff> and / or screen_top_k=<features> run the full
+    # numeric metrics only on features that pass a cheap first stage
+    # (drift_screening); the rest get psi NaN, their coarse PSI in screen_psi
+    # and severity SCREENED, and the "stage" column says which stage decided
+    # each feature.
+    # ks_method="numpy" takes the KS p-values of the numeric engines from the
+    # asymptotic Kolmogorov distribution (drift_core.metrics) instead of
+    # scipy.stats, which is then never imported; p-values of small samples
+    # differ slightly from scipy's exact ones.
+    # low_memory=True runs the batch engine on float32 copies, sorted in place,
+    # of the columns float32 holds to within FLOAT32_MAX_ERROR of their range
+    # (float32_safe; the rest stay float64): about half the working memory,
+    # metrics equal to float64's up to that rounding. Every numeric engine also
+    # reports the share of NaN / null rows per side (missing_rate_base /
+    # missing_rate_current) and its change (missing_rate_change).
+    # instrument=True returns (results, stats) with per-stage / per-feature
+    # timings, rows processed and peak traced memory; on_stats(stats) is called
+    # with the same dict (see json_log) without changing the return value.
+    run = partial(
+        _analyze_drift, df_base, df_curr, numeric_cols, engine, n_jobs, executor, buckets, bins,
+        categorical_cols=categorical_cols, top_k=top_k, sample=sample, sample_by=sample_by,
+        time_budget=time_budget, bootstrap=bootstrap, severity_from=severity_from,
+        segment_by=segment_by, min_segment_rows=min_segment_rows, screen=screen, screen_top_k=screen_top_k,
+        ks_method=ks_method, low_memory=low_memory,
+    )
+    if not instrument and on_stats is None:
+        return run()
+
+    timer = DriftTimer()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    mem_start = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        results = run(timer=timer)
+        total = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    if isinstance(df_base, ReferenceProfile):
+        rows_reference = int(df_base.base_rows.max()) if len(df_base.base_rows) else 0
+    else:
+        rows_reference = _n_rows(df_base)
+    stats = {
+        "engine": engine,
+        "n_jobs": n_jobs,
+        "features": len(results),
+        "rows_reference": rows_reference,
+        "rows_current": _n_rows(df_curr),
+        "total_seconds": total,
+        # this process only: pool workers are not traced
+        "peak_memory_mb": max(peak - mem_start, 0) / 2**20,
+        "stages": timer.totals(),
+        "timings": timer.timings,
+    }
+    if on_stats is not None:
+        on_stats(stats)
+    return (results, stats) if instrument else results
+
+def _analyze_drift(df_base, df_curr, numeric_cols=None, engine="batch", n_jobs=1, executor=None,
+                   buckets=10, bins=50, timer=_NO_TIMER, categorical_cols=None, top_k=None,
+                   sample=None, sample_by=None, time_budget=None, bootstrap=0, severity_from="psi",
+                   segment_by=None, min_segment_rows=100, screen=None, screen_top_k=None, ks_method="scipy",
+                   low_memory=False):
+    import pandas as pd
+
+    if severity_from not in ("psi", "psi_ci_low"):
+        raise ValueError(f"unknown severity_from: {severity_from!r}")
+    if ks_method not in ("scipy", "numpy"):
+        raise ValueError(f"unknown ks_method: {ks_method!r}")
+    if ks_method == "numpy" and sample is not None:
+        raise ValueError("sampling computes KS with scipy; ks_method='numpy' needs the full data")
+    screening = screen is not None or screen_top_k is not None
+    if screening and (segment_by is not None or sample is not None):
+        raise ValueError("screening cannot be combined with segment_by or sample")
+    if segment_by is not None:
+        if sample is not None or bootstrap:
+            raise ValueError("segment_by cannot be combined with sample or bootstrap")
+        # imported here: drift_segments builds on this module
+        from drift_segments import analyze_segmented_drift
+        results = analyze_segmented_drift(
+            df_base, df_curr, segment_by, numeric_cols, categorical_cols, buckets=buckets, bins=bins,
+            min_rows=min_segment_rows, top_k=top_k, timer=timer,
+        )
+        return _grade(results, severity_from)
+    if sample is not None:
+        if bootstrap:
+            raise ValueError("sampling already reports intervals; use either sample or bootstrap")
+        # imported here: drift_sampling builds on this module
+        from drift_sampling import analyze_drift_sampled
+        results = analyze_drift_sampled(
+            df_base, df_curr, numeric_cols, sample=sample, sample_by=sample_by, time_budget=time_budget,
+            buckets=buckets, bins=bins, categorical_cols=categorical_cols, top_k=top_k, timer=timer,
+        )
+        return _grade(results, severity_from)
+
+    screened = None
+    if screening:
+        # imported here: drift_screening builds on this module
+        from drift_screening import screen_features
+        if numeric_cols is None:
+            numeric_cols = df_base.features if isinstance(df_base, ReferenceProfile) else _numeric_columns(df_base)
+        screened = screen_features(df_base, df_curr, numeric_cols, screen, screen_top_k, timer=timer)
+        numeric_cols = screened.loc[screened["passed"], "feature"].tolist()
+
+    if screened is not None and not numeric_cols:
+        results = pd.DataFrame(columns=["feature", "psi"])
+    else:
+        results = _analyze_numeric_drift(
+            df_base, df_curr, numeric_cols, engine, n_jobs, executor, buckets, bins, timer, ks_method,
+            low_memory,
+        )
+    if bootstrap and not results.empty:
+        with timer.stage("bootstrap"):
+            results = _add_bootstrap(df_base, df_curr, results, buckets, bins, bootstrap)
+    if screened is not None:
+        results = _merge_screened(results, screened)
+
+    if categorical_cols:
+        if isinstance(df_base, ReferenceProfile):
+            raise ValueError("a ReferenceProfile only covers numeric features; pass the reference frame "
+                             "for categorical_cols")
+        # imported here: drift_categorical builds on this module
+        from drift_categorical import analyze_categorical_drift
+        categorical = analyze_categorical_drift(df_base, df_curr, list(categorical_cols), top_k=top_k, timer=timer)
+        results = categorical if results.empty else pd.concat([results, categorical], ignore_index=True)
+    return _grade(results, severity_from)
+
+def _merge_screened(results, screened):
+    # full results for the features that passed; the rest only have the coarse PSI (screen_psi),
+    # which is not comparable with psi, so they get psi NaN and severity SCREENED. In the original order
+    import pandas as pd
+
+    rest = screened.loc[~screened["passed"], ["feature"]].assign(psi=np.nan, severity=SCREENED)
+    results = results.assign(stage="full")
+    rest = rest.assign(stage="screen")
+    merged = rest if results.empty else pd.concat([results, rest], ignore_index=True)
+    merged = merged.merge(screened[["feature", "screen_psi", "mean_shift"]], on="feature", how="left")
+    order = {feature: i for i, feature in enumerate(screened["feature"])}
+    return merged.sort_values("feature", key=lambda f: f.map(order)).reset_index(drop=True)
+
+def _grade(results, severity_from):
+    # severity from the PSI point estimate or, where there is one, its interval's lower bound
+    if severity_from == "psi_ci_low":
+        if "psi_ci_low" not in results:
+            raise ValueError("severity_from='psi_ci_low' needs bootstrap or sample")
+        basis = results["psi_ci_low"].fillna(results["psi"])
+        screened = results["severity"] == SCREENED if "severity" in results else None
+        results["severity"] = classify_severity(basis, screened=screened)
+    return results[[c for c in results.columns if c != "severity"] + ["severity"]]
+
+def _add_bootstrap(df_base, df_curr, results, buckets, bins, n_boot):
+    # imported here: drift_bootstrap builds on this module
+    from drift_bootstrap import drift_uncertainty
+
+    cols = results["feature"].tolist()
+    counts = _feature_counts(df_base, df_curr, cols, buckets, bins)
+    uncertainty = drift_uncertainty(counts, cols, n_boot=n_boot)
+    return results.merge(uncertainty, on="feature", how="left")
+
+def _feature_counts(df_base, df_curr, cols, buckets=10, bins=50):
+    # batch_drift_counts-style PSI / KL histograms of both sides for cols
+    # imported here: drift_stream builds on this module
+    from drift_stream import DriftAccumulator
+
+    if isinstance(df_base, ReferenceProfile):
+        # the profile already holds the reference histograms
+        acc = DriftAccumulator(df_base, cols).update(_column_matrix(df_curr, cols))
+        rows = [df_base._index[c] for c in cols]
+        counts = {
+            "psi_base": df_base.psi_counts[rows],
+            "psi_current": acc.psi_counts,
+            "kl_base": df_base.kl_counts[rows],
+            "kl_current": acc.kl_counts,
+            "kl_edges": df_base.kl_edges[rows].T,
+        }
+    else:
+        counts = batch_drift_counts(
+            _column_matrix(df_base, cols), _column_matrix(df_curr, cols), buckets=buckets, bins=bins
+        )
+    return counts
+
+def _analyze_numeric_drift(df_base, df_curr, numeric_cols=None, engine="batch", n_jobs=1, executor=None,
+                           buckets=10, bins=50, timer=_NO_TIMER, ks_method="scipy", low_memory=False):
+    import pandas as pd
+
+    if isinstance(df_base, ReferenceProfile):
+        profile = df_base
+    else:
+        profile = None
+
     if numeric_cols is None:
-        numeric_cols = df_base.select_dtypes(include=[np.number]).columns
+        if profile is not None:
+            numeric_cols = profile.features
+        else:
+            numeric_cols = _numeric_columns(df_base)
+
+    if engine not in ("batch", "loop"):
+        raise ValueError(f"unknown engine: {engine!r}")
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if engine == "batch" and profile is None:
+        return _analyze_drift_batch(
+            df_base, df_curr, numeric_cols, n_jobs=n_jobs, executor=executor, buckets=buckets, bins=bins,
+            timer=timer, ks_method=ks_method, low_memory=low_memory,
+        )
 
     results = []
     for col in numeric_cols:
-        psi = calculate_psi(df_base[col], df_curr[col])
-        kl = calculate_kl(df_base[col], df_curr[col])
-        ks_stat, ks_p = calculate_ks(df_base[col], df_curr[col])
-
-        if psi < 0.1:
-            severity = "Stable"
-        elif psi < 0.25:
-            severity = "Moderate"
+        # NaNs are dropped once per column; the metrics below get the same NaN-free arrays
+        with timer.stage("nan_mask", col):
+            current = finite_values(df_curr[col])
+            missing_curr = _missing_rate(len(df_curr[col]), len(current))
+        if profile is not None:
+            missing_base = profile.missing_rate(col)
+            with timer.stage("psi", col):
+                psi = profile.psi(col, current)
+            with timer.stage("kl", col):
+                kl = profile.kl(col, current)
+            with timer.stage("js", col):
+                js = profile.js(col, current)
+            if profile.sorted_values is not None:
+                with timer.stage("ks", col):
+                    ks_stat, ks_p = profile.ks(col, current, ks_method)
+                with timer.stage("wasserstein", col):
+                    wasserstein = profile.wasserstein(col, current)
+            else:
+                ks_stat, ks_p, wasserstein = np.nan, np.nan, np.nan
         else:
-            severity = "Severe"
+            with timer.stage("nan_mask", col):
+                base = finite_values(df_base[col])
+                missing_base = _missing_rate(len(df_base[col]), len(base))
+            with timer.stage("psi", col):
+                psi = calculate_psi(base, current, buckets=buckets)
+            with timer.stage("kl", col):
+                kl = calculate_kl(base, current, bins=bins)
+            with timer.stage("ks", col):
+                ks_stat, ks_p = calculate_ks(base, current, ks_method)
+            with timer.stage("js", col):
+                js = calculate_js(base, current, bins=bins)
+            with timer.stage("wasserstein", col):
+                wasserstein = calculate_wasserstein(base, current)
 
         results.append({
             "feature": col,
@@ -68,7 +724,12 @@ def analyze_drift(df_base, df_curr, numeric_cols=None):
             "kl_divergence": kl,
             "ks_stat": ks_stat,
             "ks_p_value": ks_p,
-            "severity": severity
+            "js_divergence": js,
+            "wasserstein": wasserstein,
+            "missing_rate_base": missing_base,
+            "missing_rate_current": missing_curr,
+            "missing_rate_change": missing_curr - missing_base,
+            "severity": _severity(psi)
         })
 
     return pd.DataFrame(results)
@@ -0,0 +1,399 @@
+"""Watch-folder drift service: analyze new current-data files as they land.
+
+    python app/drift_watch.py --config watch.json          # runs until interrupted
+    python app/drift_watch.py --config watch.json --once   # process what is there, then exit
+
+``watch.json`` lists one job per model (model names must be unique, since
+runs, checkpoints and fitted references are all keyed by model)::
+
+    {
+      "history": "drift_history.db",
+      "checkpoint": "drift_watch_checkpoint.json",
+      "workers": 2,
+      "poll_seconds": 5,
+      "jobs": [
+        {"model": "churn", "reference": "reference_data.csv", "landing": "landing/churn",
+         "pattern": "*.csv", "columns": ["age", "income"]}
+      ]
+    }
+
+Every poll scans each landing directory (``pattern`` is a glob relative to
+it, ``**`` allowed) and analyzes only data it has not seen, as recorded in
+the checkpoint (a JSON file, rewritten atomically after every window):
+
+* CSV files are read by byte offset. Rows appended since the last poll
+  (up to the last complete line) become a new window, parsed with the saved
+  header. The checkpoint keeps a hash of the file's first bytes (and how
+  many were hashed) and of the bytes just before the saved offset; a file
+  shorter than that offset, or whose hashes no longer match, was replaced
+  rather than appended to and is processed from the start again.
+  Without a checkpoint entry, processing resumes after the last window of
+  the same content found in the drift history.
+* Parquet / Arrow / .npy files are processed whole, once per content hash.
+
+Each window goes through ``analyze_drift`` against the job's reference
+profile (fitted once, shared with the workers as .npz). Its results and bin
+counts are appended to the drift history (drift_history) under the window
+key ``<path>@<content hash>:<start>-<end>`` (for CSV windows the hash
+covers the file's head and is followed by ``+<hashed bytes>``, so it can be
+checked again later). Windows already in the history
+are not recomputed, so a restart never parses the same bytes twice. Files
+younger than ``settle_seconds`` are left for the next poll while they are
+being written.
+
+Windows run on a process pool of ``workers``. At most ``max_pending``
+windows (default twice the workers) are queued. When the pool is that far
+behind, scanning waits for results instead of queueing more (backpressure),
+and unseen data simply stays on disk until there is capacity. A file has at
+most one window in flight, so appends are analyzed in order.
+"""
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import signal
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from drift_cli import load_profile
+from drift_history import DriftHistory, data_key, drift_counts
+from drift_io import FORMATS, detect_format, read_schema, read_table
+from drift_utils import ReferenceProfile, analyze_drift
+
+# bytes hashed to recognise an appended CSV file as the same file
+HEAD_BYTES = 64 * 1024
+# bytes before the checkpoint offset hashed to catch a rewrite that keeps the head
+TAIL_BYTES = 4 * 1024
+# bytes hashed per read when digesting whole files
+_HASH_BLOCK = 1 << 20
+
+# profiles loaded in each worker process, by .npz path
+_PROFILES = {}
+
+
+def _init_worker():
+    # Ctrl+C stops the main loop, which lets queued windows finish; workers ignore it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _profile(path):
+    if path not in _PROFILES:
+        _PROFILES[path] = ReferenceProfile.load(path)
+    return _PROFILES[path]
+
+
+def _file_digest(path, limit=None, start=0):
+    # sha256 of the file from ``start`` to the end, or of the ``limit`` bytes there
+    digest = hashlib.sha256()
+    remaining = limit
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        while remaining is None or remaining > 0:
+            block = fh.read(_HASH_BLOCK if remaining is None else min(_HASH_BLOCK, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest.hexdigest()
+
+
+def _tail_digest(path, offset):
+    # hash of the TAIL_BYTES (at most) ending at offset
+    size = min(offset, TAIL_BYTES)
+    return _file_digest(path, size, offset - size)
+
+
+def _csv_header(path):
+    with open(path, "rb") as fh:
+        line = fh.readline()
+    return line if line.endswith(b"\n") else None
+
+
+def _last_newline(path, start, end):
+    # offset just past the last complete line in [start, end), or start
+    with open(path, "rb") as fh:
+        pos = end
+        while pos > start:
+            size = min(_HASH_BLOCK, pos - start)
+            fh.seek(pos - size)
+            block = fh.read(size)
+            i = block.rfind(b"\n")
+            if i >= 0:
+                return pos - size + i + 1
+            pos -= size
+    return start
+
+
+def _run_window(profile_path, path, start, end, header, columns, csv_engine="c", with_counts=True):
+    # worker side: parse one window of one file and analyze it against the profile.
+    # start is None for whole-file formats; CSV windows after the first get the header prepended
+    try:
+        profile = _profile(profile_path)
+        if start is None:
+            available = set(read_schema(path))
+            cols = [c for c in columns if c in available]
+            df_curr = read_table(path, columns=cols, csv_engine=csv_engine)
+        else:
+            with open(path, "rb") as fh:
+                fh.seek(start)
+                data = fh.read(end - start)
+            if start > 0:
+                data = header + data
+            available = set(read_schema(io.BytesIO(header), fmt="csv"))
+            cols = [c for c in columns if c in available]
+            df_curr = read_table(io.BytesIO(data), columns=cols, fmt="csv", csv_engine=csv_engine)
+        results = analyze_drift(profile, df_curr, numeric_cols=cols)
+        results.insert(1, "n_rows", len(df_curr))
+        counts = drift_counts(profile, df_curr, cols) if with_counts and cols else None
+        return results, None, counts
+    except Exception as exc:  # reported per window, the service keeps going
+        return None, f"{type(exc).__name__}: {exc}", None
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {"files": {}}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def save_checkpoint(checkpoint, path):
+    # write-then-rename, so a crash never leaves a half-written checkpoint
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".checkpoint_", suffix=".json")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(checkpoint, fh, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+class DriftWatcher:
+    """Polls the landing directories of ``config`` and analyzes unseen data on a process pool."""
+
+    def __init__(self, config, log=None):
+        self.config = config
+        self.jobs = config["jobs"]
+        models = [job["model"] for job in self.jobs]
+        duplicates = sorted({m for m in models if models.count(m) > 1})
+        if duplicates:
+            raise ValueError(
+                f"duplicate model names in jobs: {', '.join(duplicates)}; runs, checkpoints "
+                "and references are keyed by model, so every job needs its own model name"
+            )
+        self.workers = int(config.get("workers", 1))
+        self.max_pending = int(config.get("max_pending", 2 * self.workers))
+        self.poll_seconds = float(config.get("poll_seconds", 5))
+        self.settle_seconds = float(config.get("settle_seconds", 2))
+        self.csv_engine = config.get("csv_engine", "c")
+        self.checkpoint_path = config.get("checkpoint", "drift_watch_checkpoint.json")
+        self.checkpoint = load_checkpoint(self.checkpoint_path)
+        self.history = DriftHistory(config.get("history", "drift_history.db"))
+        self.log = log or (lambda message: print(message, file=sys.stderr, flush=True))
+        self._in_flight = {}
+        self._busy = set()
+        self._references = {}
+
+    def _prepare(self, tmp):
+        # fit (or load) each job's reference once and save it where the workers can load it
+        for i, job in enumerate(self.jobs):
+            profile = load_profile(job["reference"], job.get("columns"), csv_engine=self.csv_engine)
+            path = os.path.join(tmp, f"reference_{i}.npz")
+            profile.save(path)
+            columns = job.get("columns") or profile.features
+            self._references[job["model"]] = {
+                "path": path,
+                "key": data_key(profile),
+                "columns": list(columns),
+                "rows": int(profile.base_rows.max()) if len(profile.base_rows) else 0,
+                "params": {"columns": list(columns), "source": "drift_watch"},
+            }
+
+    def _files(self, job):
+        pattern = os.path.join(job["landing"], job.get("pattern", "**/*"))
+        paths = glob.glob(pattern, recursive=True)
+        return sorted(os.path.abspath(p) for p in paths
+                      if os.path.isfile(p) and os.path.splitext(p.lower())[1] in FORMATS)
+
+    def _pending(self, job, path):
+        # the next unseen window of ``path`` as (start, end, header, entry), or None
+        key = f"{job['model']}|{path}"
+        entry = self.checkpoint["files"].get(key)
+        stat = os.stat(path)
+        if time.time() - stat.st_mtime < self.settle_seconds:
+            return None
+        if entry is not None and entry.get("error") and entry.get("error_size") == stat.st_size:
+            # failed before and unchanged since: wait for the file to change
+            return None
+
+        if detect_format(path) != "csv":
+            digest = _file_digest(path)
+            if entry is not None and entry.get("digest") == digest:
+                return None
+            return None, stat.st_size, None, {"digest": digest, "offset": stat.st_size}
+
+        head_len = min(stat.st_size, HEAD_BYTES)
+        # a file shorter than the saved offset was truncated and rewritten, whatever its hashes
+        same_file = (
+            entry is not None
+            and stat.st_size >= entry.get("offset", 0)
+            and entry.get("head_len", 0) <= stat.st_size
+            and _file_digest(path, entry.get("head_len", 0)) == entry.get("head")
+            # entries saved before the tail hash existed only have the head to go on
+            and ("tail" not in entry or _tail_digest(path, entry["offset"]) == entry["tail"])
+        )
+        if not same_file:
+            header = _csv_header(path)
+            if header is None:
+                return None
+            # no checkpoint for this content: resume after windows already in the history
+            offset = self._recorded_end(job, path, stat.st_size) if entry is None else 0
+            entry = {"offset": offset, "header": header.decode("utf-8", "surrogateescape")}
+        start = entry["offset"]
+        end = _last_newline(path, start, stat.st_size)
+        update = {
+            "offset": end,
+            "header": entry["header"],
+            "head_len": head_len,
+            "head": _file_digest(path, head_len),
+            "tail": _tail_digest(path, end),
+        }
+        if end <= start or end <= len(entry["header"].encode("utf-8", "surrogateescape")):
+            if not same_file and start > 0:
+                # recovered from the history with nothing new: remember it
+                self.checkpoint["files"][key] = dict(update, offset=start, tail=_tail_digest(path, start))
+                save_checkpoint(self.checkpoint, self.checkpoint_path)
+            return None
+        return start, end, entry["header"].encode("utf-8", "surrogateescape"), update
+
+    def _recorded_end(self, job, path, size):
+        # end offset of the last window of this content in the history, or 0. Each window's
+        # head hash is checked at the length it covered; windows ending past ``size`` belong
+        # to a longer file that has since been truncated and rewritten
+        pattern = re.compile(re.escape(path) + r"@([0-9a-f]{16})\+(\d+):\d+-(\d+)")
+        heads = {}
+        recorded = 0
+        for key in self.history.runs(job["model"])["window_key"]:
+            match = pattern.fullmatch(key)
+            if match is None:
+                continue
+            head, head_len, end = match[1], int(match[2]), int(match[3])
+            if end > size or end <= recorded:
+                continue
+            if head_len not in heads:
+                heads[head_len] = _file_digest(path, head_len)[:16]
+            if heads[head_len] == head:
+                recorded = end
+        return recorded
+
+    def _finish(self, future):
+        job, path, start, end, update = self._in_flight.pop(future)
+        key = f"{job['model']}|{path}"
+        self._busy.discard(key)
+        results, error, counts = future.result()
+        if error is not None:
+            self.checkpoint["files"][key] = dict(
+                self.checkpoint["files"].get(key, {}), error=error, error_size=os.path.getsize(path)
+            )
+            self.log(f"{job['model']} {path}: {error}")
+        else:
+            self._record(job, path, start, end, update, results, counts)
+            self.checkpoint["files"][key] = update
+        save_checkpoint(self.checkpoint, self.checkpoint_path)
+
+    def _record(self, job, path, start, end, update, results, counts):
+        ref = self._references[job["model"]]
+        self.history.record(
+            results, job["model"], ref["key"], window_key=self._window_key(path, start, end, update),
+            params=ref["params"], counts=counts, rows_reference=ref["rows"],
+            rows_current=int(results["n_rows"].iloc[0]) if len(results) else 0,
+        )
+        severe = int((results["severity"] == "Severe").sum()) if len(results) else 0
+        rows = int(results["n_rows"].iloc[0]) if len(results) else 0
+        self.log(f"{job['model']} {path} [{start or 0}:{end}] {rows} rows, {severe} severe")
+
+    @staticmethod
+    def _window_key(path, start, end, update):
+        # the content hash keeps a replaced file from matching the old file's windows
+        if update.get("head") is None:
+            return f"{path}@{update['digest'][:16]}:{start or 0}-{end}"
+        return f"{path}@{update['head'][:16]}+{update['head_len']}:{start or 0}-{end}"
+
+    def _wait(self, timeout=None):
+        done, _ = wait(list(self._in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            self._finish(future)
+
+    def poll(self, pool):
+        """Queue every unseen window; blocks while ``max_pending`` windows are queued. Returns how many."""
+        queued = 0
+        for job in self.jobs:
+            ref = self._references[job["model"]]
+            for path in self._files(job):
+                key = f"{job['model']}|{path}"
+                if key in self._busy:
+                    continue
+                pending = self._pending(job, path)
+                if pending is None:
+                    continue
+                start, end, header, update = pending
+                window_key = self._window_key(path, start, end, update)
+                if self.history.find_run(job["model"], ref["key"], window_key, ref["params"]) is not None:
+                    # recorded before a crash / restart: only the checkpoint was behind
+                    self.checkpoint["files"][key] = update
+                    save_checkpoint(self.checkpoint, self.checkpoint_path)
+                    continue
+                while len(self._in_flight) >= self.max_pending:
+                    self._wait()
+                future = pool.submit(
+                    _run_window, ref["path"], path, start, end, header, ref["columns"], self.csv_engine,
+                )
+                self._in_flight[future] = (job, path, start, end, update)
+                self._busy.add(key)
+                queued += 1
+        return queued
+
+    def run(self, once=False):
+        """Poll until interrupted (or, with ``once``, until nothing unseen is left)."""
+        with tempfile.TemporaryDirectory(prefix="drift_watch_") as tmp:
+            self._prepare(tmp)
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            try:
+                while True:
+                    queued = self.poll(pool)
+                    if once and not queued and not self._in_flight:
+                        break
+                    if self._in_flight:
+                        self._wait(timeout=self.poll_seconds)
+                    elif not once:
+                        time.sleep(self.poll_seconds)
+            except KeyboardInterrupt:
+                self.log("stopping: finishing queued windows")
+            finally:
+                while self._in_flight:
+                    self._wait()
+                pool.shutdown()
+                self.history.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Analyze drift of new files in landing directories.")
+    parser.add_argument("--config", required=True, help="JSON file with the jobs (see module docstring)")
+    parser.add_argument("--once", action="store_true", help="process unseen data once and exit")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with open(args.config) as fh:
+        config = json.load(fh)
+    DriftWatcher(config).run(once=args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,23 @@
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import time
+import urllib.request
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from drift_utils import analyze_drift
+from drift_io import UPLOAD_TYPES, read_columns, read_table
+from drift_utils import SCREENED, analyze_drift, classify_severity, downcast_float32
+from drift_categorical import categorical_columns
+from drift_history import DriftHistory, drift_counts
+from drift_charts import categorical_distribution, ecdf_figure, numeric_distribution, overlay_figure
+from drift_detectors import DETECTORS, change_points, stream_trace
+from drift_multivariate import analyze_multivariate_drift
+from drift_sampling import sample_source
+from drift_timeline import drift_timeline
 
 # ---------- PAGE CONFIG ----------
 st.set_page_config(
@@ -88,6 +104,246 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# ---------- CACHED LOADING & DRIFT ----------
+def file_digest(uploaded_file):
+    return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_table(digest, name, csv_engine, low_memory, _raw_bytes):
+    # keyed on the content hash; the leading underscore keeps Streamlit from re-hashing the bytes.
+    # the parse time is cached with the frame for the Performance panel
+    start = time.perf_counter()
+    df = read_table(io.BytesIO(_raw_bytes), name=name, csv_engine=csv_engine)
+    if low_memory:
+        df = downcast_float32(df)
+    return df, time.perf_counter() - start
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_columns(digest, name, csv_engine, columns, _raw_bytes):
+    # only the features a drift run needs, as {column: array} (drift_io.read_columns: the other
+    # columns are never parsed, Arrow / .npy columns are views on the read buffer)
+    start = time.perf_counter()
+    data = read_columns(io.BytesIO(_raw_bytes), columns=list(columns), name=name, csv_engine=csv_engine)
+    return data, time.perf_counter() - start
+
+
+def load_upload(uploaded_file, digest):
+    # CSV, Parquet, Arrow/Feather or .npy, picked by file extension
+    df, seconds = load_table(digest, uploaded_file.name, csv_parser, low_memory, uploaded_file.getvalue())
+    st.session_state.setdefault("load_seconds", {})[digest] = seconds
+    return df
+
+
+# rows kept for previews and column pickers; full files are only parsed on Analyze
+PREVIEW_ROWS = 1_000
+# change in a feature's share of missing values that gets a warning under the report
+MISSING_RATE_ALERT = 0.05
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def preview_table(digest, name, _raw_bytes):
+    # reservoir sample read chunk by chunk (drift_sampling), never the whole table at once
+    return sample_source(io.BytesIO(_raw_bytes), PREVIEW_ROWS, name=name).sample()
+
+
+def preview_upload(uploaded_file, digest):
+    return preview_table(digest, uploaded_file.name, uploaded_file.getvalue())
+
+
+@st.cache_data(max_entries=32, show_spinner="Computing drift...")
+def compute_drift(ref_digest, curr_digest, columns, cat_columns, buckets, bins, top_k,
+                  sample, sample_by, time_budget, bootstrap, low_memory, _ref, _curr):
+    # threshold sliders are not part of the key: severity is re-labelled on the cached PSI.
+    # _ref / _curr are {column: array} of the selected features, or the uploads themselves when sampling.
+    # returns (results, stats); stats feed the Performance panel
+    return analyze_drift(
+        _ref, _curr, numeric_cols=list(columns), buckets=buckets, bins=bins, instrument=True,
+        categorical_cols=list(cat_columns), top_k=top_k,
+        sample=sample, sample_by=sample_by, time_budget=time_budget, bootstrap=bootstrap, low_memory=low_memory,
+    )
+
+
+@st.cache_data(max_entries=16, show_spinner="Fitting multivariate detectors...")
+def compute_multivariate(ref_digest, curr_digest, columns, _ref, _curr):
+    if isinstance(_ref, dict):
+        # the PCA reference is fitted from frames; these share the arrays read by load_columns
+        _ref, _curr = pd.DataFrame(_ref, copy=False), pd.DataFrame(_curr, copy=False)
+    return analyze_multivariate_drift(_ref, _curr, numeric_cols=list(columns))
+
+
+@st.cache_data(max_entries=16, show_spinner="Computing segment drift...")
+def compute_segments(ref_digest, curr_digest, segment_col, columns, cat_columns, buckets, bins, top_k,
+                     min_rows, _ref, _curr):
+    # every segment in one binning pass (drift_segments)
+    return analyze_drift(
+        _ref, _curr, numeric_cols=list(columns), categorical_cols=list(cat_columns), buckets=buckets,
+        bins=bins, top_k=top_k, segment_by=segment_col, min_segment_rows=min_rows,
+    )
+
+
+@st.cache_data(max_entries=64, show_spinner="Binning feature...")
+def compute_distribution(ref_digest, curr_digest, col, categorical, bins, _ref, _curr):
+    # one feature, only when its chart is asked for; the result is a few hundred numbers
+    if not isinstance(_ref, dict):
+        _ref = read_table(_ref, columns=[col], name=_ref.name)
+        _curr = read_table(_curr, columns=[col], name=_curr.name)
+    if categorical:
+        return categorical_distribution(_ref, _curr, col)
+    return numeric_distribution(_ref, _curr, col, bins=bins)
+
+
+@st.cache_data(max_entries=32, show_spinner="Running change-point detector...")
+def compute_change_points(digest, col, detector, params, _df):
+    # rows in file order are the event stream; returns alarm positions and a plottable trace
+    values = _df[col].to_numpy(dtype=float)
+    points = change_points(values, DETECTORS[detector](**dict(params)))
+    starts, means = stream_trace(values)
+    return points, pd.DataFrame({"row": starts, "mean": means})
+
+
+def fetch_live_drift(url):
+    # current counts of a running drift_ingest service (GET /drift, no file involved)
+    with urllib.request.urlopen(url.rstrip("/") + "/drift", timeout=5) as resp:
+        live = json.loads(resp.read())
+    results = pd.DataFrame(live["features"], columns=["feature", "psi", "kl_divergence", "n_rows", "severity"])
+    return results.astype({"psi": float, "kl_divergence": float}), live
+
+
+def fetch_live_performance(url):
+    # delayed-label accuracy / AUC / ECE per window of the same service (GET /performance)
+    with urllib.request.urlopen(url.rstrip("/") + "/performance", timeout=5) as resp:
+        live = json.loads(resp.read())
+    windows = pd.DataFrame(live["windows"])
+    if len(windows):
+        windows["window_start"] = pd.to_datetime(windows["window_start"], unit="s")
+    return windows, live
+
+
+def severity_basis(results):
+    # PSI point estimate, or the lower end of its interval when asked and available
+    if severity_on_lower and "psi_ci_low" in results:
+        return results["psi_ci_low"].fillna(results["psi"])
+    return results["psi"]
+
+
+def load_upload_columns(uploaded_file, digest, columns):
+    data, seconds = load_columns(digest, uploaded_file.name, csv_parser, tuple(columns), uploaded_file.getvalue())
+    st.session_state.setdefault("load_seconds", {})[digest] = seconds
+    return data
+
+
+def drift_inputs(ref_file, ref_digest, curr_file, curr_digest, columns):
+    # the selected columns, or (sampling mode) the uploads, which are then read chunk by chunk
+    if sample is None:
+        return load_upload_columns(ref_file, ref_digest, columns), load_upload_columns(curr_file, curr_digest, columns)
+    return ref_file, curr_file
+
+
+def run_drift(kind, run_key, ref_file, ref_digest, curr_file, curr_digest):
+    # compute_drift, or the stored results of an identical earlier run; new runs are
+    # appended to the drift history (with bin counts when the full tables are loaded)
+    params = {"tab": kind, "settings": list(run_key[2:])}
+    columns = run_key[2] + run_key[3]
+    if not record_history:
+        return compute_drift(*run_key, *drift_inputs(ref_file, ref_digest, curr_file, curr_digest, columns))
+    with DriftHistory(history_path) as history:
+        run_id = history.find_run(model_name, ref_digest, curr_digest, params)
+        if run_id is not None:
+            return history.results(run_id), None
+        ref, curr = drift_inputs(ref_file, ref_digest, curr_file, curr_digest, columns)
+        results, stats = compute_drift(*run_key, ref, curr)
+        numeric = [c for c in run_key[2] if c in set(results["feature"])]
+        counts = None
+        if sample is None and numeric:
+            counts = drift_counts(ref, curr, numeric, psi_buckets, kl_bins)
+        history.record(
+            results, model_name, ref_digest, window_key=curr_digest, params=params, counts=counts,
+            rows_reference=stats["rows_reference"], rows_current=stats["rows_current"],
+        )
+    return results, stats
+
+
+def show_sampling_note(results):
+    # sampled runs: re-check which severities the PSI intervals settle under the current thresholds
+    if "sample_rows_current" not in results:
+        return
+    low = classify_severity(results["psi_ci_low"], psi_stable, psi_moderate)
+    high = classify_severity(results["psi_ci_high"], psi_stable, psi_moderate)
+    results["severity_decided"] = [a == b for a, b in zip(low, high)]
+    st.caption(
+        f"Computed on samples of {int(results['sample_rows_reference'].iloc[0]):,} reference / "
+        f"{int(results['sample_rows_current'].iloc[0]):,} current rows. "
+        f"{int(results['severity_decided'].sum())} of {len(results)} severities are settled at 95% confidence."
+    )
+    if "read_complete" in results and not results["read_complete"].iloc[0]:
+        st.warning(
+            f"The time budget ran out while reading: only the first {int(results['rows_read_reference'].iloc[0]):,} "
+            f"reference / {int(results['rows_read_current'].iloc[0]):,} current rows were sampled."
+        )
+
+
+def drift_line(row):
+    # one bullet of the plain-English explanation; categorical rows carry chi-square instead of KS
+    p_value = row.get("ks_p_value")
+    test = "KS"
+    if pd.isna(p_value) and pd.notna(row.get("chi2_p_value")):
+        p_value, test = row["chi2_p_value"], "Chi-square"
+    return (
+        f"- **{row['feature']}** → PSI = `{row['psi']:.3f}` "
+        f"({row['severity']}). {test} p-value ≈ `{p_value:.2e}`."
+    )
+
+
+@st.cache_data(max_entries=16, show_spinner="Computing drift timeline...")
+def compute_timeline(ref_digest, curr_digest, timestamp_col, window, stride, columns, buckets, bins,
+                     _df_ref, _df_curr):
+    # (timeline, per-window bin counts); the counts go to the drift history
+    return drift_timeline(
+        _df_ref, _df_curr, timestamp_col, window=window, stride=stride,
+        numeric_cols=list(columns), buckets=buckets, bins=bins, with_counts=True,
+    )
+
+
+def show_performance(stats, ref_digest, curr_digest):
+    # where the time of the last run went: parsing, then analyze_drift stages
+    if stats is None:
+        st.caption("Loaded from the drift history; nothing was recomputed.")
+        return
+    load_seconds = st.session_state.get("load_seconds", {})
+    stages = {}
+    # sampled runs never parse the full files
+    if ref_digest in load_seconds and "sampling" not in stats["stages"]:
+        stages["parse reference"] = load_seconds[ref_digest]
+    if curr_digest in load_seconds and "sampling" not in stats["stages"]:
+        stages["parse current"] = load_seconds[curr_digest]
+    stages.update(stats["stages"])
+
+    def rows(n):
+        return f"{n:,}" if n is not None else "streamed"
+
+    p1, p2, p3 = st.columns(3)
+    p1.metric("Drift computation", f"{stats['total_seconds'] * 1000:.0f} ms")
+    p2.metric("Peak memory", f"{stats['peak_memory_mb']:.1f} MB")
+    p3.metric("Rows (ref / current)", f"{rows(stats['rows_reference'])} / {rows(stats['rows_current'])}")
+
+    stage_df = pd.DataFrame({"stage": list(stages), "seconds": list(stages.values())})
+    fig = px.bar(stage_df, x="seconds", y="stage", orientation="h", title="Time per stage",
+                 template="plotly_dark")
+    st.plotly_chart(fig, use_container_width=True)
+
+    timings = pd.DataFrame(stats["timings"])
+    per_feature = timings[timings["feature"].notna()] if len(timings) else timings
+    if len(per_feature):
+        st.caption("Per-feature timings (seconds)")
+        st.dataframe(
+            per_feature.pivot_table(index="feature", columns="stage", values="seconds", aggfunc="sum"),
+            use_container_width=True,
+        )
+    st.caption("Parse times are from when each file was first loaded; cached reruns reuse them.")
+
+
 # ---------- SIDEBAR ----------
 st.sidebar.title("⚙ Control Panel")
 st.sidebar.markdown(
@@ -103,6 +359,67 @@ st.sidebar.markdown(
 psi_stable = st.sidebar.slider("Max PSI for Stable", 0.00, 0.50, 0.10, 0.01)
 psi_moderate = st.sidebar.slider("Max PSI for Moderate", 0.05, 0.80, 0.25, 0.01)
 
+with st.sidebar.expander("Input"):
+    csv_parsers = ["c", "pyarrow"] if importlib.util.find_spec("pyarrow") else ["c"]
+    csv_parser = st.selectbox(
+        "CSV parser", csv_parsers, help="pyarrow parses large CSVs with several threads"
+    )
+    low_memory = st.checkbox(
+        "Low-memory mode (float32)", value=False,
+        help="Keeps float columns as float32 where the rounding is negligible against the column's range; "
+             "about half the memory, metrics equal up to that rounding",
+    )
+
+with st.sidebar.expander("Binning"):
+    psi_buckets = int(st.number_input("PSI buckets", min_value=2, max_value=100, value=10))
+    kl_bins = int(st.number_input("KL bins", min_value=5, max_value=500, value=50))
+    top_k = int(st.number_input(
+        "Top-k categories (0 = all)", min_value=0, max_value=1_000_000, value=0,
+        help="Bounds memory on high-cardinality categorical features: rarer categories share one 'other' bucket",
+    )) or None
+
+with st.sidebar.expander("Sampling"):
+    sample_mode = st.radio(
+        "Rows analyzed", ["All rows", "Fixed sample", "Auto (time budget)"],
+        help="Samples are drawn while reading the files in chunks; results carry confidence intervals",
+    )
+    sample_rows = int(st.number_input(
+        "Sample rows per side", min_value=1_000, max_value=10_000_000, value=100_000, step=10_000,
+        disabled=sample_mode != "Fixed sample",
+    ))
+    time_budget = float(st.number_input(
+        "Time budget (seconds)", min_value=0.5, max_value=600.0, value=5.0,
+        help="Auto mode grows the sample until every severity is settled or the budget is spent; "
+             "reading the files counts against the budget",
+        disabled=sample_mode != "Auto (time budget)",
+    ))
+sample = {"All rows": None, "Fixed sample": sample_rows, "Auto (time budget)": "auto"}[sample_mode]
+if sample != "auto":
+    time_budget = None
+
+with st.sidebar.expander("Uncertainty"):
+    bootstrap = int(st.number_input(
+        "Bootstrap replicates (0 = off)", min_value=0, max_value=20_000, value=0, step=500,
+        help="PSI / KL intervals and permutation p-values, resampled from the bin counts. "
+             "Sampled runs already carry intervals.",
+        disabled=sample is not None,
+    ))
+    severity_on_lower = st.checkbox(
+        "Grade severity on the PSI lower bound",
+        help="Only call drift Moderate / Severe when the whole interval says so",
+    )
+if sample is not None:
+    bootstrap = 0
+
+with st.sidebar.expander("History"):
+    record_history = st.checkbox(
+        "Record runs", value=True,
+        help="Append every analysis to a local SQLite drift history. "
+             "Runs already stored there are loaded instead of recomputed.",
+    )
+    history_path = st.text_input("History file", value="drift_history.db")
+    model_name = st.text_input("Model name", value="default", help="Runs are grouped by model in the history")
+
 # ---------- HEADER ----------
 with st.container():
     st.markdown(
@@ -133,8 +450,8 @@ with st.container():
 st.write("")  # spacing
 
 # ---------- TABS ----------
-tab_features, tab_preds, tab_about = st.tabs(
-    ["📊 Feature Drift", "📈 Prediction Drift", "ℹ About Concept Drift"]
+tab_features, tab_preds, tab_timeline, tab_history, tab_about = st.tabs(
+    ["📊 Feature Drift", "📈 Prediction Drift", "⏱ Drift Timeline", "🗂 History", "ℹ About Concept Drift"]
 )
 
 # ==========================================================
@@ -143,28 +460,31 @@ tab_features, tab_preds, tab_about = st.tabs(
 with tab_features:
     col1, col2 = st.columns(2)
     with col1:
-        ref_file = st.file_uploader("📂 Reference Dataset (training CSV)", type=["csv"], key="ref_features")
+        ref_file = st.file_uploader("📂 Reference Dataset (training data)", type=UPLOAD_TYPES, key="ref_features")
     with col2:
-        curr_file = st.file_uploader("📂 Current Dataset (production CSV)", type=["csv"], key="curr_features")
+        curr_file = st.file_uploader("📂 Current Dataset (production data)", type=UPLOAD_TYPES, key="curr_features")
 
     if ref_file and curr_file:
-        df_ref = pd.read_csv(ref_file)
-        df_curr = pd.read_csv(curr_file)
+        ref_digest = file_digest(ref_file)
+        curr_digest = file_digest(curr_file)
+        ref_preview = preview_upload(ref_file, ref_digest)
+        curr_preview = preview_upload(curr_file, curr_digest)
 
-        # Data preview
+        # Data preview (a sample of rows; full files are only read on Analyze)
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
         st.subheader("👀 Feature Data Preview")
         subcol1, subcol2 = st.columns(2)
         with subcol1:
             st.caption("Reference (training)")
-            st.dataframe(df_ref.head(), use_container_width=True)
+            st.dataframe(ref_preview.head(), use_container_width=True)
         with subcol2:
             st.caption("Current (production)")
-            st.dataframe(df_curr.head(), use_container_width=True)
+            st.dataframe(curr_preview.head(), use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
-        # Numeric columns & feature selection
-        numeric_cols = df_ref.select_dtypes(include="number").columns.tolist()
+        # Numeric / categorical columns & feature selection
+        numeric_cols = ref_preview.select_dtypes(include="number").columns.tolist()
+        cat_cols = [c for c in categorical_columns(ref_preview) if c in curr_preview.columns]
 
         st.markdown('<div class="glass-card" style="margin-top:1rem;">', unsafe_allow_html=True)
         st.subheader("🎛 Feature Selection")
@@ -172,153 +492,286 @@ with tab_features:
             "Choose which numeric features to include in drift analysis:",
             options=numeric_cols,
             default=numeric_cols,
-            help="Only numeric columns can be analyzed using PSI / KL / KS.",
+            help="Numeric columns are analyzed using PSI / KL / KS.",
             key="feature_cols",
         )
-        if len(selected_cols) == 0:
+        selected_cat_cols = st.multiselect(
+            "Choose which categorical features to include:",
+            options=cat_cols,
+            default=cat_cols,
+            help="Categorical columns (IDs, labels, strings) are analyzed using PSI / JS divergence / chi-square.",
+            key="feature_cat_cols",
+        )
+        if len(selected_cols) + len(selected_cat_cols) == 0:
             st.warning("⚠ Select at least one feature.")
+        sample_by = None
+        if sample is not None and cat_cols:
+            stratify = st.selectbox(
+                "Stratify the sample by:", ["(none)"] + cat_cols,
+                help="Each segment is sampled at exactly its share of the data",
+                key="feature_sample_by",
+            )
+            sample_by = None if stratify == "(none)" else stratify
         st.markdown("</div>", unsafe_allow_html=True)
 
         analyze_features = st.button("🚀 Analyze Feature Drift")
 
+        run_key = (ref_digest, curr_digest, tuple(selected_cols), tuple(selected_cat_cols),
+                   psi_buckets, kl_bins, top_k, sample, sample_by, time_budget, bootstrap, low_memory)
+
         if analyze_features:
-            if not selected_cols:
-                st.warning("Pick at least one numeric feature.")
+            if not selected_cols and not selected_cat_cols:
+                st.warning("Pick at least one feature.")
             else:
-                # Run drift analysis
-                results = analyze_drift(df_ref, df_curr, numeric_cols=selected_cols)
-
-                # Recompute severity using custom PSI thresholds
-                severity_list = []
-                for psi in results["psi"]:
-                    if psi < psi_stable:
-                        severity_list.append("Stable")
-                    elif psi < psi_moderate:
-                        severity_list.append("Moderate")
-                    else:
-                        severity_list.append("Severe")
-                results["severity"] = severity_list
+                # Run drift analysis (cached on data hashes + columns + bin / sampling settings)
+                results, stats = run_drift("features", run_key, ref_file, ref_digest, curr_file, curr_digest)
+                st.session_state["feature_run"] = {"key": run_key, "results": results, "stats": stats}
+
+        # results survive reruns; only re-shown while the inputs are unchanged
+        feature_run = st.session_state.get("feature_run")
+        if feature_run is not None and feature_run["key"] == run_key:
+            results = feature_run["results"].copy()
+
+            # Recompute severity using custom PSI thresholds (no drift recompute)
+            results["severity"] = classify_severity(severity_basis(results), psi_stable, psi_moderate)
+            show_sampling_note(results)
 
-                # ---------- Metrics strip ----------
-                overall_drift = min(results["psi"].mean() * 100, 100)
-                severe_count = int((results["severity"] == "Severe").sum())
-                n_features = len(results)
+            # ---------- Metrics strip ----------
+            overall_drift = min(results["psi"].mean() * 100, 100)
+            severe_count = int((results["severity"] == "Severe").sum())
+            n_features = len(results)
 
+            st.markdown(
+                """
+                <div class="glass-card" style="margin-top:1rem;">
+                    <h3 style="margin-bottom:0.8rem;">📡 Feature Drift Snapshot</h3>
+                """,
+                unsafe_allow_html=True,
+            )
+            m1, m2, m3 = st.columns(3)
+            with m1:
                 st.markdown(
-                    """
-                    <div class="glass-card" style="margin-top:1rem;">
-                        <h3 style="margin-bottom:0.8rem;">📡 Feature Drift Snapshot</h3>
+                    f"""
+                    <div class="metric-card">
+                        <div class="metric-label">Overall Drift Score</div>
+                        <div class="metric-value">{overall_drift:.1f}</div>
+                    </div>
                     """,
                     unsafe_allow_html=True,
                 )
-                m1, m2, m3 = st.columns(3)
-                with m1:
-                    st.markdown(
-                        f"""
-                        <div class="metric-card">
-                            <div class="metric-label">Overall Drift Score</div>
-                            <div class="metric-value">{overall_drift:.1f}</div>
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-                with m2:
-                    st.markdown(
-                        f"""
-                        <div class="metric-card">
-                            <div class="metric-label">Features Analyzed</div>
-                            <div class="metric-value">{n_features}</div>
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-                with m3:
-                    st.markdown(
-                        f"""
-                        <div class="metric-card">
-                            <div class="metric-label">Severe Drift Features</div>
-                            <div class="metric-value">{severe_count}</div>
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-
-                # ---------- Overall Status Block ----------
-                if severe_count == 0 and overall_drift < 10:
-                    status = ("🟢 Stable", "status-green",
-                              "Your feature distributions look healthy. No significant drift detected.")
-                elif severe_count <= 1 and overall_drift < 25:
-                    status = ("🟡 Monitor", "status-yellow",
-                              "Mild feature drift detected. Not urgent, but monitor these features over time.")
-                else:
-                    status = ("🔴 Retrain", "status-red",
-                              "Significant feature drift detected across key inputs. Model retraining is recommended.")
-
-                title_text, pill_class, explanation = status
-
+            with m2:
                 st.markdown(
                     f"""
-                    <div style="margin-top:0.9rem; margin-bottom:0.5rem;">
-                        <span class="status-pill {pill_class}" style="font-size:1rem; margin-bottom:0.7rem;">
-                            {title_text}
-                        </span>
-                        <p style="color:#d1d5db; margin-top:0.8rem; font-size:0.92rem;">
-                            {explanation}
-                        </p>
+                    <div class="metric-card">
+                        <div class="metric-label">Features Analyzed</div>
+                        <div class="metric-value">{n_features}</div>
                     </div>
+                    """,
+                    unsafe_allow_html=True,
+                )
+            with m3:
+                st.markdown(
+                    f"""
+                    <div class="metric-card">
+                        <div class="metric-label">Severe Drift Features</div>
+                        <div class="metric-value">{severe_count}</div>
                     </div>
                     """,
                     unsafe_allow_html=True,
                 )
 
-                # ---------- Feature-wise table ----------
-                st.markdown('<div class="glass-card" style="margin-top:1rem;">', unsafe_allow_html=True)
-                st.subheader("📋 Feature-wise Drift Report")
-                st.dataframe(results, use_container_width=True)
-                st.markdown("</div>", unsafe_allow_html=True)
-
-                # ---------- Plots ----------
-                template = "plotly_dark"
-                pcol1, pcol2 = st.columns(2)
-                with pcol1:
-                    fig_psi = px.bar(
-                        results,
-                        x="feature",
-                        y="psi",
-                        color="severity",
-                        title="PSI per Feature",
-                        template=template,
+            # ---------- Overall Status Block ----------
+            if severe_count == 0 and overall_drift < 10:
+                status = ("🟢 Stable", "status-green",
+                          "Your feature distributions look healthy. No significant drift detected.")
+            elif severe_count <= 1 and overall_drift < 25:
+                status = ("🟡 Monitor", "status-yellow",
+                          "Mild feature drift detected. Not urgent, but monitor these features over time.")
+            else:
+                status = ("🔴 Retrain", "status-red",
+                          "Significant feature drift detected across key inputs. Model retraining is recommended.")
+
+            title_text, pill_class, explanation = status
+
+            st.markdown(
+                f"""
+                <div style="margin-top:0.9rem; margin-bottom:0.5rem;">
+                    <span class="status-pill {pill_class}" style="font-size:1rem; margin-bottom:0.7rem;">
+                        {title_text}
+                    </span>
+                    <p style="color:#d1d5db; margin-top:0.8rem; font-size:0.92rem;">
+                        {explanation}
+                    </p>
+                </div>
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+
+            # ---------- Feature-wise table ----------
+            st.markdown('<div class="glass-card" style="margin-top:1rem;">', unsafe_allow_html=True)
+            st.subheader("📋 Feature-wise Drift Report")
+            st.dataframe(results, use_container_width=True)
+            if "missing_rate_change" in results:
+                moved = results[results["missing_rate_change"].abs() > MISSING_RATE_ALERT]
+                if not moved.empty:
+                    st.warning("Missing-value rate moved: " + ", ".join(
+                        f"`{row.feature}` {row.missing_rate_base:.1%} → {row.missing_rate_current:.1%}"
+                        for row in moved.itertuples()
+                    ))
+            st.markdown("</div>", unsafe_allow_html=True)
+
+            # ---------- Plots ----------
+            template = "plotly_dark"
+            pcol1, pcol2 = st.columns(2)
+            with pcol1:
+                fig_psi = px.bar(
+                    results,
+                    x="feature",
+                    y="psi",
+                    color="severity",
+                    title="PSI per Feature",
+                    template=template,
+                )
+                st.plotly_chart(fig_psi, use_container_width=True)
+            with pcol2:
+                fig_ks = px.bar(
+                    results,
+                    x="feature",
+                    y="ks_stat",
+                    title="KS Statistic per Feature",
+                    template=template,
+                )
+                st.plotly_chart(fig_ks, use_container_width=True)
+
+            # ---------- Distributions (one feature at a time, from binned counts) ----------
+            with st.expander("📊 Distribution Overlay & ECDF"):
+                dist_col = st.selectbox(
+                    "Feature to plot:", ["(choose a feature)"] + results["feature"].tolist(),
+                    help="Charts are drawn from bin counts and quantiles, so their size does not grow with the data.",
+                    key="feature_dist_col",
+                )
+                if dist_col != "(choose a feature)":
+                    dist = compute_distribution(
+                        ref_digest, curr_digest, dist_col, dist_col in selected_cat_cols, kl_bins,
+                        *drift_inputs(ref_file, ref_digest, curr_file, curr_digest, [dist_col]),
                     )
-                    st.plotly_chart(fig_psi, use_container_width=True)
-                with pcol2:
-                    fig_ks = px.bar(
-                        results,
-                        x="feature",
-                        y="ks_stat",
-                        title="KS Statistic per Feature",
-                        template=template,
+                    if dist["kind"] == "numeric":
+                        dcol1, dcol2 = st.columns(2)
+                        with dcol1:
+                            st.plotly_chart(overlay_figure(dist, template), use_container_width=True)
+                        with dcol2:
+                            st.plotly_chart(ecdf_figure(dist, template), use_container_width=True)
+                    else:
+                        st.plotly_chart(overlay_figure(dist, template), use_container_width=True)
+
+            # ---------- Download report ----------
+            csv_bytes = results.to_csv(index=False).encode("utf-8")
+            st.download_button(
+                label="📥 Download Feature Drift Report (CSV)",
+                data=csv_bytes,
+                file_name="feature_drift_report.csv",
+                mime="text/csv",
+                use_container_width=True,
+            )
+
+            # ---------- Plain-English explanation ----------
+            with st.expander("🧾 Plain-English Feature Drift Explanation"):
+                for _, row in results.sort_values("psi", ascending=False).iterrows():
+                    st.markdown(drift_line(row))
+
+            # ---------- Segments ----------
+            with st.expander("🧩 Segment Drift"):
+                # low-cardinality columns of the preview make sensible segments
+                segment_options = [
+                    c for c in ref_preview.columns
+                    if c in curr_preview.columns and ref_preview[c].nunique() <= 50
+                ]
+                if not segment_options:
+                    st.info("No low-cardinality column to segment by.")
+                else:
+                    scol1, scol2 = st.columns([2, 1])
+                    with scol1:
+                        segment_col = st.selectbox("Segment by:", segment_options, key="feature_segment_col")
+                    with scol2:
+                        min_segment_rows = int(st.number_input(
+                            "Min rows per segment", min_value=1, value=100, step=50,
+                            help="Segments with fewer rows on either side are left out", key="feature_segment_min",
+                        ))
+                    segment_key = (
+                        ref_digest, curr_digest, segment_col,
+                        tuple(c for c in selected_cols if c != segment_col),
+                        tuple(c for c in selected_cat_cols if c != segment_col),
+                        psi_buckets, kl_bins, top_k, min_segment_rows,
                     )
-                    st.plotly_chart(fig_ks, use_container_width=True)
-
-                # ---------- Download report ----------
-                csv_bytes = results.to_csv(index=False).encode("utf-8")
-                st.download_button(
-                    label="📥 Download Feature Drift Report (CSV)",
-                    data=csv_bytes,
-                    file_name="feature_drift_report.csv",
-                    mime="text/csv",
-                    use_container_width=True,
+                    if st.button("Compute segment drift"):
+                        st.session_state["segment_run"] = {
+                            "key": segment_key,
+                            "results": compute_segments(
+                                *segment_key, load_upload(ref_file, ref_digest), load_upload(curr_file, curr_digest)
+                            ),
+                        }
+                    segment_run = st.session_state.get("segment_run")
+                    if segment_run is not None and segment_run["key"] == segment_key:
+                        segments = segment_run["results"].copy()
+                        segments["severity"] = classify_severity(segments["psi"], psi_stable, psi_moderate)
+                        if segments.empty:
+                            st.info("No segment has enough rows.")
+                        else:
+                            heat = segments.pivot(index=segment_col, columns="feature", values="psi")
+                            fig_seg = px.imshow(
+                                heat.astype(float),
+                                aspect="auto",
+                                color_continuous_scale="Magma",
+                                title=f"PSI per {segment_col} × feature",
+                                template=template,
+                            )
+                            fig_seg.update_yaxes(type="category")
+                            st.plotly_chart(fig_seg, use_container_width=True)
+                            st.dataframe(segments, use_container_width=True)
+                            if segments["new_segment"].any():
+                                st.caption(
+                                    "Segments marked new_segment have too few reference rows and are "
+                                    "compared with the whole reference."
+                                )
+
+            # ---------- Multivariate ----------
+            with st.expander("🧬 Multivariate Drift"):
+                st.caption(
+                    "Drift in how the numeric features move together (e.g. a correlation that flips), "
+                    "which per-feature metrics cannot see. PCA reconstruction error: ratio of current to "
+                    "reference error. Domain classifier: AUC of telling the two datasets apart (0.5 = no drift)."
                 )
+                mv_key = (ref_digest, curr_digest, tuple(selected_cols))
+                if len(selected_cols) < 2:
+                    st.info("Select at least two numeric features.")
+                elif st.button("Run multivariate drift"):
+                    st.session_state["multivariate_run"] = {
+                        "key": mv_key,
+                        "results": compute_multivariate(
+                            *mv_key, *drift_inputs(ref_file, ref_digest, curr_file, curr_digest, selected_cols)
+                        ),
+                    }
+                mv_run = st.session_state.get("multivariate_run")
+                if mv_run is not None and mv_run["key"] == mv_key:
+                    mv_summary, mv_contributions = mv_run["results"]
+                    st.dataframe(mv_summary, use_container_width=True)
+                    fig_mv = px.bar(
+                        mv_contributions,
+                        x="group",
+                        y="share",
+                        color="method",
+                        barmode="group",
+                        title="Share of multivariate drift per feature",
+                        template=template,
+                    )
+                    st.plotly_chart(fig_mv, use_container_width=True)
 
-                # ---------- Plain-English explanation ----------
-                with st.expander("🧾 Plain-English Feature Drift Explanation"):
-                    for _, row in results.sort_values("psi", ascending=False).iterrows():
-                        st.markdown(
-                            f"- **{row['feature']}** → PSI = `{row['psi']:.3f}` "
-                            f"({row['severity']}). KS p-value ≈ `{row['ks_p_value']:.2e}`."
-                        )
+            # ---------- Performance ----------
+            with st.expander("⏱ Performance"):
+                show_performance(feature_run["stats"], ref_digest, curr_digest)
     else:
-        st.info("Upload both reference and current feature CSV files to analyze feature drift.")
+        st.info("Upload both reference and current feature files (CSV, Parquet, Arrow or .npy) to analyze feature drift.")
 
 
 # ==========================================================
@@ -342,29 +795,92 @@ with tab_preds:
     colp1, colp2 = st.columns(2)
     with colp1:
         train_pred_file = st.file_uploader(
-            "📂 Training Predictions (e.g. y_pred_train.csv)", type=["csv"], key="train_pred"
+            "📂 Training Predictions (e.g. y_pred_train.csv)", type=UPLOAD_TYPES, key="train_pred"
         )
     with colp2:
         prod_pred_file = st.file_uploader(
-            "📂 Production Predictions (e.g. y_pred_prod.csv)", type=["csv"], key="prod_pred"
+            "📂 Production Predictions (e.g. y_pred_prod.csv)", type=UPLOAD_TYPES, key="prod_pred"
         )
 
+    # ---------- Live predictions from the ingestion service ----------
+    with st.expander("📡 Live Predictions (ingestion service)"):
+        st.caption(
+            "Drift of prediction events posted to `app/drift_ingest.py`, against the training predictions "
+            "it was started with. Read from the service's live counts; nothing is exported or parsed."
+        )
+        live_url = st.text_input(
+            "Service URL:", os.environ.get("DRIFT_INGEST_URL", "http://127.0.0.1:8765"), key="live_url"
+        )
+        if st.button("🔄 Refresh live drift"):
+            try:
+                st.session_state["live_drift"] = fetch_live_drift(live_url)
+                st.session_state["live_performance"] = fetch_live_performance(live_url)
+            except (OSError, ValueError) as exc:
+                st.session_state.pop("live_drift", None)
+                st.session_state.pop("live_performance", None)
+                st.warning(f"Could not reach the ingestion service: {exc}")
+        if "live_drift" in st.session_state:
+            live_results, live = st.session_state["live_drift"]
+            lcol1, lcol2, lcol3 = st.columns(3)
+            lcol1.metric("Events received", f"{live['received']:,}")
+            lcol2.metric("Flushed to log", f"{live['flushed']:,}")
+            lcol3.metric("Buffered", f"{live['buffered']:,}")
+            if len(live_results):
+                live_results["severity"] = classify_severity(live_results["psi"], psi_stable, psi_moderate)
+                st.dataframe(live_results, use_container_width=True)
+                st.plotly_chart(
+                    px.bar(live_results, x="feature", y="psi", color="severity",
+                           title="PSI per Prediction Column (live)", template="plotly_dark"),
+                    use_container_width=True,
+                )
+        if "live_performance" in st.session_state:
+            windows, performance = st.session_state["live_performance"]
+            st.markdown("**🎯 Performance drift (delayed labels)**")
+            st.caption(
+                f"`{performance['score_column']}` joined to labels posted to `/labels` by request id: "
+                f"{performance['joined']:,} joined, {performance['pending_predictions']:,} predictions "
+                f"waiting for labels, {performance['expired_predictions']:,} expired unlabelled."
+            )
+            baseline = performance["baseline"]
+            if not len(windows):
+                st.info("No labelled predictions yet.")
+            else:
+                fig_perf = px.line(
+                    windows.melt(id_vars="window_start", value_vars=["accuracy", "auc", "ece"],
+                                 var_name="metric"),
+                    x="window_start", y="value", color="metric", markers=True,
+                    title="Accuracy / AUC / calibration error per window", template="plotly_dark",
+                )
+                if baseline is not None:
+                    for metric in ("accuracy", "auc", "ece"):
+                        if baseline[metric] is not None:
+                            fig_perf.add_hline(y=baseline[metric], line_dash="dot", line_color="#facc15",
+                                               annotation_text=f"training {metric}")
+                    degraded = int(windows["degraded"].sum())
+                    if degraded:
+                        st.warning(f"⚠ {degraded} window(s) fall short of the training baseline.")
+                st.plotly_chart(fig_perf, use_container_width=True)
+                st.dataframe(windows, use_container_width=True)
+
     if train_pred_file and prod_pred_file:
-        df_train_pred = pd.read_csv(train_pred_file)
-        df_prod_pred = pd.read_csv(prod_pred_file)
+        train_digest = file_digest(train_pred_file)
+        prod_digest = file_digest(prod_pred_file)
+        train_preview = preview_upload(train_pred_file, train_digest)
+        prod_preview = preview_upload(prod_pred_file, prod_digest)
 
         st.markdown('<div class="glass-card" style="margin-top:1rem;">', unsafe_allow_html=True)
         st.subheader("🔍 Prediction Data Preview")
         subp1, subp2 = st.columns(2)
         with subp1:
             st.caption("Training predictions")
-            st.dataframe(df_train_pred.head(), use_container_width=True)
+            st.dataframe(train_preview.head(), use_container_width=True)
         with subp2:
             st.caption("Production predictions")
-            st.dataframe(df_prod_pred.head(), use_container_width=True)
+            st.dataframe(prod_preview.head(), use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
-        pred_cols = df_train_pred.select_dtypes(include="number").columns.tolist()
+        pred_cols = train_preview.select_dtypes(include="number").columns.tolist()
+        pred_cat_cols = [c for c in categorical_columns(train_preview) if c in prod_preview.columns]
 
         st.markdown('<div class="glass-card" style="margin-top:1rem;">', unsafe_allow_html=True)
         st.subheader("🎛 Prediction Columns")
@@ -374,155 +890,408 @@ with tab_preds:
             default=pred_cols,
             key="pred_cols",
         )
-        if len(selected_pred_cols) == 0:
+        selected_pred_cat_cols = st.multiselect(
+            "Select predicted label columns (categorical):",
+            options=pred_cat_cols,
+            default=pred_cat_cols,
+            key="pred_cat_cols",
+        )
+        if len(selected_pred_cols) + len(selected_pred_cat_cols) == 0:
             st.warning("⚠ Select at least one prediction column.")
         st.markdown("</div>", unsafe_allow_html=True)
 
         analyze_preds = st.button("🚀 Analyze Prediction Drift")
 
+        pred_run_key = (train_digest, prod_digest, tuple(selected_pred_cols), tuple(selected_pred_cat_cols),
+                        psi_buckets, kl_bins, top_k, sample, None, time_budget, bootstrap, low_memory)
+
         if analyze_preds:
-            if not selected_pred_cols:
+            if not selected_pred_cols and not selected_pred_cat_cols:
                 st.warning("Pick at least one prediction column.")
             else:
-                pred_results = analyze_drift(
-                    df_train_pred, df_prod_pred, numeric_cols=selected_pred_cols
+                pred_results, pred_stats = run_drift(
+                    "predictions", pred_run_key, train_pred_file, train_digest, prod_pred_file, prod_digest
                 )
+                st.session_state["pred_run"] = {"key": pred_run_key, "results": pred_results, "stats": pred_stats}
 
-                # severity based on PSI thresholds
-                severity_list = []
-                for psi in pred_results["psi"]:
-                    if psi < psi_stable:
-                        severity_list.append("Stable")
-                    elif psi < psi_moderate:
-                        severity_list.append("Moderate")
-                    else:
-                        severity_list.append("Severe")
-                pred_results["severity"] = severity_list
+        # results survive reruns; only re-shown while the inputs are unchanged
+        pred_run = st.session_state.get("pred_run")
+        if pred_run is not None and pred_run["key"] == pred_run_key:
+            pred_results = pred_run["results"].copy()
+
+            # severity based on PSI thresholds
+            pred_results["severity"] = classify_severity(severity_basis(pred_results), psi_stable, psi_moderate)
+            show_sampling_note(pred_results)
 
-                # metrics
-                overall_pred_drift = min(pred_results["psi"].mean() * 100, 100)
-                severe_pred_count = int((pred_results["severity"] == "Severe").sum())
-                n_pred_cols = len(pred_results)
+            # metrics
+            overall_pred_drift = min(pred_results["psi"].mean() * 100, 100)
+            severe_pred_count = int((pred_results["severity"] == "Severe").sum())
+            n_pred_cols = len(pred_results)
 
+            st.markdown(
+                """
+                <div class="glass-card" style="margin-top:1rem;">
+                    <h3 style="margin-bottom:0.8rem;">📡 Prediction Drift Snapshot</h3>
+                """,
+                unsafe_allow_html=True,
+            )
+            mp1, mp2, mp3 = st.columns(3)
+            with mp1:
                 st.markdown(
-                    """
-                    <div class="glass-card" style="margin-top:1rem;">
-                        <h3 style="margin-bottom:0.8rem;">📡 Prediction Drift Snapshot</h3>
+                    f"""
+                    <div class="metric-card">
+                        <div class="metric-label">Overall Pred Drift</div>
+                        <div class="metric-value">{overall_pred_drift:.1f}</div>
+                    </div>
                     """,
                     unsafe_allow_html=True,
                 )
-                mp1, mp2, mp3 = st.columns(3)
-                with mp1:
-                    st.markdown(
-                        f"""
-                        <div class="metric-card">
-                            <div class="metric-label">Overall Pred Drift</div>
-                            <div class="metric-value">{overall_pred_drift:.1f}</div>
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-                with mp2:
-                    st.markdown(
-                        f"""
-                        <div class="metric-card">
-                            <div class="metric-label">Pred Columns</div>
-                            <div class="metric-value">{n_pred_cols}</div>
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-                with mp3:
-                    st.markdown(
-                        f"""
-                        <div class="metric-card">
-                            <div class="metric-label">Severe Pred Drift</div>
-                            <div class="metric-value">{severe_pred_count}</div>
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-
-                # status for prediction drift
-                if severe_pred_count == 0 and overall_pred_drift < 10:
-                    p_status = ("🟢 Stable", "status-green",
-                                "Model outputs look stable. No major prediction drift detected.")
-                elif severe_pred_count <= 1 and overall_pred_drift < 25:
-                    p_status = ("🟡 Monitor", "status-yellow",
-                                "Mild prediction drift detected. Monitor business metrics and calibration.")
-                else:
-                    p_status = ("🔴 Retrain / Recalibrate", "status-red",
-                                "Significant prediction drift detected. Investigate data, labels, and model retraining.")
-
-                p_title, p_pill_class, p_explanation = p_status
-
+            with mp2:
                 st.markdown(
                     f"""
-                    <div style="margin-top:0.9rem; margin-bottom:0.5rem;">
-                        <span class="status-pill {p_pill_class}" style="font-size:1rem; margin-bottom:0.7rem;">
-                            {p_title}
-                        </span>
-                        <p style="color:#d1d5db; margin-top:0.8rem; font-size:0.92rem;">
-                            {p_explanation}
-                        </p>
+                    <div class="metric-card">
+                        <div class="metric-label">Pred Columns</div>
+                        <div class="metric-value">{n_pred_cols}</div>
                     </div>
+                    """,
+                    unsafe_allow_html=True,
+                )
+            with mp3:
+                st.markdown(
+                    f"""
+                    <div class="metric-card">
+                        <div class="metric-label">Severe Pred Drift</div>
+                        <div class="metric-value">{severe_pred_count}</div>
                     </div>
                     """,
                     unsafe_allow_html=True,
                 )
 
-                # table
-                st.markdown('<div class="glass-card" style="margin-top:1rem;">', unsafe_allow_html=True)
-                st.subheader("📋 Prediction Drift Report")
-                st.dataframe(pred_results, use_container_width=True)
-                st.markdown("</div>", unsafe_allow_html=True)
-
-                # plots
-                template = "plotly_dark"
-                pp1, pp2 = st.columns(2)
-                with pp1:
-                    fig_pred_psi = px.bar(
-                        pred_results,
-                        x="feature",
-                        y="psi",
-                        color="severity",
-                        title="PSI per Prediction Column",
-                        template=template,
-                    )
-                    st.plotly_chart(fig_pred_psi, use_container_width=True)
-                with pp2:
-                    fig_pred_ks = px.bar(
-                        pred_results,
-                        x="feature",
-                        y="ks_stat",
-                        title="KS Statistic per Prediction Column",
-                        template=template,
-                    )
-                    st.plotly_chart(fig_pred_ks, use_container_width=True)
-
-                # download
-                pred_csv_bytes = pred_results.to_csv(index=False).encode("utf-8")
-                st.download_button(
-                    label="📥 Download Prediction Drift Report (CSV)",
-                    data=pred_csv_bytes,
-                    file_name="prediction_drift_report.csv",
-                    mime="text/csv",
-                    use_container_width=True,
+            # status for prediction drift
+            if severe_pred_count == 0 and overall_pred_drift < 10:
+                p_status = ("🟢 Stable", "status-green",
+                            "Model outputs look stable. No major prediction drift detected.")
+            elif severe_pred_count <= 1 and overall_pred_drift < 25:
+                p_status = ("🟡 Monitor", "status-yellow",
+                            "Mild prediction drift detected. Monitor business metrics and calibration.")
+            else:
+                p_status = ("🔴 Retrain / Recalibrate", "status-red",
+                            "Significant prediction drift detected. Investigate data, labels, and model retraining.")
+
+            p_title, p_pill_class, p_explanation = p_status
+
+            st.markdown(
+                f"""
+                <div style="margin-top:0.9rem; margin-bottom:0.5rem;">
+                    <span class="status-pill {p_pill_class}" style="font-size:1rem; margin-bottom:0.7rem;">
+                        {p_title}
+                    </span>
+                    <p style="color:#d1d5db; margin-top:0.8rem; font-size:0.92rem;">
+                        {p_explanation}
+                    </p>
+                </div>
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+
+            # table
+            st.markdown('<div class="glass-card" style="margin-top:1rem;">', unsafe_allow_html=True)
+            st.subheader("📋 Prediction Drift Report")
+            st.dataframe(pred_results, use_container_width=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+
+            # plots
+            template = "plotly_dark"
+            pp1, pp2 = st.columns(2)
+            with pp1:
+                fig_pred_psi = px.bar(
+                    pred_results,
+                    x="feature",
+                    y="psi",
+                    color="severity",
+                    title="PSI per Prediction Column",
+                    template=template,
+                )
+                st.plotly_chart(fig_pred_psi, use_container_width=True)
+            with pp2:
+                fig_pred_ks = px.bar(
+                    pred_results,
+                    x="feature",
+                    y="ks_stat",
+                    title="KS Statistic per Prediction Column",
+                    template=template,
                 )
+                st.plotly_chart(fig_pred_ks, use_container_width=True)
+
+            # download
+            pred_csv_bytes = pred_results.to_csv(index=False).encode("utf-8")
+            st.download_button(
+                label="📥 Download Prediction Drift Report (CSV)",
+                data=pred_csv_bytes,
+                file_name="prediction_drift_report.csv",
+                mime="text/csv",
+                use_container_width=True,
+            )
 
-                # explanation
-                with st.expander("🧾 Plain-English Prediction Drift Explanation"):
-                    for _, row in pred_results.sort_values("psi", ascending=False).iterrows():
-                        st.markdown(
-                            f"- **{row['feature']}** → PSI = `{row['psi']:.3f}` "
-                            f"({row['severity']}). KS p-value ≈ `{row['ks_p_value']:.2e}`."
+            # explanation
+            with st.expander("🧾 Plain-English Prediction Drift Explanation"):
+                for _, row in pred_results.sort_values("psi", ascending=False).iterrows():
+                    st.markdown(drift_line(row))
+
+            # ---------- Streaming change points ----------
+            with st.expander("🚨 Change Points in Production"):
+                st.caption(
+                    "Production rows in file order are treated as a stream. ADWIN and Page-Hinkley watch "
+                    "the mean of a score; DDM and EDDM watch a 0/1 error column (1 = wrong prediction)."
+                )
+                stream_cols = [c for c in selected_pred_cols if c in prod_preview.columns]
+                if not stream_cols:
+                    st.info("Select a numeric prediction column.")
+                else:
+                    ccol1, ccol2, ccol3 = st.columns(3)
+                    with ccol1:
+                        stream_col = st.selectbox("Column:", stream_cols, key="stream_col")
+                    with ccol2:
+                        detector_name = st.selectbox("Detector:", list(DETECTORS), key="stream_detector")
+                    with ccol3:
+                        if detector_name == "ADWIN":
+                            detector_params = (("delta", st.number_input(
+                                "Confidence δ", min_value=1e-6, max_value=0.5, value=0.002, format="%.4f",
+                                help="Smaller = fewer, more certain alarms", key="stream_adwin_delta",
+                            )),)
+                        elif detector_name == "PageHinkley":
+                            detector_params = (("threshold", st.number_input(
+                                "Threshold λ", min_value=0.01, value=50.0,
+                                help="Cumulative deviation (in units of the column) that raises an alarm",
+                                key="stream_ph_threshold",
+                            )),)
+                        else:
+                            detector_params = ()
+                    binary = prod_preview[stream_col].dropna().isin([0, 1]).all()
+                    if detector_name in ("DDM", "EDDM") and not binary:
+                        st.info(f"{detector_name} needs a 0/1 error column; `{stream_col}` is not one.")
+                    else:
+                        points, trace = compute_change_points(
+                            prod_digest, stream_col, detector_name, detector_params,
+                            load_upload(prod_pred_file, prod_digest),
+                        )
+                        fig_stream = px.line(
+                            trace, x="row", y="mean",
+                            title=f"{stream_col} in production (block means), {len(points)} change point(s)",
+                            template=template,
                         )
+                        for p in points[:200]:
+                            fig_stream.add_vline(x=int(p), line_color="#f87171", line_dash="dash")
+                        st.plotly_chart(fig_stream, use_container_width=True)
+                        if len(points):
+                            st.caption("Change points (row numbers): " + ", ".join(map(str, points[:50]))
+                                       + (" ..." if len(points) > 50 else ""))
+
+            with st.expander("⏱ Performance"):
+                show_performance(pred_run["stats"], train_digest, prod_digest)
     else:
-        st.info("Upload training & production prediction CSVs to analyze prediction drift.")
+        st.info("Upload training & production prediction files to analyze prediction drift.")
+
+
+# ==========================================================
+# TAB 3: DRIFT TIMELINE
+# ==========================================================
+with tab_timeline:
+    st.markdown(
+        """
+        <div class="glass-card">
+            <h3>⏱ Drift Timeline</h3>
+            <p style="color:#d1d5db; font-size:0.92rem;">
+                Track PSI per feature over sliding time windows of timestamped production data
+                to see <b>when</b> a shift started, not just whether it happened.
+            </p>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    colt1, colt2 = st.columns(2)
+    with colt1:
+        ref_tl_file = st.file_uploader("📂 Reference Dataset (training data)", type=UPLOAD_TYPES, key="ref_timeline")
+    with colt2:
+        curr_tl_file = st.file_uploader(
+            "📂 Timestamped Production Data", type=UPLOAD_TYPES, key="curr_timeline"
+        )
+
+    if ref_tl_file and curr_tl_file:
+        ref_tl_digest = file_digest(ref_tl_file)
+        curr_tl_digest = file_digest(curr_tl_file)
+        df_ref_tl = load_upload(ref_tl_file, ref_tl_digest)
+        df_curr_tl = load_upload(curr_tl_file, curr_tl_digest)
+
+        st.markdown('<div class="glass-card" style="margin-top:1rem;">', unsafe_allow_html=True)
+        st.subheader("🎛 Timeline Settings")
+        # guess the timestamp column: non-numeric columns, "time"/"date" names first
+        ts_candidates = [c for c in df_curr_tl.columns if c not in df_ref_tl.select_dtypes(include="number").columns]
+        ts_candidates.sort(key=lambda c: not any(k in c.lower() for k in ("time", "date", "ts")))
+        ts_candidates += [c for c in df_curr_tl.columns if c not in ts_candidates]
+        tcol1, tcol2, tcol3 = st.columns(3)
+        with tcol1:
+            timestamp_col = st.selectbox("Timestamp column", options=ts_candidates, key="timeline_ts")
+        with tcol2:
+            window = st.text_input("Window size", value="1h", help="Pandas offset, e.g. 15min, 1h, 1D")
+        with tcol3:
+            stride = st.text_input("Stride", value="1h", help="How far each window moves")
+        tl_numeric = [
+            c for c in df_ref_tl.select_dtypes(include="number").columns
+            if c in df_curr_tl.columns and c != timestamp_col
+        ]
+        selected_tl_cols = st.multiselect(
+            "Features to track:", options=tl_numeric, default=tl_numeric, key="timeline_cols"
+        )
+        st.markdown("</div>", unsafe_allow_html=True)
+
+        analyze_timeline = st.button("🚀 Build Drift Timeline")
+
+        timeline_key = (
+            ref_tl_digest, curr_tl_digest, timestamp_col, window, stride,
+            tuple(selected_tl_cols), psi_buckets, kl_bins,
+        )
+
+        if analyze_timeline:
+            if not selected_tl_cols:
+                st.warning("Pick at least one numeric feature.")
+            else:
+                try:
+                    timeline_results, timeline_counts = compute_timeline(*timeline_key, df_ref_tl, df_curr_tl)
+                    st.session_state["timeline_run"] = {"key": timeline_key, "results": timeline_results}
+                except ValueError as exc:
+                    st.error(f"Could not build the timeline: {exc}")
+                else:
+                    if record_history:
+                        # one history run per window; windows stored before are skipped
+                        with DriftHistory(history_path) as history:
+                            history.record_timeline(
+                                timeline_results, model_name, ref_tl_digest,
+                                params={"tab": "timeline", "settings": list(timeline_key[1:])},
+                                rows_reference=len(df_ref_tl), counts=timeline_counts,
+                            )
+
+        timeline_run = st.session_state.get("timeline_run")
+        if timeline_run is not None and timeline_run["key"] == timeline_key:
+            timeline = timeline_run["results"].copy()
+            timeline["severity"] = [
+                None if pd.isna(p) else s
+                for p, s in zip(timeline["psi"], classify_severity(timeline["psi"], psi_stable, psi_moderate))
+            ]
+
+            template = "plotly_dark"
+            fig_tl = px.line(
+                timeline,
+                x="window_start",
+                y="psi",
+                color="feature",
+                markers=True,
+                title="PSI per Feature over Time",
+                template=template,
+            )
+            fig_tl.add_hline(y=psi_stable, line_dash="dot", line_color="#facc15")
+            fig_tl.add_hline(y=psi_moderate, line_dash="dot", line_color="#ef4444")
+            st.plotly_chart(fig_tl, use_container_width=True)
+
+            heat = timeline.pivot(index="feature", columns="window_start", values="psi")
+            fig_heat = px.imshow(
+                heat,
+                aspect="auto",
+                color_continuous_scale="Magma",
+                title="PSI Heatmap (feature × window)",
+                template=template,
+            )
+            st.plotly_chart(fig_heat, use_container_width=True)
+
+            with st.expander("📋 Timeline Table"):
+                st.dataframe(timeline, use_container_width=True)
+            st.download_button(
+                label="📥 Download Drift Timeline (CSV)",
+                data=timeline.to_csv(index=False).encode("utf-8"),
+                file_name="drift_timeline.csv",
+                mime="text/csv",
+                use_container_width=True,
+            )
+    else:
+        st.info("Upload a reference file and a production file with a timestamp column to build a drift timeline.")
+
+
+# ==========================================================
+# TAB 4: HISTORY
+# ==========================================================
+with tab_history:
+    st.markdown(
+        """
+        <div class="glass-card">
+            <h3>🗂 Drift History</h3>
+            <p style="color:#d1d5db; font-size:0.92rem;">
+                Every recorded run, read back from the local history file. Trends come straight
+                from its index, so nothing is recomputed.
+            </p>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    if not os.path.exists(history_path):
+        st.info(f"No drift history at {history_path!r} yet. Runs are recorded while 'Record runs' is on.")
+    else:
+        with DriftHistory(history_path) as history:
+            history_models = history.models()
+            if not history_models:
+                st.info("The drift history is empty.")
+            else:
+                hcol1, hcol2 = st.columns([1, 3])
+                with hcol1:
+                    history_model = st.selectbox(
+                        "Model", history_models,
+                        index=history_models.index(model_name) if model_name in history_models else 0,
+                        key="history_model",
+                    )
+                history_features = history.features(history_model)
+                with hcol2:
+                    chosen_features = st.multiselect(
+                        "Features", history_features, default=history_features[:5], key="history_features"
+                    )
+                trend = history.trend(chosen_features, history_model)
+                onsets = {f: history.drift_onset(f, history_model) for f in chosen_features}
+                history_runs = history.runs(history_model)
+
+        if history_models and chosen_features:
+            fig_hist = px.line(
+                trend,
+                x="window_start",
+                y="psi",
+                color="feature",
+                markers=True,
+                title=f"PSI per Feature over Recorded Runs ({history_model})",
+                template="plotly_dark",
+            )
+            fig_hist.add_hline(y=psi_stable, line_dash="dot", line_color="#facc15")
+            fig_hist.add_hline(y=psi_moderate, line_dash="dot", line_color="#ef4444")
+            st.plotly_chart(fig_hist, use_container_width=True)
+
+            latest = trend.groupby("feature").tail(1).set_index("feature")
+            st.dataframe(
+                pd.DataFrame({
+                    "latest_psi": latest["psi"],
+                    "latest_severity": classify_severity(
+                        latest["psi"], psi_stable, psi_moderate, screened=latest["severity"] == SCREENED
+                    ),
+                    "drifting_since": pd.Series(onsets),
+                }),
+                use_container_width=True,
+            )
+            st.caption("'Drifting since' is the first run of the current stretch at Moderate or worse.")
+        if history_models:
+            with st.expander(f"📋 Recorded Runs ({len(history_runs)})"):
+                st.dataframe(history_runs, use_container_width=True)
 
 
 # ==========================================================
-# TAB 3: ABOUT
+# TAB 5: ABOUT
 # ==========================================================
 with tab_about:
     st.markdown(
@@ -0,0 +1,94 @@
+"""Load time and peak RSS per input format (CSV, Parquet, Arrow IPC, .npy).
+
+Each load runs in a fresh subprocess; peak RSS is VmHWM from /proc (Linux),
+falling back to ru_maxrss elsewhere.
+Run from the repo root:  python benchmarks/bench_formats.py [n_rows] [n_cols] [n_selected]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
+
+CHILD = r"""
+import json, resource, sys, time
+sys.path.insert(0, {app_dir!r})
+import numpy as np
+from drift_io import read_columns, read_table
+import pyarrow, pyarrow.parquet, pyarrow.feather, pyarrow.csv
+
+def peak_kb():
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+baseline = peak_kb()
+start = time.perf_counter()
+if {as_columns!r}:
+    data = read_columns({path!r}, columns={columns!r}, csv_engine={engine!r})
+    total = sum(float(np.nansum(v)) for v in data.values())
+else:
+    data = read_table({path!r}, columns={columns!r}, csv_engine={engine!r})
+    total = float(np.nansum(data.to_numpy()))
+elapsed = time.perf_counter() - start
+peak = peak_kb()
+print(json.dumps({{"seconds": elapsed, "peak_mb": peak / 1024, "delta_mb": (peak - baseline) / 1024}}))
+"""
+
+def write_inputs(tmp, n_rows, n_cols):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(n_rows, n_cols)), columns=[f"f{i}" for i in range(n_cols)])
+    paths = {
+        "csv": os.path.join(tmp, "data.csv"),
+        "parquet": os.path.join(tmp, "data.parquet"),
+        "arrow": os.path.join(tmp, "data.arrow"),
+        "npy": os.path.join(tmp, "data.npy"),
+        "npy_f": os.path.join(tmp, "data_f.npy"),
+    }
+    df.to_csv(paths["csv"], index=False)
+    df.to_parquet(paths["parquet"], index=False)
+    df.to_feather(paths["arrow"], compression="uncompressed")
+    # structured records are row-major; a Fortran-ordered 2D array keeps each column contiguous
+    np.save(paths["npy"], df.to_records(index=False))
+    np.save(paths["npy_f"], np.asfortranarray(df.to_numpy()))
+    return paths
+
+def run(path, columns, engine="c", as_columns=False):
+    code = CHILD.format(app_dir=APP_DIR, path=path, columns=columns, engine=engine, as_columns=as_columns)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    n_cols = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    n_sel = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    columns = [f"f{i}" for i in range(n_sel)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_inputs(tmp, n_rows, n_cols)
+        print(f"{n_rows} rows x {n_cols} cols, reading {n_sel} columns")
+        print(f"{'format':<22} {'size MB':>8} {'load s':>8} {'peak RSS MB':>12} {'+RSS MB':>8}")
+        cases = [
+            ("csv (c parser)", paths["csv"], "c", False),
+            ("csv (pyarrow parser)", paths["csv"], "pyarrow", False),
+            ("parquet", paths["parquet"], "c", False),
+            ("arrow ipc", paths["arrow"], "c", False),
+            ("arrow ipc (views)", paths["arrow"], "c", True),
+            ("npy (memmap views)", paths["npy"], "c", True),
+        ]
+        cases.append(("npy 2D col-major", paths["npy_f"], "c", True))
+        for label, path, engine, as_columns in cases:
+            cols = columns if not path.endswith("_f.npy") else [str(i) for i in range(n_sel)]
+            res = run(path, cols, engine, as_columns)
+            size = os.path.getsize(path) / 2**20
+            print(f"{label:<22} {size:>8.1f} {res['seconds']:>8.3f} {res['peak_mb']:>12.1f} {res['delta_mb']:>8.1f}")
@@ -0,0 +1,77 @@
+"""Drift history: bulk write cost and trend query latency as the store grows.
+
+Writes ``n_windows`` runs of ``n_features`` results (with bin counts) to a
+temporary SQLite file, then times one feature's trend, its drift onset and
+the skip check of an already stored run.
+Run from the repo root:  python benchmarks/bench_history.py [n_windows] [n_features]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from drift_history import DriftHistory  # noqa: E402
+
+
+def fake_run(rng, features, buckets=10, bins=50):
+    # the reference side is the same for every window, as in real use
+    n = len(features)
+    ref = np.random.default_rng(1)
+    results = pd.DataFrame({
+        "feature": features,
+        "psi": rng.gamma(1.0, 0.05, n),
+        "kl_divergence": rng.gamma(1.0, 0.05, n),
+        "ks_stat": rng.random(n) * 0.1,
+        "ks_p_value": rng.random(n),
+        "severity": "Stable",
+    })
+    counts = {
+        "features": features,
+        "psi_base": ref.integers(0, 1000, (n, buckets)),
+        "psi_current": rng.integers(0, 1000, (n, buckets)),
+        "kl_base": ref.integers(0, 1000, (n, bins)),
+        "kl_current": rng.integers(0, 1000, (n, bins)),
+        "kl_edges": np.sort(ref.normal(size=(bins + 1, n)), axis=0),
+    }
+    return results, counts
+
+
+def timed(fn, repeat=5):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    n_windows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    n_features = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    features = [f"f{i}" for i in range(n_features)]
+    rng = np.random.default_rng(0)
+    starts = pd.date_range("2024-01-01", periods=n_windows, freq="1h")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.db")
+        with DriftHistory(path) as history:
+            start = time.perf_counter()
+            for ts in starts:
+                results, counts = fake_run(rng, features)
+                history.record(results, "bench", "ref", window_start=ts, counts=counts)
+            write = time.perf_counter() - start
+            size = os.path.getsize(path) / 2**20
+
+            trend = timed(lambda: history.trend("f7", model="bench"))
+            onset = timed(lambda: history.drift_onset("f7", model="bench"))
+            skip = timed(lambda: history.find_run("bench", "ref", starts[-1].isoformat()))
+
+        print(f"{n_windows} windows x {n_features} features, store {size:.1f} MB")
+        print(f"write         {write:8.3f} s total, {write / n_windows * 1000:.2f} ms per run")
+        print(f"trend         {trend * 1000:8.2f} ms ({n_windows} rows)")
+        print(f"drift_onset   {onset * 1000:8.2f} ms")
+        print(f"skip check    {skip * 1000:8.3f} ms")
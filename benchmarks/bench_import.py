@@ -0,0 +1,93 @@
+"""Cold-start cost: wall time of fresh interpreters importing / running the drift code.
+
+Each case runs ``--repeat`` times in a new ``python -c`` process (so nothing
+is cached in sys.modules); the minimum and median wall time are kept, along
+with which heavy libraries the case left loaded. ``drift_core`` and the
+metric functions of drift_utils need NumPy only; pandas is loaded by the
+DataFrame paths and SciPy only by ``ks_method="scipy"``. Results are written
+to benchmarks/results/ like run_benchmarks.py; ``--compare`` prints time
+ratios against an earlier file.
+Run from the repo root:  python benchmarks/bench_import.py [--repeat 5] [--compare <old>.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from run_benchmarks import RESULTS_DIR, metadata
+
+APP = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
+HEAVY = ["numpy", "pandas", "scipy", "sklearn", "pyarrow", "streamlit", "plotly"]
+
+DATA = "import numpy as np; rng = np.random.default_rng(0); b = rng.normal(size=10_000); c = b + 0.1; "
+FRAMES = ("import numpy as np, pandas as pd; rng = np.random.default_rng(0); "
+          "b = pd.DataFrame(rng.normal(size=(10_000, 10))).add_prefix('f'); c = b + 0.1; ")
+CASES = {
+    "python": "pass",
+    "import drift_core": "import drift_core",
+    "drift_core.psi": DATA + "import drift_core; drift_core.psi(b, c)",
+    "drift_core.drift_metrics": DATA + "import drift_core; drift_core.drift_metrics(b, c)",
+    "import drift_utils": "import drift_utils",
+    "analyze_drift numpy ks": FRAMES + "from drift_utils import analyze_drift; analyze_drift(b, c, ks_method='numpy')",
+    "analyze_drift scipy ks": FRAMES + "from drift_utils import analyze_drift; analyze_drift(b, c)",
+    "import drift_cli": "import drift_cli",
+}
+
+
+def run_case(code, repeat):
+    # the child prints which heavy modules it ended up loading
+    report = f"; import sys; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    times, loaded = [], ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", code + report], cwd=APP, check=True,
+                             capture_output=True, text=True, env={**os.environ, "PYTHONPATH": APP})
+        times.append(time.perf_counter() - start)
+        loaded = out.stdout.strip().splitlines()[-1] if out.stdout.strip() else ""
+    return min(times), statistics.median(times), loaded
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as fh:
+        baseline = {r["case"]: r for r in json.load(fh)["results"]}
+    print(f"\ncompared with {baseline_path}")
+    print(f"{'case':<26} {'old s':>8} {'new s':>8} {'x':>6}")
+    for row in current:
+        old = baseline.get(row["case"])
+        if old is None:
+            continue
+        print(f"{row['case']:<26} {old['min_s']:>8.3f} {row['min_s']:>8.3f} {row['min_s'] / old['min_s']:>6.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time cold imports of the drift modules.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/import_<time>_<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<26} {'min s':>8} {'median s':>9}  loaded")
+    results = []
+    for name, code in CASES.items():
+        best, median, loaded = run_case(code, args.repeat)
+        results.append({"case": name, "min_s": best, "median_s": median, "loaded": loaded})
+        print(f"{name:<26} {best:>8.3f} {median:>9.3f}  {loaded}", flush=True)
+
+    meta = metadata()
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = meta["timestamp"].replace(":", "").replace("-", "")
+        output = os.path.join(RESULTS_DIR, f"import_{stamp}_{meta['git_commit'] or 'nogit'}.json")
+    with open(output, "w") as fh:
+        json.dump({"meta": meta, "results": results}, fh, indent=2)
+    print(f"\nresults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Sustained events/second of the drift_ingest HTTP service on one core.
+
+The service runs in a child process pinned to one CPU (where the platform
+allows it); keep-alive clients post pre-encoded batches of prediction
+events for a fixed time per batch size. Reported are the accepted events
+per wall-clock second and per second of server CPU time. The second number
+is the one-core capacity even when the load generator shares the core.
+Run from the repo root:  python benchmarks/bench_ingest.py [seconds] [connections]
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from drift_ingest import IngestServer  # noqa: E402
+from drift_utils import ReferenceProfile  # noqa: E402
+
+FEATURES = ["y_pred", "prob_class1", "score"]
+
+
+def serve(log_dir, port, ready):
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+    rng = np.random.default_rng(0)
+    train = pd.DataFrame(rng.random((50_000, len(FEATURES))), columns=FEATURES)
+    server = IngestServer(ReferenceProfile.fit(train), log_dir)
+    asyncio.run(server.serve("127.0.0.1", port, lambda address: ready.set()))
+
+
+def make_body(batch, seed):
+    rng = np.random.default_rng(seed)
+    values = rng.random((batch, len(FEATURES))) * 1.1
+    events = [dict(zip(FEATURES, map(float, row)), model="churn", request_id=f"r{seed}-{i}")
+              for i, row in enumerate(values)]
+    return json.dumps(events[0] if batch == 1 else events).encode()
+
+
+async def request(reader, writer, method, path, body=b""):
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int(next(line.split(b":")[1] for line in head.split(b"\r\n")
+                      if line.lower().startswith(b"content-length")))
+    status = int(head.split(b" ", 2)[1])
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def load(port, batch, seconds, connections):
+    bodies = [make_body(batch, seed) for seed in range(8)]
+    accepted = 0
+
+    async def client(i):
+        nonlocal accepted
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        n = 0
+        while time.perf_counter() < deadline:
+            status, reply = await request(reader, writer, "POST", "/events", bodies[n % len(bodies)])
+            if status == 202:
+                accepted += reply["accepted"]
+            else:
+                await asyncio.sleep(0.01)
+            n += 1
+        writer.close()
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, before = await request(reader, writer, "GET", "/health")
+    start = time.perf_counter()
+    deadline = start + seconds
+    await asyncio.gather(*(client(i) for i in range(connections)))
+    elapsed = time.perf_counter() - start
+    _, after = await request(reader, writer, "GET", "/health")
+    writer.close()
+    return accepted, elapsed, after["cpu_seconds"] - before["cpu_seconds"], after["rejected"]
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    port = 8791
+    log_dir = tempfile.mkdtemp(prefix="bench_ingest_")
+    ready = multiprocessing.Event()
+    proc = multiprocessing.Process(target=serve, args=(log_dir, port, ready), daemon=True)
+    proc.start()
+    ready.wait(60)
+    try:
+        print(f"{connections} keep-alive connections, {seconds:g}s per batch size, {os.cpu_count()} CPU(s)")
+        print(f"{'batch':>6} {'events':>10} {'events/s':>10} {'server cpu s':>13} {'events/cpu s':>13} {'503s':>6}")
+        for batch in (1, 10, 100, 1000):
+            accepted, elapsed, cpu, rejected = asyncio.run(load(port, batch, seconds, connections))
+            print(f"{batch:>6} {accepted:>10,} {accepted / elapsed:>10,.0f} {cpu:>13.2f} "
+                  f"{accepted / max(cpu, 1e-9):>13,.0f} {rejected:>6,}")
+    finally:
+        proc.terminate()
+        proc.join()
+        segments = [f for f in os.listdir(log_dir) if f.endswith(".parquet")]
+        rows = sum(len(pd.read_parquet(os.path.join(log_dir, f), columns=FEATURES[:1])) for f in segments)
+        print(f"log: {len(segments)} segments, {rows:,} events flushed")
+        shutil.rmtree(log_dir)
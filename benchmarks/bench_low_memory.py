@@ -0,0 +1,99 @@
+"""Peak RSS of read + analyze_drift in float64 and in the low-memory (float32) mode.
+
+Reference and current CSVs come from make_sample_data.generate (with NaNs).
+Each mode runs in a fresh subprocess that reads both files with read_table
+and runs analyze_drift; peak RSS is VmHWM from /proc (Linux), falling back
+to ru_maxrss elsewhere, and "+RSS" is the growth past the imports.
+
+* float64: the default path;
+* low_memory: analyze_drift(low_memory=True) on the float64 frames;
+* low_memory + float32 frames: the frames also go through downcast_float32
+  right after reading, as the UI's low-memory mode does.
+
+The metrics of the float32 modes are compared with float64's.
+Run from the repo root:  python benchmarks/bench_low_memory.py [rows] [cols]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_DIR = os.path.join(ROOT, "app")
+sys.path.insert(0, ROOT)
+from make_sample_data import generate  # noqa: E402
+
+CHILD = r"""
+import resource, sys, time
+sys.path.insert(0, {app_dir!r})
+import pandas as pd
+from drift_io import read_table
+from drift_utils import analyze_drift, downcast_float32
+import scipy.stats
+
+def peak_kb():
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+baseline = peak_kb()
+start = time.perf_counter()
+ref = read_table({ref!r})
+curr = read_table({curr!r})
+if {downcast!r}:
+    ref, curr = downcast_float32(ref), downcast_float32(curr)
+results = analyze_drift(ref, curr, low_memory={low_memory!r})
+elapsed = time.perf_counter() - start
+peak = peak_kb()
+results.to_json({out!r}, orient="records")
+print(peak / 1024, (peak - baseline) / 1024, elapsed)
+"""
+
+MODES = [
+    ("float64", False, False),
+    ("low_memory", True, False),
+    ("low_memory + float32 frames", True, True),
+]
+METRICS = ["psi", "kl_divergence", "ks_stat", "js_divergence", "wasserstein", "missing_rate_change"]
+
+
+def run(ref, curr, out, low_memory, downcast):
+    code = CHILD.format(app_dir=APP_DIR, ref=ref, curr=curr, out=out, low_memory=low_memory, downcast=downcast)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    peak, delta, seconds = map(float, proc.stdout.split())
+    return peak, delta, seconds
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cols = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as tmp:
+        base, current = generate(rows=rows, cols=cols, nan_rate=0.05, seed=0)
+        ref, curr = os.path.join(tmp, "reference.csv"), os.path.join(tmp, "current.csv")
+        base.to_csv(ref, index=False)
+        current.to_csv(curr, index=False)
+        del base, current
+
+        print(f"{rows:,} rows x {cols} cols per side, 5% NaN")
+        print(f"{'mode':<28} {'seconds':>8} {'peak RSS MB':>12} {'+RSS MB':>8}")
+        results = {}
+        for label, low_memory, downcast in MODES:
+            out = os.path.join(tmp, f"{len(results)}.json")
+            peak, delta, seconds = run(ref, curr, out, low_memory, downcast)
+            results[label] = pd.read_json(out, orient="records")
+            print(f"{label:<28} {seconds:>8.2f} {peak:>12.1f} {delta:>8.1f}", flush=True)
+
+    exact = results["float64"]
+    for label, _, _ in MODES[1:]:
+        diff = (results[label][METRICS] - exact[METRICS]).abs().max()
+        same = (results[label]["severity"] == exact["severity"]).all()
+        print(f"\n{label}: max |difference| from float64, severities equal: {same}")
+        print("  " + ", ".join(f"{name} {value:.2g}" for name, value in diff.items()))
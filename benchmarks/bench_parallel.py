@@ -0,0 +1,41 @@
+"""analyze_drift scaling from 1 to N worker processes.
+
+Run from the repo root:  python benchmarks/bench_parallel.py [n_rows] [n_cols]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from drift_utils import analyze_drift
+
+def make_frames(n_rows, n_cols, seed=0):
+    rng = np.random.default_rng(seed)
+    cols = [f"f{i}" for i in range(n_cols)]
+    base = pd.DataFrame(rng.normal(0, 1, (n_rows, n_cols)), columns=cols)
+    curr = pd.DataFrame(rng.normal(0.1, 1.05, (n_rows, n_cols)), columns=cols)
+    return base, curr
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_cols = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    n_cpu = os.cpu_count() or 1
+    base, curr = make_frames(n_rows, n_cols)
+
+    jobs = sorted({1, 2, 4, 8, n_cpu})
+    jobs = [j for j in jobs if j <= max(n_cpu, 2)]
+    print(f"{n_rows} rows x {n_cols} cols, {n_cpu} CPU(s) available")
+    print(f"{'n_jobs':>6} {'seconds':>9} {'speedup':>8} {'same':>5}")
+
+    serial = None
+    t_serial = None
+    for n_jobs in jobs:
+        start = time.perf_counter()
+        res = analyze_drift(base, curr, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - start
+        if serial is None:
+            serial, t_serial = res, elapsed
+        print(f"{n_jobs:>6} {elapsed:>9.3f} {t_serial / elapsed:>7.2f}x {str(res.equals(serial)):>5}")
@@ -0,0 +1,72 @@
+"""Delayed-label join and rolling performance at scale.
+
+Predictions arrive at a steady rate; each label arrives after an
+exponentially distributed delay, and a share of labels never arrives. The
+stream is fed to PerformanceMonitor in time order in batches. The benchmark
+reports the throughput, the peak number of waiting entries (bounded by
+max_delay, not by the length of the stream) and how far the binned AUC of
+the newest window is from sklearn's exact AUC.
+Run from the repo root:  python benchmarks/bench_performance.py [n_predictions]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from drift_performance import PerformanceMonitor  # noqa: E402
+
+
+def make_stream(n, rate=100.0, mean_delay=600.0, unlabelled=0.2, seed=0):
+    # prediction times at ``rate`` per second, scores and their eventual labels
+    rng = np.random.default_rng(seed)
+    pred_times = np.arange(n) / rate
+    labels = rng.random(n) < 0.3
+    scores = np.clip(rng.normal(0.3 + 0.3 * labels, 0.2), 0, 1)
+    label_times = pred_times + rng.exponential(mean_delay, n)
+    has_label = rng.random(n) >= unlabelled
+    return pred_times, scores, labels.astype(float), label_times, has_label
+
+
+def run(n, batch=10_000, max_delay=3600.0, window_seconds=1800.0):
+    pred_times, scores, labels, label_times, has_label = make_stream(n)
+    ids = np.arange(n)
+    label_ids = ids[has_label][np.argsort(label_times[has_label], kind="stable")]
+    monitor = PerformanceMonitor(window_seconds, max_delay, max_windows=10_000)
+    peak = 0
+    start = time.perf_counter()
+    j = 0
+    for i in range(0, n, batch):
+        now = pred_times[min(i + batch, n) - 1]
+        monitor.add_predictions(ids[i:i + batch].tolist(), pred_times[i:i + batch], scores[i:i + batch])
+        # labels that have arrived by the end of this batch
+        k = np.searchsorted(label_times[label_ids], now, side="right")
+        arrived = label_ids[j:k]
+        monitor.add_labels(arrived.tolist(), label_times[arrived], labels[arrived])
+        j = k
+        monitor.expire(now)
+        peak = max(peak, len(monitor.joiner))
+    elapsed = time.perf_counter() - start
+
+    results = monitor.results()
+    status = monitor.status()
+    # exact AUC of one fully labelled early window, from the pairs the joiner matched
+    window = results.iloc[len(results) // 2]
+    in_window = ((pred_times >= window["window_start"])
+                 & (pred_times < window["window_start"] + window_seconds)
+                 & has_label & (label_times - pred_times <= max_delay))
+    exact = roc_auc_score(labels[in_window], scores[in_window])
+    return elapsed, peak, status, int(window["n"]), int(in_window.sum()), window["auc"], exact
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    elapsed, peak, status, n_window, n_expected, auc, exact = run(n)
+    events = n + status["joined"] + status["pending_labels"] + status["expired_labels"]
+    print(f"{n:,} predictions, {events - n:,} labels in {elapsed:.2f}s ({events / elapsed:,.0f} events/s)")
+    print(f"joined {status['joined']:,}, expired unlabelled {status['expired_predictions']:,}, "
+          f"peak waiting {peak:,}")
+    print(f"mid-stream window: {n_window:,} pairs ({n_expected:,} labelled within max_delay), "
+          f"binned AUC {auc:.5f} vs exact {exact:.5f}")
@@ -0,0 +1,48 @@
+"""Full vs screened analyze_drift as the table widens with a fixed number of drifting features.
+
+Screened runs score every feature on coarse quantile bins first and give
+the full metrics (KS p-value included) only to those above the cutoff, so
+their time should track the drifting features rather than the width.
+Run from the repo root:  python benchmarks/bench_screening.py [n_rows] [n_drifting]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from drift_utils import ReferenceProfile, analyze_drift  # noqa: E402
+
+
+def make_frames(n_rows, n_cols, n_drifting, seed=0):
+    rng = np.random.default_rng(seed)
+    cols = [f"f{i}" for i in range(n_cols)]
+    base = pd.DataFrame(rng.normal(0, 1, (n_rows, n_cols)), columns=cols)
+    curr = pd.DataFrame(rng.normal(0, 1, (n_rows, n_cols)), columns=cols)
+    drifting = cols[:: max(n_cols // n_drifting, 1)][:n_drifting]
+    curr[drifting] = curr[drifting] * 1.2 + 0.3
+    return base, curr, drifting
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - start, out
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    n_drifting = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"{n_rows} rows, {n_drifting} drifting features, cutoff 0.02")
+    print(f"{'cols':>6} {'full s':>8} {'screen s':>9} {'profile s':>10} {'passed':>7} {'caught':>7}")
+    for n_cols in (100, 500, 2000):
+        base, curr, drifting = make_frames(n_rows, n_cols, n_drifting)
+        profile = ReferenceProfile.fit(base)
+        t_full, _ = timed(lambda: analyze_drift(base, curr))
+        t_screen, screened = timed(lambda: analyze_drift(base, curr, screen=0.02))
+        t_profile, _ = timed(lambda: analyze_drift(profile, curr, screen=0.02))
+        passed = set(screened.loc[screened["stage"] == "full", "feature"])
+        print(f"{n_cols:>6} {t_full:>8.2f} {t_screen:>9.2f} {t_profile:>10.2f} {len(passed):>7} "
+              f"{len(passed & set(drifting)):>4}/{len(drifting)}")
@@ -0,0 +1,203 @@
+"""Repeatable timing / memory benchmark of the drift metrics and pipeline.
+
+    python benchmarks/run_benchmarks.py                    # default grid
+    python benchmarks/run_benchmarks.py --quick            # small grid
+    python benchmarks/run_benchmarks.py --rows 1000 100000 --cols 10 500
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<old>.json
+
+Data comes from make_sample_data.generate with a fixed seed. Every benchmark
+is timed ``--repeat`` times (min and median kept), then run once more under
+tracemalloc for the peak of Python / NumPy allocations. Results are written to
+benchmarks/results/ as JSON with version / machine metadata; ``--compare``
+prints ratios against an earlier file and flags regressions.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import scipy
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, ROOT)
+
+from drift_utils import (  # noqa: E402
+    ReferenceProfile,
+    analyze_drift,
+    batch_drift_metrics,
+    calculate_kl,
+    calculate_ks,
+    calculate_psi,
+)
+from make_sample_data import DRIFT_TYPES, generate  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _per_column(fn):
+    def run(base, curr):
+        for col in base.columns:
+            fn(base[col], curr[col])
+    return run
+
+
+def benchmarks(include_loop):
+    cases = {
+        "calculate_psi": _per_column(calculate_psi),
+        "calculate_kl": _per_column(calculate_kl),
+        "calculate_ks": _per_column(calculate_ks),
+        "batch_drift_metrics": lambda b, c: batch_drift_metrics(b.to_numpy(dtype=float), c.to_numpy(dtype=float)),
+        "profile_fit": lambda b, c: ReferenceProfile.fit(b),
+        "analyze_drift": lambda b, c: analyze_drift(b, c),
+        "analyze_drift[low_memory]": lambda b, c: analyze_drift(b, c, low_memory=True),
+    }
+    if include_loop:
+        cases["analyze_drift[loop]"] = lambda b, c: analyze_drift(b, c, engine="loop")
+    return cases
+
+
+def time_it(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata():
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_grid(args):
+    results = []
+    cases = benchmarks(args.include_loop)
+    selected = args.only or list(cases)
+    for rows in args.rows:
+        for cols in args.cols:
+            base, curr = generate(rows=rows, cols=cols, drift=args.drift, nan_rate=args.nan_rate,
+                                  dtype=args.dtype, seed=args.seed)
+            for name in selected:
+                fn = cases[name]
+                best, median = time_it(lambda: fn(base, curr), args.repeat)
+                peak = peak_memory(lambda: fn(base, curr)) if not args.no_memory else None
+                row = {
+                    "benchmark": name, "rows": rows, "cols": cols, "drift": args.drift,
+                    "nan_rate": args.nan_rate, "dtype": args.dtype,
+                    "min_s": best, "median_s": median, "peak_mb": peak,
+                }
+                results.append(row)
+                mem = f"{peak:9.1f}" if peak is not None else f"{'-':>9}"
+                print(f"{name:<22} {rows:>9} {cols:>6} {best:>10.4f} {median:>10.4f} {mem}", flush=True)
+    return results
+
+
+def _key(row):
+    return (row["benchmark"], row["rows"], row["cols"], row["drift"], row["nan_rate"], row["dtype"])
+
+
+def compare(current, baseline_path, tolerance):
+    with open(baseline_path) as fh:
+        baseline = {_key(r): r for r in json.load(fh)["results"]}
+    regressions = 0
+    print(f"\ncompared with {baseline_path} (tolerance {tolerance:.0%})")
+    print(f"{'benchmark':<22} {'rows':>9} {'cols':>6} {'time x':>8} {'mem x':>8}")
+    for row in current:
+        old = baseline.get(_key(row))
+        if old is None:
+            continue
+        t_ratio = row["min_s"] / old["min_s"] if old["min_s"] else np.nan
+        m_ratio = (row["peak_mb"] / old["peak_mb"]
+                   if row.get("peak_mb") and old.get("peak_mb") else np.nan)
+        flag = ""
+        if t_ratio > 1 + tolerance or m_ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{row['benchmark']:<22} {row['rows']:>9} {row['cols']:>6} {t_ratio:>8.2f} {m_ratio:>8.2f}{flag}")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark drift metrics across a size grid.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--cols", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--quick", action="store_true", help="rows 1k/10k, cols 10")
+    parser.add_argument("--drift", choices=[d for d in DRIFT_TYPES if d != "categorical"], default="mean_shift")
+    parser.add_argument("--nan-rate", type=float, default=0.0)
+    parser.add_argument("--dtype", choices=["float32", "float64"], default="float64")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="run only these benchmarks")
+    parser.add_argument("--include-loop", action="store_true", help="also time analyze_drift(engine='loop')")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<time>_<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.quick:
+        args.rows, args.cols = [1_000, 10_000], [10]
+
+    print(f"{'benchmark':<22} {'rows':>9} {'cols':>6} {'min s':>10} {'median s':>10} {'peak MB':>9}")
+    results = run_grid(args)
+
+    meta = metadata()
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = meta["timestamp"].replace(":", "").replace("-", "")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{meta['git_commit'] or 'nogit'}.json")
+    with open(output, "w") as fh:
+        json.dump({"meta": meta, "results": results}, fh, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,168 @@
+"""Sample / synthetic data for the drift detector.
+
+    python make_sample_data.py
+        writes the small demo reference_data.csv / current_data.csv (unchanged)
+
+    python make_sample_data.py --rows 1000000 --cols 200 --drift mean_shift \\
+        --nan-rate 0.01 --dtype float32 --format parquet --out-dir data/
+        writes a synthetic reference / current pair of any size
+
+``generate()`` is also what the benchmark suite uses.
+"""
+import argparse
+import os
+
 import numpy as np
 import pandas as pd
 
-np.random.seed(42)
-
-# Reference (training) data - "old behaviour"
-n_ref = 1000
-ref = pd.DataFrame({
-    "age": np.random.normal(30, 5, n_ref),          # avg 30
-    "salary": np.random.normal(50000, 8000, n_ref), # avg 50k
-    "click_rate": np.random.beta(2, 5, n_ref)       # between 0 and 1
-})
-ref.to_csv("reference_data.csv", index=False)
-
-# Current (production) data - "drifted behaviour"
-n_cur = 1000
-cur = pd.DataFrame({
-    "age": np.random.normal(36, 6, n_cur),          # shifted avg to 36
-    "salary": np.random.normal(60000, 10000, n_cur),# shifted avg to 60k
-    "click_rate": np.random.beta(3, 4, n_cur)       # distribution changed
-})
-cur.to_csv("current_data.csv", index=False)
-
-print("Created reference_data.csv and current_data.csv")
+DRIFT_TYPES = ["none", "mean_shift", "variance", "mixture", "categorical"]
+
+
+def make_sample():
+    np.random.seed(42)
+
+    # Reference (training) data - "old behaviour"
+    n_ref = 1000
+    ref = pd.DataFrame({
+        "age": np.random.normal(30, 5, n_ref),          # avg 30
+        "salary": np.random.normal(50000, 8000, n_ref), # avg 50k
+        "click_rate": np.random.beta(2, 5, n_ref)       # between 0 and 1
+    })
+
+    # Current (production) data - "drifted behaviour"
+    n_cur = 1000
+    cur = pd.DataFrame({
+        "age": np.random.normal(36, 6, n_cur),          # shifted avg to 36
+        "salary": np.random.normal(60000, 10000, n_cur),# shifted avg to 60k
+        "click_rate": np.random.beta(3, 4, n_cur)       # distribution changed
+    })
+    return ref, cur
+
+
+def _numeric_column(rng, kind, n, loc, scale, dtype):
+    # three base shapes so the metrics see more than Gaussians
+    if kind == 0:
+        values = rng.normal(loc, scale, n)
+    elif kind == 1:
+        values = loc + scale * rng.lognormal(0.0, 0.5, n)
+    else:
+        values = loc + scale * rng.beta(2.0, 5.0, n) * 4
+    return values.astype(dtype)
+
+
+def _categorical_column(rng, n, cardinality, probs):
+    codes = rng.choice(cardinality, size=n, p=probs)
+    return pd.Categorical.from_codes(codes, categories=[f"c{i}" for i in range(cardinality)])
+
+
+def generate(rows=10_000, cols=10, drift="mean_shift", magnitude=0.5, drift_frac=0.5,
+             nan_rate=0.0, dtype="float64", categorical_cols=0, cardinality=20,
+             current_rows=None, seed=0):
+    """Synthetic (reference, current) DataFrames.
+
+    ``drift`` is applied to the first ``drift_frac`` of the columns it concerns:
+    numeric columns for mean_shift / variance / mixture, categorical columns for
+    categorical. ``magnitude`` is in units of the column's scale (or, for
+    categorical, the strength of the tilt applied to category probabilities).
+    """
+    if drift not in DRIFT_TYPES:
+        raise ValueError(f"drift must be one of {DRIFT_TYPES}")
+    rng = np.random.default_rng(seed)
+    current_rows = rows if current_rows is None else current_rows
+    n_drift = int(round(cols * drift_frac))
+
+    ref, cur = {}, {}
+    for j in range(cols):
+        name = f"f{j}"
+        kind = j % 3
+        loc = rng.uniform(-10, 10)
+        scale = rng.uniform(0.5, 5)
+        ref[name] = _numeric_column(rng, kind, rows, loc, scale, dtype)
+
+        drifted = j < n_drift
+        if drifted and drift == "mean_shift":
+            cur[name] = _numeric_column(rng, kind, current_rows, loc + magnitude * scale, scale, dtype)
+        elif drifted and drift == "variance":
+            cur[name] = _numeric_column(rng, kind, current_rows, loc, scale * (1 + magnitude), dtype)
+        elif drifted and drift == "mixture":
+            # a share of rows comes from a second component three scales away
+            values = _numeric_column(rng, kind, current_rows, loc, scale, dtype)
+            other = rng.random(current_rows) < min(magnitude, 1.0)
+            values[other] = _numeric_column(rng, kind, int(other.sum()), loc + 3 * scale, scale, dtype)
+            cur[name] = values
+        else:
+            cur[name] = _numeric_column(rng, kind, current_rows, loc, scale, dtype)
+
+    n_cat_drift = int(round(categorical_cols * drift_frac))
+    for j in range(categorical_cols):
+        name = f"cat{j}"
+        # Zipf-like category frequencies
+        probs = 1.0 / np.arange(1, cardinality + 1)
+        probs /= probs.sum()
+        ref[name] = _categorical_column(rng, rows, cardinality, probs)
+        if drift == "categorical" and j < n_cat_drift:
+            tilted = probs * np.exp(magnitude * np.linspace(0, 1, cardinality) * 3)
+            cur[name] = _categorical_column(rng, current_rows, cardinality, tilted / tilted.sum())
+        else:
+            cur[name] = _categorical_column(rng, current_rows, cardinality, probs)
+
+    ref = pd.DataFrame(ref)
+    cur = pd.DataFrame(cur)
+    if nan_rate > 0:
+        numeric = [f"f{j}" for j in range(cols)]
+        ref[numeric] = ref[numeric].mask(rng.random((rows, cols)) < nan_rate)
+        cur[numeric] = cur[numeric].mask(rng.random((current_rows, cols)) < nan_rate)
+    return ref, cur
+
+
+def write_frame(df, path, fmt):
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False)
+    elif fmt == "arrow":
+        df.to_feather(path)
+    else:
+        raise ValueError(f"unknown format {fmt!r}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Write sample or synthetic reference/current data.")
+    parser.add_argument("--rows", type=int, help="reference rows (omit all options for the demo sample)")
+    parser.add_argument("--current-rows", type=int, help="current rows (default: --rows)")
+    parser.add_argument("--cols", type=int, default=10, help="numeric columns")
+    parser.add_argument("--categorical-cols", type=int, default=0)
+    parser.add_argument("--cardinality", type=int, default=20)
+    parser.add_argument("--dtype", choices=["float32", "float64"], default="float64")
+    parser.add_argument("--nan-rate", type=float, default=0.0)
+    parser.add_argument("--drift", choices=DRIFT_TYPES, default="mean_shift")
+    parser.add_argument("--magnitude", type=float, default=0.5)
+    parser.add_argument("--drift-frac", type=float, default=0.5, help="share of columns that drift")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default="csv")
+    parser.add_argument("--out-dir", default=".")
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+
+    if args.rows is None:
+        ref, cur = make_sample()
+        ref.to_csv("reference_data.csv", index=False)
+        cur.to_csv("current_data.csv", index=False)
+        print("Created reference_data.csv and current_data.csv")
+    else:
+        ref, cur = generate(
+            rows=args.rows, cols=args.cols, drift=args.drift, magnitude=args.magnitude,
+            drift_frac=args.drift_frac, nan_rate=args.nan_rate, dtype=args.dtype,
+            categorical_cols=args.categorical_cols, cardinality=args.cardinality,
+            current_rows=args.current_rows, seed=args.seed,
+        )
+        ext = {"csv": "csv", "parquet": "parquet", "arrow": "arrow"}[args.format]
+        os.makedirs(args.out_dir, exist_ok=True)
+        ref_path = os.path.join(args.out_dir, f"reference_data.{ext}")
+        cur_path = os.path.join(args.out_dir, f"current_data.{ext}")
+        write_frame(ref, ref_path, args.format)
+        write_frame(cur, cur_path, args.format)
+        print(f"Created {ref_path} and {cur_path} ({args.rows} rows x {ref.shape[1]} cols, drift={args.drift})")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the app modules are flat files under app/, imported as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
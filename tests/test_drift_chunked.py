@@ -0,0 +1,97 @@
+"""Error bounds of the out-of-core path (see the drift_chunked docstring).
+
+Seeded, so the probabilistic bounds are checked on fixed draws.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from drift_chunked import KLLSketch, analyze_drift_chunked, sketch_ks
+from drift_utils import analyze_drift
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+# normalized rank error of one KLL sketch at k=200 (99% confidence)
+RANK_ERROR = 0.017
+
+
+def rank_error(sketch, values, quantiles):
+    # how far the sketch's quantiles are from the requested ranks, ties counted in the sketch's favour
+    values = np.sort(values)
+    estimates = sketch.quantile(quantiles)
+    low = np.searchsorted(values, estimates, side="left") / len(values)
+    high = np.searchsorted(values, estimates, side="right") / len(values)
+    return float(np.maximum(0, np.maximum(low - quantiles, quantiles - high)).max())
+
+
+def samples(seed, n=200_000):
+    rng = np.random.default_rng(seed)
+    return {
+        "normal": rng.normal(size=n),
+        "lognormal": rng.lognormal(size=n),
+        "discrete": rng.integers(0, 50, n).astype(float),
+    }
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_kll_rank_error_within_epsilon(seed):
+    quantiles = np.linspace(0.01, 0.99, 99)
+    for values in samples(seed).values():
+        sketch = KLLSketch(k=200, seed=seed)
+        for part in np.array_split(values, 37):
+            sketch.update(part)
+        assert sketch.n == len(values)
+        assert sketch.min == values.min() and sketch.max == values.max()
+        assert rank_error(sketch, values, quantiles) <= RANK_ERROR
+
+
+def test_kll_merge_keeps_rank_error():
+    values = samples(7)["lognormal"]
+    parts = [KLLSketch(k=200, seed=i).update(part) for i, part in enumerate(np.array_split(values, 8))]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    assert merged.n == len(values)
+    assert rank_error(merged, values, np.linspace(0.01, 0.99, 99)) <= RANK_ERROR
+    # the sketch stays bounded while the stream grows
+    assert merged.memory_items() < 2_000
+
+
+def test_sketch_ks_within_twice_rank_error():
+    rng = np.random.default_rng(3)
+    base, current = rng.normal(size=100_000), rng.normal(0.05, 1.1, size=100_000)
+    stat, p_value = sketch_ks(KLLSketch(k=200).update(base), KLLSketch(k=200).update(current))
+    exact = analyze_drift(pd.DataFrame({"x": base}), pd.DataFrame({"x": current}))["ks_stat"].iloc[0]
+    assert abs(stat - exact) <= 2 * RANK_ERROR
+    assert 0 <= p_value <= 1
+
+
+@pytest.mark.parametrize("chunksize", [100, 1_000, 100_000])
+def test_chunked_matches_exact_on_sample_data(chunksize):
+    ref_path = os.path.join(ROOT, "reference_data.csv")
+    curr_path = os.path.join(ROOT, "current_data.csv")
+    chunked = analyze_drift_chunked(ref_path, curr_path, chunksize=chunksize)
+    exact = analyze_drift(pd.read_csv(ref_path), pd.read_csv(curr_path), numeric_cols=chunked["feature"].tolist())
+
+    # KL: exact (min / max are tracked exactly); PSI: within 0.02 on this strongly drifted data
+    np.testing.assert_allclose(chunked["kl_divergence"], exact["kl_divergence"], rtol=1e-12)
+    assert (chunked["psi"] - exact["psi"]).abs().max() <= 0.02
+    assert (chunked["ks_stat"] - exact["ks_stat"]).abs().max() <= 2 * RANK_ERROR
+    assert (chunked["severity"] == exact["severity"]).all()
+
+
+def test_chunked_matches_exact_on_mild_drift(tmp_path):
+    rng = np.random.default_rng(11)
+    cols = list("abcd")
+    base = pd.DataFrame(rng.normal(size=(20_000, 4)), columns=cols)
+    current = pd.DataFrame(rng.normal(0.1, 1.1, size=(20_000, 4)), columns=cols)
+    base.iloc[::50, 0] = np.nan
+    base.to_csv(tmp_path / "base.csv", index=False)
+    current.to_csv(tmp_path / "current.csv", index=False)
+
+    chunked = analyze_drift_chunked(tmp_path / "base.csv", tmp_path / "current.csv", chunksize=3_000)
+    exact = analyze_drift(base, current)
+    np.testing.assert_allclose(chunked["kl_divergence"], exact["kl_divergence"], rtol=1e-12)
+    assert (chunked["psi"] - exact["psi"]).abs().max() <= 0.001
+    assert (chunked["ks_stat"] - exact["ks_stat"]).abs().max() <= 2 * RANK_ERROR
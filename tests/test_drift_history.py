@@ -0,0 +1,43 @@
+"""Run keys of analyze_and_record: content decides what counts as already computed."""
+import numpy as np
+import pandas as pd
+
+from drift_history import DriftHistory, analyze_and_record
+
+
+def frames(seed=0, n=5_000):
+    rng = np.random.default_rng(seed)
+    base = pd.DataFrame({"a": rng.normal(size=n), "b": rng.normal(size=n)})
+    current = pd.DataFrame({"a": rng.normal(size=n), "b": rng.normal(size=n)})
+    return base, current
+
+
+def test_same_window_start_with_corrected_data_is_recomputed():
+    base, current = frames()
+    shifted = current.assign(a=current["a"] + 3)
+    with DriftHistory(":memory:") as history:
+        clean = analyze_and_record(history, base, current, window_start="2024-05-01")
+        corrected = analyze_and_record(history, base, shifted, window_start="2024-05-01")
+        again = analyze_and_record(history, base, shifted, window_start="2024-05-01")
+        assert len(history.runs()) == 2
+
+    assert clean.set_index("feature").loc["a", "psi"] < 0.1
+    assert corrected.set_index("feature").loc["a", "psi"] > 1
+    np.testing.assert_allclose(again["psi"], corrected["psi"])
+
+
+def test_column_mappings_are_keyed_and_counted_by_rows():
+    base, current = frames()
+    base_arrays = {c: base[c].to_numpy() for c in base}
+    current_arrays = {c: current[c].to_numpy() for c in current}
+    with DriftHistory(":memory:") as history:
+        from_arrays = analyze_and_record(history, base_arrays, current_arrays, window_start="2024-05-01")
+        runs = history.runs()
+        assert runs["rows_current"].tolist() == [len(current)]
+        assert runs["rows_reference"].tolist() == [len(base)]
+        # a second call with the same arrays finds the stored run
+        analyze_and_record(history, base_arrays, current_arrays, window_start="2024-05-01")
+        assert len(history.runs()) == 1
+    with DriftHistory(":memory:") as history:
+        from_frames = analyze_and_record(history, base, current, window_start="2024-05-01")
+    np.testing.assert_allclose(from_arrays["psi"], from_frames["psi"])